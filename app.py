@@ -9,7 +9,7 @@ import numpy as np
 import json
 import io
 import base64
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Sequence
 from fpdf import FPDF
 import requests
 import json
@@ -24,13 +24,33 @@ from auth import init_auth
 import os
 from typing import Optional, Dict, Any, List
 import uuid
+import logging
 from utils.payment_simulator import PaymentSimulator, show_payment_form, show_payment_success, show_payment_failure
+from utils.course_content import fetch_course_structure, fetch_passed_exam_ids, course_exam_ids, mark_passed_exams
+from utils.progress import CourseProgress, course_item_ids, parse_completed_items, material_item_id, exam_item_id
+from utils.cache import cached, tag
+from utils.query_profiles import projection, FLAT_PROFILES, PROFILES
+from utils.indexes import EnrollmentIndex
+from utils.pagination import Page, DEFAULT_PAGE_SIZE, fetch_page, paginate_rows, search_condition
+from utils.metrics import fetch_admin_metrics
+from utils.parallel import fetch_all, prefetch
+from utils.request_scope import QueryMemo, BatchLoader, query_key, query_table, is_write
+from utils import cache as tagged_cache
+from utils.disk_cache import DiskCache, DEFAULT_PATH as QUERY_CACHE_PATH
+from utils.delta_sync import TableMirror
+from utils.columnar import ColumnarRows
+from utils.local_backend import LocalClient, DEFAULT_PATH as LOCAL_DB_PATH
+from utils.blob_store import (ContentStore, create_blob_store, BlobNotFound, GC_GRACE, GC_INTERVAL,
+                              DEFAULT_PATH as BLOB_STORE_PATH)
+from utils.file_server import FileServer, LINK_TTL
 
 # Importar componentes personalizados
 from components.ui_components import *
 from components.certificate_generator import CertificateGenerator, create_certificate_for_enrollment
 from utils.payment_simulator import PaymentSimulator, show_payment_form, show_payment_success, show_payment_failure
 
+logger = logging.getLogger(__name__)
+
 # ==================== CONFIGURACIÓN DE LA PÁGINA ====================
 
 st.set_page_config(
@@ -305,18 +325,155 @@ from supabase import create_client, Client
 
 @st.cache_resource
 def init_supabase():
-    """Inicializa cliente de Supabase"""
+    """
+    Inicializa el backend de datos
+
+    Con STORAGE_BACKEND = "sqlite" en los secrets se usa la emulación local
+    (LOCAL_DB_PATH), sin conexión a Supabase.
+    """
+    if st.secrets.get("STORAGE_BACKEND", "supabase") == "sqlite":
+        return LocalClient(st.secrets.get("LOCAL_DB_PATH", LOCAL_DB_PATH))
     supabase_url = st.secrets["SUPABASE_URL"]
     supabase_key = st.secrets["SUPABASE_KEY"]
     return create_client(supabase_url, supabase_key)
 
 def clear_cache():
-    """Limpia el caché de Streamlit"""
+    """Limpia todo el caché (Streamlit y consultas, en todas las réplicas)"""
     st.cache_data.clear()
+    tagged_cache.clear()
+    get_query_memo().reset()
+    get_loader().reset()
+
+def invalidate_cache(table: str, **keys):
+    """
+    Invalida solo las lecturas en caché que dependen de una escritura
+    
+    Args:
+        table: Tabla modificada
+        **keys: Claves conocidas de las filas modificadas (id, student, course, module...)
+    """
+    tagged_cache.invalidate(table, **keys)
+    get_query_memo().invalidate(table)
+    get_loader().invalidate(table)
+    if table in table_mirrors:
+        # Espera a que la réplica tenga la escritura: la próxima ejecución ya la ve
+        table_mirrors[table].refresh()
+
+@st.cache_resource
+def init_query_cache_tier():
+    """
+    Conecta el caché persistente en disco debajo del caché de consultas
+    
+    Las réplicas que apuntan QUERY_CACHE_PATH al mismo archivo (volumen
+    compartido) comparten entradas e invalidaciones.
+    """
+    tagged_cache.query_cache.set_budget(
+        int(st.secrets.get("QUERY_CACHE_MAX_MB", 64)) * 1024 * 1024
+    )
+    try:
+        tier = DiskCache(st.secrets.get("QUERY_CACHE_PATH", QUERY_CACHE_PATH))
+    except Exception as e:
+        logger.warning("Caché persistente deshabilitado: %s", e)
+        return None
+    tagged_cache.query_cache.attach_second_tier(tier)
+    return tier
 
 # Inicializar servicios
 supabase = init_supabase()
 auth_system = init_auth(supabase)
+init_query_cache_tier()
+
+@st.cache_resource
+def init_table_mirrors() -> Dict[str, TableMirror]:
+    """
+    Réplicas en memoria de las tablas que se leen completas, con sincronización incremental
+    
+    Requieren la columna updated_at (migrations/001_mirror_updated_at.sql);
+    sin ella esas lecturas usan el caché de consultas.
+    """
+    return {
+        'enrollments': TableMirror(
+            supabase, 'enrollments', PROFILES['enrollments']['stats'],
+            order_by='enrollment_date', index_by=('student_id', 'course_id')
+        ),
+        'subscriptions': TableMirror(
+            supabase, 'subscriptions', PROFILES['subscriptions']['stats'] + ('created_at',),
+            order_by='created_at', index_by=('student_id',)
+        ),
+        'exam_results': TableMirror(
+            supabase, 'exam_results', ('id', 'exam_id', 'student_id', 'score', 'passed', 'completed_at'),
+            order_by='completed_at', index_by=('student_id', 'exam_id')
+        ),
+    }
+
+table_mirrors = init_table_mirrors()
+
+def count_material_refs(storage_key: str) -> int:
+    """Cantidad de materiales que apuntan a un archivo del almacén"""
+    response = supabase.table('study_materials')\
+        .select('id', count='exact', head=True)\
+        .eq('storage_key', storage_key)\
+        .execute()
+    return response.count or 0
+
+@st.cache_resource
+def init_blob_store() -> ContentStore:
+    """
+    Almacén del contenido de los materiales, deduplicado por SHA-256
+    
+    BLOB_BACKEND = "supabase" usa el bucket BLOB_BUCKET de Supabase Storage;
+    por defecto se usa el directorio local BLOB_PATH. Los archivos liberados
+    se borran en segundo plano cada BLOB_GC_INTERVAL segundos, pasados
+    BLOB_GC_GRACE segundos sin referencias.
+    """
+    backend = create_blob_store(
+        st.secrets.get("BLOB_BACKEND", "local"),
+        path=st.secrets.get("BLOB_PATH", BLOB_STORE_PATH),
+        client=supabase,
+        bucket=st.secrets.get("BLOB_BUCKET")
+    )
+    store = ContentStore(backend, count_material_refs)
+    store.start_collector(
+        interval=float(st.secrets.get("BLOB_GC_INTERVAL", GC_INTERVAL)),
+        grace=float(st.secrets.get("BLOB_GC_GRACE", GC_GRACE))
+    )
+    return store
+
+blob_store = init_blob_store()
+
+@st.cache_resource
+def init_file_server() -> Optional[FileServer]:
+    """
+    Servidor de descargas por streaming para el almacén local
+    
+    Escucha en FILE_SERVER_HOST:FILE_SERVER_PORT (por defecto solo en
+    localhost, detrás del proxy); FILE_SERVER_URL es la URL pública con que
+    lo ven los navegadores y FILE_SERVER_SECRET la clave propia con que se
+    firman los enlaces. Retorna None si el almacén genera sus propios
+    enlaces (Supabase Storage), si falta FILE_SERVER_URL o
+    FILE_SERVER_SECRET, o si el puerto no está disponible; en esos casos los
+    materiales se descargan desde la sesión con download_file.
+    """
+    public_url = st.secrets.get("FILE_SERVER_URL")
+    if not hasattr(blob_store.store, 'path') or not public_url:
+        return None
+    secret = st.secrets.get("FILE_SERVER_SECRET")
+    if not secret:
+        logger.warning("Servidor de descargas deshabilitado: falta FILE_SERVER_SECRET")
+        return None
+    try:
+        return FileServer(
+            blob_store.store,
+            secret,
+            public_url,
+            host=st.secrets.get("FILE_SERVER_HOST", "127.0.0.1"),
+            port=int(st.secrets.get("FILE_SERVER_PORT", 8502))
+        )
+    except OSError as e:
+        logger.warning("Servidor de descargas deshabilitado: %s", e)
+        return None
+
+file_server = init_file_server()
 
 # URLs de webhooks de n8n
 N8N_WEBHOOK_URL = st.secrets["N8N_WEBHOOK_URL"]
@@ -362,18 +519,53 @@ def trigger_n8n_workflow(workflow_type: str, data: Dict[str, Any]) -> bool:
         st.error(f"Error en workflow n8n ({workflow_type}): {e}")
         return False
 
-def safe_supabase_query(query_func):
+def get_query_memo() -> QueryMemo:
+    """Memo de lecturas de la ejecución actual del script"""
+    if '_query_memo' not in st.session_state:
+        st.session_state._query_memo = QueryMemo()
+    return st.session_state._query_memo
+
+def get_loader() -> BatchLoader:
+    """Cargador por lotes de usuarios, cursos y módulos de la ejecución actual"""
+    if '_batch_loader' not in st.session_state:
+        # Un lote fallido se informa como las demás consultas y no corta la vista
+        st.session_state._batch_loader = BatchLoader(supabase, execute=safe_supabase_query)
+    return st.session_state._batch_loader
+
+def safe_supabase_query(query):
     """
     Ejecuta una query de Supabase con manejo de errores
     
+    Las lecturas pasadas como consulta sin ejecutar (sin .execute()) se
+    memorizan durante la ejecución actual: repetirlas en la misma pasada del
+    script no vuelve a consultar la base de datos.
+    
     Args:
-        query_func: Función que ejecuta la query
+        query: Consulta sin ejecutar, o función que ejecuta la query
         
     Returns:
         Resultado de la query o None si hay error
     """
     try:
-        return query_func()
+        if callable(query):
+            return query()
+        
+        memo = get_query_memo()
+        key = query_key(query)
+        if key is not None:
+            found, response = memo.get(key)
+            if found:
+                return response
+        
+        response = query.execute()
+        if key is not None:
+            memo.set(key, response)
+        elif is_write(query):
+            # Escritura: las lecturas previas de la tabla ya no son válidas
+            table = query_table(query)
+            if table:
+                memo.invalidate(table)
+        return response
     except Exception as e:
         st.error(f"Error en base de datos: {e}")
         return None
@@ -402,32 +594,33 @@ def get_file_type(extension: str) -> str:
     else:
         return 'other'
 
-def upload_file_base64(file, module_id, title=None):
+def upload_file(file, module_id, title=None):
     """
-    Sube archivos guardándolos como base64 en la base de datos
+    Sube un archivo al almacén de blobs y registra el material
+    
+    El archivo se copia por bloques al almacén (sin hacer más copias completas
+    en memoria); la fila de study_materials guarda solo la clave del archivo
+    (storage_key). Streamlit ya recibió el UploadedFile completo en memoria,
+    así que cada subida ocupa su tamaño en RAM hasta que termina la sesión del
+    widget: el tope lo fija server.maxUploadSize en .streamlit/config.toml.
     """
+    storage_key = None
     try:
         if title is None:
             title = file.name
         
-        # Verificar tamaño del archivo (límite de 10MB para base64)
-        file_size = len(file.getvalue())
-        if file_size > 10 * 1024 * 1024:  # 10MB
-            st.error("❌ Archivo muy grande. Límite: 10MB")
-            return None
-        
-        # Convertir archivo a base64
-        file_content_b64 = base64.b64encode(file.getvalue()).decode('utf-8')
-        
         # Obtener tipo de archivo
         file_extension = get_file_extension(file.name)
         file_type = get_file_type(file_extension)
         
+        # Guardar los bytes en el almacén (si el contenido ya existe se reutiliza)
+        storage_key, file_size = blob_store.put_file(file, content_type=file.type)
+        
         # Guardar en study_materials
         material_data = {
             'module_id': module_id,
             'title': title,
-            'file_content_b64': file_content_b64,
+            'storage_key': storage_key,
             'file_name': file.name,
             'file_size': file_size,
             'file_type': file_type,
@@ -437,38 +630,116 @@ def upload_file_base64(file, module_id, title=None):
         response = supabase.table('study_materials').insert(material_data).execute()
         
         if response.data:
+            blob_store.ensure(storage_key, file, content_type=file.type)
             st.success(f"✅ Archivo '{file.name}' guardado exitosamente")
             return response.data[0]['id']
         else:
+            blob_store.release(storage_key)
             st.error("❌ Error al guardar en la base de datos")
             return None
             
     except Exception as e:
+        if storage_key:
+            blob_store.release(storage_key)
         st.error(f"❌ Error subiendo archivo: {e}")
         return None
 
-def download_file_base64(material_id):
+def download_file(material_id):
     """
-    Descarga un archivo guardado como base64
+    Descarga el contenido de un material
+    
+    Lee del almacén de blobs; las filas aún no migradas se leen desde
+    file_content_b64.
     """
     try:
-        response = supabase.table('study_materials').select('*').eq('id', material_id).execute()
+        response = supabase.table('study_materials')\
+            .select(projection('study_materials', 'content'))\
+            .eq('id', material_id)\
+            .execute()
         
-        if response.data and response.data[0].get('file_content_b64'):
-            material = response.data[0]
-            file_content = base64.b64decode(material['file_content_b64'])
-            file_name = material.get('file_name', 'download')
-            return file_content, file_name
+        if not response.data:
+            return None, None
+        material = response.data[0]
+        file_name = material.get('file_name', 'download')
+        if material.get('storage_key'):
+            return blob_store.get(material['storage_key']), file_name
+        if material.get('file_content_b64'):
+            return base64.b64decode(material['file_content_b64']), file_name
         return None, None
         
+    except BlobNotFound:
+        st.error("❌ El archivo ya no está disponible en el almacén")
+        return None, None
     except Exception as e:
         st.error(f"❌ Error descargando archivo: {e}")
         return None, None
 
+def delete_material(material_id):
+    """
+    Elimina un material y marca su archivo para la recolección
+    
+    El archivo no se borra aquí: la recolección lo elimina más tarde si
+    ningún otro material lo usa.
+    """
+    response = safe_supabase_query(
+        supabase.table('study_materials').select('storage_key').eq('id', material_id)
+    )
+    safe_supabase_query(
+        lambda: supabase.table('study_materials').delete().eq('id', material_id).execute()
+    )
+    storage_key = response.data[0].get('storage_key') if response and response.data else None
+    if storage_key:
+        try:
+            blob_store.release(storage_key)
+        except Exception as e:
+            logger.warning("No se pudo marcar el archivo %s: %s", storage_key, e)
+
+def get_materials_by_ids(files: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Obtiene los datos de listado de materiales a partir de sus ids
+
+    Args:
+        files: Ids de materiales (o dicts con 'id', como en entregas de tareas)
+
+    Returns:
+        Materiales sin el contenido del archivo
+    """
+    ids = [f['id'] if isinstance(f, dict) else f for f in files or []]
+    if not ids:
+        return []
+    response = safe_supabase_query(
+        supabase.table('study_materials')
+        .select(projection('study_materials', 'list'))
+        .in_('id', ids)
+    )
+    return response.data if response and response.data else []
+
+@cached(ttl=LINK_TTL // 2, tags=lambda storage_key, file_name: ['storage'])
+def _storage_signed_url(storage_key: str, file_name: str) -> str:
+    """Enlace firmado de Supabase Storage (se reutiliza mientras sigue vigente)"""
+    return blob_store.store.signed_url(storage_key, file_name, expires_in=LINK_TTL)
+
+def material_download_url(material: Dict[str, Any]) -> Optional[str]:
+    """
+    Enlace de descarga por streaming de un material del almacén
+    
+    Returns:
+        URL firmada, o None si el material no está en el almacén (filas con
+        base64 aún no migradas) o no hay servidor de descargas con URL
+        pública (se usa entonces la descarga desde la sesión)
+    """
+    storage_key = material.get('storage_key')
+    if not storage_key:
+        return None
+    file_name = material.get('file_name') or 'archivo'
+    if hasattr(blob_store.store, 'signed_url'):
+        return _storage_signed_url(storage_key, file_name)
+    if file_server is not None:
+        return file_server.url(storage_key, file_name)
+    return None
+
 def display_materials_with_download(materials, show_delete=False):
     """Muestra materiales con botones de descarga y opcionalmente eliminación"""
-    import base64
-    
     if not materials:
         return None
     
@@ -483,23 +754,27 @@ def display_materials_with_download(materials, show_delete=False):
                 st.write(f"📎 {material.get('file_type', 'Archivo').upper()}")
         
         with col2:
+            download_url = material_download_url(material) if material.get('file_type') != 'link' else None
             if material.get('file_type') == 'link':
                 if st.button("🔗 Abrir", key=f"open_link_{material['id']}"):
                     st.markdown(f"[Abrir enlace]({material['external_link']})")
+            elif download_url:
+                # El navegador descarga directo del almacén, sin pasar por la sesión
+                st.link_button("⬇️ Descargar", download_url)
             else:
                 if st.button("⬇️ Descargar", key=f"download_{material['id']}"):
-                    if material.get('file_content_b64'):
-                        try:
-                            file_data = base64.b64decode(material['file_content_b64'])
-                            st.download_button(
-                                label="💾 Descargar Archivo",
-                                data=file_data,
-                                file_name=material.get('file_name', 'archivo'),
-                                mime=material.get('mime_type', 'application/octet-stream'),
-                                key=f"dl_btn_{material['id']}"
-                            )
-                        except:
-                            st.error("❌ Error al leer el archivo")
+                    # Los listados no traen el contenido; se pide solo al descargar
+                    file_data, file_name = download_file(material['id'])
+                    if file_data is not None:
+                        st.download_button(
+                            label="💾 Descargar Archivo",
+                            data=file_data,
+                            file_name=file_name or material.get('file_name', 'archivo'),
+                            mime=material.get('mime_type', 'application/octet-stream'),
+                            key=f"dl_btn_{material['id']}"
+                        )
+                    else:
+                        st.error("❌ Error al leer el archivo")
         
         if show_delete:
             with col3:
@@ -510,43 +785,205 @@ def display_materials_with_download(materials, show_delete=False):
 
 # ==================== FUNCIONES DE DATOS (CACHED) ====================
 
-@st.cache_data(ttl=60)
-def get_courses(active_only: bool = True) -> List[Dict[str, Any]]:
-    """Obtiene lista de cursos"""
-    query = supabase.table('courses').select('*')
+def _joined_tags(table: str, student_id: Optional[str] = None, profile: str = 'list') -> List[str]:
+    """Dependencias de una lectura por estudiante que embebe users y courses"""
+    tags = [tag(table, student=student_id) if student_id else tag(table)]
+    if profile not in FLAT_PROFILES:
+        tags += [tag('users', id='*'), tag('courses', id='*')]
+    return tags
+
+@cached(ttl=60, tags=lambda active_only=True, profile='list': [tag('courses')], stale='courses')
+def get_courses(active_only: bool = True, profile: str = 'list') -> List[Dict[str, Any]]:
+    """Obtiene lista de cursos con las columnas del perfil indicado"""
+    query = supabase.table('courses').select(projection('courses', profile))
     if active_only:
         query = query.eq('is_active', True)
     response = query.order('created_at', desc=True).execute()
     return response.data if response.data else []
 
-@st.cache_data(ttl=60)
-def get_users(role: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Obtiene lista de usuarios"""
-    query = supabase.table('users').select('*').eq('is_active', True)
+@cached(ttl=60, tags=lambda role=None, profile='list': [tag('users', role=role), tag('users', id='*')] if role else [tag('users')], stale='users')
+def get_users(role: Optional[str] = None, profile: str = 'list') -> List[Dict[str, Any]]:
+    """Obtiene lista de usuarios con las columnas del perfil indicado"""
+    query = supabase.table('users').select(projection('users', profile)).eq('is_active', True)
     if role:
         query = query.eq('role', role)
     response = query.order('created_at', desc=True).execute()
     return response.data if response.data else []
 
-@st.cache_data(ttl=60)
-def get_enrollments(student_id: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Obtiene inscripciones"""
-    query = supabase.table('enrollments').select('*, users(*), courses(*)')
+def get_mirror(table: str) -> Optional[TableMirror]:
+    """Réplica sincronizada de una tabla, o None si la tabla no tiene updated_at"""
+    mirror = table_mirrors[table]
+    return mirror if mirror.sync() else None
+
+def read_mirror(table: str, **filters) -> Optional[List[Dict[str, Any]]]:
+    """
+    Lee filas de la réplica incremental de una tabla, sincronizándola si corresponde
+    
+    Returns:
+        Filas, o None si la réplica no está disponible (usar el caché de consultas)
+    """
+    mirror = get_mirror(table)
+    if mirror is None:
+        return None
+    return mirror.select(**{k: v for k, v in filters.items() if v is not None})
+
+@cached(ttl=60, tags=lambda student_id=None, profile='list': _joined_tags('enrollments', student_id, profile), stale='enrollments')
+def _fetch_enrollments(student_id: Optional[str] = None, profile: str = 'list') -> Sequence[Dict[str, Any]]:
+    """Consulta inscripciones (perfiles con joins, o 'stats' sin réplica), en columnas"""
+    query = supabase.table('enrollments').select(projection('enrollments', profile))
     if student_id:
         query = query.eq('student_id', student_id)
     response = query.order('enrollment_date', desc=True).execute()
-    return response.data if response.data else []
+    return ColumnarRows(response.data or [])
 
-@st.cache_data(ttl=60)
-def get_subscriptions(student_id: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Obtiene suscripciones/pagos"""
-    query = supabase.table('subscriptions').select('*, users(*), courses(*)')
+def get_enrollments(student_id: Optional[str] = None, profile: str = 'list') -> Sequence[Dict[str, Any]]:
+    """
+    Obtiene inscripciones
+    
+    Args:
+        student_id: Filtrar por estudiante
+        profile: 'list' (con usuario y curso resumidos), 'detail' o 'stats'
+            (sin joins, servido desde la réplica incremental si está disponible)
+    """
+    if profile == 'stats':
+        rows = read_mirror('enrollments', student_id=student_id)
+        if rows is not None:
+            return rows
+    return _fetch_enrollments(student_id, profile)
+
+@cached(ttl=60, tags=lambda profile='stats': _joined_tags('enrollments', None, profile), stale='enrollments')
+def _build_enrollment_index(profile: str = 'stats') -> EnrollmentIndex:
+    """Índice de inscripciones armado desde la consulta en caché"""
+    return EnrollmentIndex(_fetch_enrollments(profile=profile))
+
+def get_enrollment_index(profile: str = 'stats') -> EnrollmentIndex:
+    """
+    Obtiene todas las inscripciones indexadas por curso, estudiante y estado
+    
+    Con el perfil 'stats' y la réplica disponible, el índice se arma una vez
+    por versión de la réplica y lo comparten todas las sesiones (solo lectura).
+    """
+    mirror = get_mirror('enrollments') if profile == 'stats' else None
+    if mirror is not None:
+        return mirror.derive('enrollment_index', EnrollmentIndex)
+    return _build_enrollment_index(profile)
+
+@cached(ttl=60, tags=lambda student_id=None, profile='list': _joined_tags('subscriptions', student_id, profile), stale='subscriptions')
+def _fetch_subscriptions(student_id: Optional[str] = None, profile: str = 'list') -> Sequence[Dict[str, Any]]:
+    """Consulta suscripciones (perfiles con joins, o 'stats' sin réplica), en columnas"""
+    query = supabase.table('subscriptions').select(projection('subscriptions', profile))
     if student_id:
         query = query.eq('student_id', student_id)
     response = query.order('created_at', desc=True).execute()
-    return response.data if response.data else []
+    return ColumnarRows(response.data or [])
+
+def get_subscriptions(student_id: Optional[str] = None, profile: str = 'list') -> Sequence[Dict[str, Any]]:
+    """
+    Obtiene suscripciones/pagos
+    
+    Args:
+        student_id: Filtrar por estudiante
+        profile: 'list' (con usuario y curso resumidos), 'detail' o 'stats'
+            (sin joins, servido desde la réplica incremental si está disponible)
+    """
+    if profile == 'stats':
+        rows = read_mirror('subscriptions', student_id=student_id)
+        if rows is not None:
+            return rows
+    return _fetch_subscriptions(student_id, profile)
+
+def get_passed_exam_ids(student_id: str, exam_ids: List[str]) -> Set[str]:
+    """Exámenes aprobados por un estudiante, entre los indicados"""
+    results = read_mirror('exam_results', student_id=student_id, passed=True)
+    if results is None:
+        return fetch_passed_exam_ids(supabase, student_id, exam_ids)
+    wanted = set(exam_ids)
+    return {result['exam_id'] for result in results if result['exam_id'] in wanted}
+
+@cached(ttl=60, tags=lambda: [tag('users'), tag('courses'), tag('enrollments'), tag('subscriptions')], stale='subscriptions')
+def get_admin_metrics() -> Dict[str, Any]:
+    """Obtiene los conteos del dashboard de administración sin descargar filas"""
+    return fetch_admin_metrics(supabase)
+
+# ==================== LISTAS PAGINADAS (CURSOR) ====================
+
+def _users_tags(role: Optional[str] = None, **_) -> List[str]:
+    """Dependencias de una lectura de usuarios"""
+    return [tag('users', role=role), tag('users', id='*')] if role else [tag('users')]
+
+@cached(ttl=60, tags=_users_tags)
+def get_users_page(role: Optional[str] = None, search: Optional[str] = None,
+                   cursor: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE) -> Page:
+    """
+    Obtiene una página de usuarios ordenada por fecha de creación
+    
+    Args:
+        role: Filtrar por rol
+        search: Texto a buscar en nombre, apellido o email
+        cursor: Cursor de la página anterior (None para la primera)
+        page_size: Usuarios por página
+    """
+    query = supabase.table('users').select(projection('users', 'list')).eq('is_active', True)
+    if role:
+        query = query.eq('role', role)
+    conditions = [search_condition(['first_name', 'last_name', 'email'], search)] if search else []
+    return fetch_page(query, 'created_at', cursor, page_size, conditions=conditions)
+
+@cached(ttl=60, tags=lambda status=None, student_id=None, **_: _joined_tags('subscriptions', student_id))
+def get_subscriptions_page(status: Optional[str] = None, student_id: Optional[str] = None,
+                           cursor: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE) -> Page:
+    """
+    Obtiene una página de suscripciones/pagos, las más recientes primero
+    
+    Args:
+        status: Filtrar por estado de pago
+        student_id: Filtrar por estudiante
+        cursor: Cursor de la página anterior (None para la primera)
+        page_size: Pagos por página
+    """
+    query = supabase.table('subscriptions').select(projection('subscriptions', 'list'))
+    if status:
+        query = query.eq('payment_status', status)
+    if student_id:
+        query = query.eq('student_id', student_id)
+    return fetch_page(query, 'created_at', cursor, page_size)
 
-@st.cache_data(ttl=60)
+def get_students_page(course_ids: tuple, cursor: Optional[str] = None,
+                      page_size: int = DEFAULT_PAGE_SIZE) -> Page:
+    """
+    Obtiene una página de estudiantes inscritos en los cursos dados, con
+    todas sus inscripciones en esos cursos
+    
+    Se pagina por estudiante (no por inscripción) para que un estudiante no
+    quede repartido entre páginas. Las inscripciones salen de la réplica
+    incremental; solo los datos de los estudiantes de la página se consultan.
+    
+    Args:
+        course_ids: Cursos a considerar
+        cursor: Cursor de la página anterior (None para la primera)
+        page_size: Estudiantes por página
+    
+    Returns:
+        Page con filas {'id', 'enrollment_date' (la más reciente), 'student',
+        'enrollments'}, los de inscripción más reciente primero
+    """
+    enrollment_index = get_enrollment_index()
+    by_student: Dict[Any, Dict[str, Any]] = {}
+    for course_id in course_ids:
+        for enrollment in enrollment_index.for_course(course_id):
+            group = by_student.setdefault(enrollment['student_id'], {
+                'id': enrollment['student_id'], 'enrollment_date': '', 'enrollments': []
+            })
+            group['enrollments'].append(enrollment)
+            group['enrollment_date'] = max(group['enrollment_date'], enrollment.get('enrollment_date') or '')
+    
+    page = paginate_rows(list(by_student.values()), 'enrollment_date', cursor, page_size)
+    students = get_loader().users.get_many(row['id'] for row in page)
+    for row in page:
+        row['student'] = students.get(row['id'])
+    return page
+
+@cached(ttl=60, tags=lambda course_id: [tag('course_modules', course=course_id)], stale='course_modules')
 def get_course_modules(course_id: str) -> List[Dict[str, Any]]:
     """Obtiene módulos de un curso"""
     response = supabase.table('course_modules')\
@@ -556,7 +993,15 @@ def get_course_modules(course_id: str) -> List[Dict[str, Any]]:
         .execute()
     return response.data if response.data else []
 
-@st.cache_data(ttl=60)
+def _exams_tags(course_id: Optional[str] = None, module_id: Optional[str] = None) -> List[str]:
+    """Dependencias de get_exams según su filtro"""
+    if module_id:
+        return [tag('exams', module=module_id)]
+    if course_id:
+        return [tag('exams', course=course_id), tag('course_modules', course=course_id)]
+    return [tag('exams')]
+
+@cached(ttl=60, tags=_exams_tags, stale='exams')
 def get_exams(course_id: Optional[str] = None, module_id: Optional[str] = None) -> List[Dict[str, Any]]:
     """Obtiene exámenes"""
     query = supabase.table('exams').select('*')
@@ -575,14 +1020,28 @@ def get_exams(course_id: Optional[str] = None, module_id: Optional[str] = None)
     response = query.order('created_at', desc=True).execute()
     return response.data if response.data else []
 
-@st.cache_data(ttl=60)
-def get_certificates(student_id: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Obtiene certificados"""
+@cached(ttl=60, tags=lambda course_id: [
+    tag('course_modules', course=course_id),
+    tag('study_materials', course=course_id),
+    tag('exams', course=course_id)
+], stale='course_modules')
+def get_course_structure(course_id: str) -> List[Dict[str, Any]]:
+    """Obtiene el árbol de un curso (módulos con sus materiales y exámenes)"""
+    return fetch_course_structure(supabase, course_id)
+
+@cached(ttl=60, tags=lambda student_id=None: [
+    tag('certificates'),
+    tag('enrollments', student=student_id) if student_id else tag('enrollments'),
+    tag('users', id='*'),
+    tag('courses', id='*')
+], stale='certificates')
+def get_certificates(student_id: Optional[str] = None) -> Sequence[Dict[str, Any]]:
+    """Obtiene certificados (en columnas, con cursos y usuarios deduplicados)"""
     query = supabase.table('certificates').select('*, enrollments(*, courses(*), users(*))')
     if student_id:
         query = query.eq('enrollments.student_id', student_id)
     response = query.order('issue_date', desc=True).execute()
-    return response.data if response.data else []
+    return ColumnarRows(response.data or [])
 
 # ==================== FUNCIONES DE AUTENTICACIÓN ====================
 
@@ -662,6 +1121,7 @@ def show_login_page():
                                 reg_email, reg_password, reg_first_name, reg_last_name, 'student'
                             )
                             if new_user:
+                                invalidate_cache('users', role='student')
                                 st.success("✅ ¡Registro exitoso! Ahora puedes iniciar sesión.")
                                 st.balloons()
                             else:
@@ -738,23 +1198,26 @@ def show_admin_dashboard():
     user = st.session_state.user
     st.markdown(f"### Bienvenido, {user['first_name']} {user['last_name']}")
     
-    # Métricas principales
-    users_count = len(get_users())
-    courses_count = len(get_courses())
-    students_count = len(get_users('student'))
-    teachers_count = len(get_users('teacher'))
-    enrollments = get_enrollments()
-    subscriptions = get_subscriptions()
+    # Lecturas independientes de todas las pestañas, en paralelo
+    prefetch([
+        lambda: get_courses(active_only=False),
+        lambda: get_courses(active_only=False, profile='stats'),
+        get_courses,
+        lambda: get_users('teacher'),
+        lambda: get_users(profile='stats'),
+        lambda: get_subscriptions(profile='stats'),
+        get_enrollment_index,
+    ])
     
-    # Calcular ingresos totales
-    total_revenue = sum([s.get('amount_paid', 0) for s in subscriptions if s.get('payment_status') == 'approved'])
+    # Métricas principales (conteos exactos, sin descargar filas)
+    metrics = get_admin_metrics()
     
     # Mostrar métricas con componentes personalizados
     stats = [
-        {'title': 'Total Usuarios', 'value': str(users_count), 'icon': '👥', 'delta': f'+{students_count} estudiantes'},
-        {'title': 'Cursos Activos', 'value': str(courses_count), 'icon': '📚'},
-        {'title': 'Inscripciones', 'value': str(len(enrollments)), 'icon': '🎓'},
-        {'title': 'Ingresos Totales', 'value': f'${total_revenue:.2f}', 'icon': '💰', 'delta': f'{len(subscriptions)} pagos'}
+        {'title': 'Total Usuarios', 'value': str(metrics['users']), 'icon': '👥', 'delta': f"+{metrics['students']} estudiantes"},
+        {'title': 'Cursos Activos', 'value': str(metrics['active_courses']), 'icon': '📚'},
+        {'title': 'Inscripciones', 'value': str(metrics['enrollments']), 'icon': '🎓'},
+        {'title': 'Ingresos Totales', 'value': f"${metrics['revenue']:.2f}", 'icon': '💰', 'delta': f"{metrics['payments']} pagos"}
     ]
     
     render_stat_card_row(stats)
@@ -812,7 +1275,7 @@ def show_admin_users_management():
                     new_user = auth_system.create_user(email, password, first_name, last_name, role)
                     if new_user:
                         st.success(f"✅ Usuario {role} creado exitosamente")
-                        clear_cache()
+                        invalidate_cache('users', role=role)
                         st.rerun()
                     else:
                         st.error("❌ Error al crear usuario. El email puede estar en uso.")
@@ -820,28 +1283,21 @@ def show_admin_users_management():
     # Lista de usuarios
     st.markdown("### Todos los Usuarios")
     
-    users = get_users()
+    # Filtros (se aplican en la base de datos)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        role_filter = st.selectbox("Filtrar por Rol", ["Todos", "admin", "teacher", "student"])
+    with col2:
+        search_term = st.text_input("🔍 Buscar por nombre o email")
     
-    if users:
-        # Filtros
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            role_filter = st.selectbox("Filtrar por Rol", ["Todos", "admin", "teacher", "student"])
-        with col2:
-            search_term = st.text_input("🔍 Buscar por nombre o email")
-        
-        # Aplicar filtros
-        filtered_users = users
-        if role_filter != "Todos":
-            filtered_users = [u for u in filtered_users if u['role'] == role_filter]
-        if search_term:
-            filtered_users = [u for u in filtered_users if 
-                            search_term.lower() in u['first_name'].lower() or
-                            search_term.lower() in u['last_name'].lower() or
-                            search_term.lower() in u['email'].lower()]
-        
+    role = None if role_filter == "Todos" else role_filter
+    search = search_term.strip() or None
+    cursor = get_page_cursor("admin_users", (role_filter, search_term))
+    page = get_users_page(role=role, search=search, cursor=cursor)
+    
+    if page.rows:
         # Mostrar usuarios en tarjetas
-        for user in filtered_users:
+        for user in page:
             with st.container():
                 col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
                 
@@ -860,6 +1316,10 @@ def show_admin_users_management():
                         st.session_state.editing_user = user
                 
                 st.markdown("---")
+        
+        render_pagination("admin_users", page.next_cursor)
+    elif role or search:
+        st.info("No se encontraron usuarios con esos filtros")
     else:
         render_empty_state("No hay usuarios registrados", "👥", "Crea el primer usuario arriba")
 
@@ -898,7 +1358,7 @@ def show_admin_courses_management():
                     
                     if result and result.data:
                         st.success("✅ Curso creado exitosamente")
-                        clear_cache()
+                        invalidate_cache('courses')
                         st.rerun()
     
     # Lista de cursos
@@ -908,6 +1368,7 @@ def show_admin_courses_management():
         show_edit_course_form()
     else:
         courses = get_courses(active_only=False)
+        enrollment_index = get_enrollment_index()
         
         if courses:
             for course in courses:
@@ -921,8 +1382,7 @@ def show_admin_courses_management():
                         st.write(f"**Estado:** {'✅ Activo' if course.get('is_active') else '❌ Inactivo'}")
                         
                         # Estadísticas del curso
-                        course_enrollments = [e for e in get_enrollments() if e.get('course_id') == course['id']]
-                        st.write(f"**Inscritos:** {len(course_enrollments)} estudiantes")
+                        st.write(f"**Inscritos:** {enrollment_index.count_for_course(course['id'])} estudiantes")
                     
                     with col2:
                         if st.button("✏️ Editar", key=f"edit_course_{course['id']}", use_container_width=True):
@@ -935,7 +1395,7 @@ def show_admin_courses_management():
                                     lambda: supabase.table('courses').update({'is_active': False}).eq('id', course['id']).execute()
                                 )
                                 st.success("Curso desactivado")
-                                clear_cache()
+                                invalidate_cache('courses', id=course['id'])
                                 st.rerun()
                         else:
                             if st.button("✅ Activar", key=f"activate_{course['id']}", use_container_width=True):
@@ -943,7 +1403,7 @@ def show_admin_courses_management():
                                     lambda: supabase.table('courses').update({'is_active': True}).eq('id', course['id']).execute()
                                 )
                                 st.success("Curso activado")
-                                clear_cache()
+                                invalidate_cache('courses', id=course['id'])
                                 st.rerun()
         else:
             render_empty_state("No hay cursos creados", "📚", "Crea el primer curso arriba")
@@ -981,7 +1441,7 @@ def show_edit_course_form():
                 if result:
                     st.success("✅ Curso actualizado exitosamente")
                     del st.session_state.editing_course
-                    clear_cache()
+                    invalidate_cache('courses', id=course['id'])
                     st.rerun()
         
         with col_btn2:
@@ -1018,11 +1478,10 @@ def show_admin_teacher_assignments():
             if st.form_submit_button("Asignar Profesor", type="primary", use_container_width=True):
                 # Verificar si ya existe
                 existing = safe_supabase_query(
-                    lambda: supabase.table('teacher_assignments')
+                    supabase.table('teacher_assignments')
                     .select('*')
                     .eq('teacher_id', selected_teacher['id'])
                     .eq('course_id', selected_course['id'])
-                    .execute()
                 )
                 
                 if existing and existing.data:
@@ -1039,26 +1498,31 @@ def show_admin_teacher_assignments():
                     
                     if result:
                         st.success("✅ Profesor asignado exitosamente")
-                        clear_cache()
+                        invalidate_cache('teacher_assignments', teacher=selected_teacher['id'], course=selected_course['id'])
                         st.rerun()
         
         # Mostrar asignaciones existentes
         st.markdown("### Asignaciones Actuales")
         
         assignments_response = safe_supabase_query(
-            lambda: supabase.table('teacher_assignments').select('*, users(*), courses(*)').execute()
+            supabase.table('teacher_assignments').select('*')
         )
         
         if assignments_response and assignments_response.data:
+            loader = get_loader()
+            loader.users.want(a['teacher_id'] for a in assignments_response.data)
+            loader.courses.want(a['course_id'] for a in assignments_response.data)
             for assignment in assignments_response.data:
-                if assignment.get('users') and assignment.get('courses'):
+                teacher = loader.user(assignment['teacher_id'])
+                course = loader.course(assignment['course_id'])
+                if teacher and course:
                     col1, col2, col3 = st.columns([3, 3, 1])
                     
                     with col1:
-                        st.write(f"👨‍🏫 **{assignment['users']['first_name']} {assignment['users']['last_name']}**")
+                        st.write(f"👨‍🏫 **{teacher['first_name']} {teacher['last_name']}**")
                     
                     with col2:
-                        st.write(f"📚 {assignment['courses']['name']}")
+                        st.write(f"📚 {course['name']}")
                     
                     with col3:
                         if st.button("❌", key=f"remove_{assignment['id']}", help="Eliminar asignación"):
@@ -1066,7 +1530,7 @@ def show_admin_teacher_assignments():
                                 lambda: supabase.table('teacher_assignments').delete().eq('id', assignment['id']).execute()
                             )
                             st.success("Asignación eliminada")
-                            clear_cache()
+                            invalidate_cache('teacher_assignments', teacher=assignment['teacher_id'], course=assignment['course_id'])
                             st.rerun()
         else:
             st.info("No hay asignaciones todavía")
@@ -1081,7 +1545,7 @@ def show_admin_payments_dashboard():
     
     st.subheader("💳 Dashboard de Pagos")
     
-    subscriptions = get_subscriptions()
+    subscriptions = get_subscriptions(profile='stats')
     
     if subscriptions:
         # Métricas de pagos
@@ -1105,10 +1569,11 @@ def show_admin_payments_dashboard():
         # Gráfico de ingresos por curso
         st.markdown("### Ingresos por Curso")
         
+        course_names = {c['id']: c['name'] for c in get_courses(active_only=False, profile='stats')}
         course_revenue = {}
         for sub in approved_payments:
-            if sub.get('courses'):
-                course_name = sub['courses']['name']
+            course_name = course_names.get(sub.get('course_id'))
+            if course_name:
                 course_revenue[course_name] = course_revenue.get(course_name, 0) + sub.get('amount_paid', 0)
         
         if course_revenue:
@@ -1129,12 +1594,12 @@ def show_admin_payments_dashboard():
         with col1:
             status_filter = st.selectbox("Estado", ["Todos", "approved", "pending", "rejected"])
         
-        filtered_subs = subscriptions
-        if status_filter != "Todos":
-            filtered_subs = [s for s in filtered_subs if s.get('payment_status') == status_filter]
+        status = None if status_filter == "Todos" else status_filter
+        cursor = get_page_cursor("admin_payments", (status_filter,))
+        page = get_subscriptions_page(status=status, cursor=cursor)
         
         # Mostrar transacciones
-        for sub in filtered_subs[:20]:  # Mostrar últimas 20
+        for sub in page:
             with st.container():
                 col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
                 
@@ -1154,6 +1619,8 @@ def show_admin_payments_dashboard():
                     st.caption(sub.get('created_at', '')[:10])
                 
                 st.markdown("---")
+        
+        render_pagination("admin_payments", page.next_cursor)
     else:
         render_empty_state("No hay transacciones registradas", "💳", "Los pagos aparecerán aquí")
 
@@ -1162,11 +1629,18 @@ def show_admin_reports():
     
     st.subheader("📊 Reportes y Estadísticas")
     
-    # Obtener datos
-    users = get_users()
-    courses = get_courses()
-    enrollments = get_enrollments()
-    subscriptions = get_subscriptions()
+    # Obtener datos en paralelo
+    data = fetch_all({
+        'users': lambda: get_users(profile='stats'),
+        'courses': lambda: get_courses(profile='stats'),
+        'enrollment_index': get_enrollment_index,
+        'subscriptions': lambda: get_subscriptions(profile='stats'),
+    })
+    users = data['users']
+    courses = data['courses']
+    enrollment_index = data['enrollment_index']
+    enrollments = enrollment_index.enrollments
+    subscriptions = data['subscriptions']
     
     # Gráfico de usuarios por rol
     st.markdown("### Distribución de Usuarios")
@@ -1246,13 +1720,10 @@ def show_admin_reports():
             pdf.cell(0, 8, "Cursos e inscripciones", 0, 1)
             pdf.set_font("Arial", '', 11)
             for course in courses:
-                course_enrolls = [
-                    e for e in enrollments if e.get('course_id') == course['id']
-                ]
                 pdf.cell(
                     0,
                     6,
-                    f"- {course['name']} | Inscritos: {len(course_enrolls)} | Precio: ${course.get('price', 0):.2f}",
+                    f"- {course['name']} | Inscritos: {enrollment_index.count_for_course(course['id'])} | Precio: ${course.get('price', 0):.2f}",
                     0,
                     1,
                 )
@@ -1267,6 +1738,45 @@ def show_admin_reports():
                 mime="application/pdf",
                 use_container_width=True,
             )
+    
+    # Uso de memoria del caché de consultas
+    with st.expander("🗄️ Caché de consultas"):
+        cache_stats = tagged_cache.query_cache.stats()
+        lookups = cache_stats['hits'] + cache_stats['misses']
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Entradas", cache_stats['entries'])
+        with col2:
+            st.metric(
+                "Memoria",
+                f"{cache_stats['bytes'] / 1024 / 1024:.1f} MB",
+                f"de {cache_stats['max_bytes'] / 1024 / 1024:.0f} MB",
+                delta_color="off"
+            )
+        with col3:
+            st.metric("Aciertos", f"{cache_stats['hits'] / lookups * 100:.0f}%" if lookups else "—")
+        with col4:
+            st.metric(
+                "Descartes",
+                cache_stats['evictions'],
+                f"{cache_stats['oversized']} sin guardar por tamaño",
+                delta_color="off"
+            )
+        
+        if cache_stats['largest']:
+            st.dataframe(
+                pd.DataFrame(
+                    [{'Lectura': name.rsplit('.', 1)[-1], 'KB': round(size / 1024, 1)}
+                     for name, size in cache_stats['largest']]
+                ),
+                use_container_width=True,
+                hide_index=True
+            )
+        st.caption(
+            "Réplicas en memoria: " + ", ".join(
+                f"{table} ({len(mirror)} filas)" for table, mirror in table_mirrors.items()
+            )
+        )
 
 # ==================== CONTINUARÁ EN PARTE 3 ====================
 
@@ -1289,14 +1799,21 @@ def show_teacher_dashboard():
     
     # Obtener cursos asignados
     assignments_response = safe_supabase_query(
-        lambda: supabase.table('teacher_assignments')
-        .select('*, courses(*)')
+        supabase.table('teacher_assignments')
+        .select('*')
         .eq('teacher_id', user['id'])
-        .execute()
     )
     
     teacher_assignments = assignments_response.data if assignments_response and assignments_response.data else []
     
+    # Cursos de las asignaciones en una sola consulta
+    loader = get_loader()
+    loader.courses.want(a['course_id'] for a in teacher_assignments)
+    teacher_assignments = [
+        dict(a, courses=loader.course(a['course_id'])) for a in teacher_assignments
+    ]
+    teacher_assignments = [a for a in teacher_assignments if a['courses']]
+    
     if not teacher_assignments:
         render_empty_state(
             "No tienes cursos asignados",
@@ -1310,12 +1827,20 @@ def show_teacher_dashboard():
     total_modules = 0
     total_exams = 0
     
+    # Lecturas por curso en paralelo
+    calls = {'enrollment_index': get_enrollment_index}
     for assignment in teacher_assignments:
         course_id = assignment['course_id']
-        enrollments = [e for e in get_enrollments() if e.get('course_id') == course_id]
-        total_students += len(enrollments)
-        total_modules += len(get_course_modules(course_id))
-        total_exams += len(get_exams(course_id=course_id))
+        calls[f'modules_{course_id}'] = lambda course_id=course_id: get_course_modules(course_id)
+        calls[f'exams_{course_id}'] = lambda course_id=course_id: get_exams(course_id=course_id)
+    data = fetch_all(calls)
+    enrollment_index = data['enrollment_index']
+    
+    for assignment in teacher_assignments:
+        course_id = assignment['course_id']
+        total_students += enrollment_index.count_for_course(course_id)
+        total_modules += len(data[f'modules_{course_id}'])
+        total_exams += len(data[f'exams_{course_id}'])
     
     stats = [
         {'title': 'Cursos Asignados', 'value': str(len(teacher_assignments)), 'icon': '📚'},
@@ -1371,11 +1896,13 @@ def show_teacher_courses(teacher_assignments):
     
     st.subheader("Mis Cursos Asignados")
     
+    enrollment_index = get_enrollment_index()
+    
     for assignment in teacher_assignments:
         course = assignment['courses']
         
         # Obtener estadísticas del curso
-        enrollments = [e for e in get_enrollments() if e.get('course_id') == course['id']]
+        enrollments = enrollment_index.for_course(course['id'])
         modules = get_course_modules(course['id'])
         
         with st.expander(f"📚 {course['name']}", expanded=True):
@@ -1395,8 +1922,7 @@ def show_teacher_courses(teacher_assignments):
                 with col_stat2:
                     st.metric("Módulos", len(modules))
                 with col_stat3:
-                    completed = len([e for e in enrollments if e.get('completion_status') == 'completed'])
-                    st.metric("Completados", completed)
+                    st.metric("Completados", enrollment_index.status_count(course['id'], 'completed'))
             
             with col2:
                 if st.button("📁 Gestionar Módulos", key=f"manage_modules_{course['id']}", use_container_width=True):
@@ -1467,7 +1993,7 @@ def show_teacher_modules(teacher_assignments):
                         
                         if result:
                             st.success("✅ Módulo creado exitosamente")
-                            clear_cache()
+                            invalidate_cache('course_modules', course=selected_course['id'])
                             st.rerun()
         
         # Mostrar módulos existentes
@@ -1485,11 +2011,10 @@ def show_teacher_modules(teacher_assignments):
                     
                     # Materiales de estudio
                     materials_response = safe_supabase_query(
-                        lambda: supabase.table('study_materials')
-                        .select('*')
+                        supabase.table('study_materials')
+                        .select(projection('study_materials', 'list'))
                         .eq('module_id', module['id'])
                         .order('created_at', desc=True)
-                        .execute()
                     )
                     
                     materials = materials_response.data if materials_response and materials_response.data else []
@@ -1498,11 +2023,9 @@ def show_teacher_modules(teacher_assignments):
                         st.markdown("**Materiales:**")
                         deleted_material = display_materials_with_download(materials, show_delete=True)
                         if deleted_material:
-                            safe_supabase_query(
-                                lambda: supabase.table('study_materials').delete().eq('id', deleted_material).execute()
-                            )
+                            delete_material(deleted_material)
                             st.success("Material eliminado")
-                            clear_cache()
+                            invalidate_cache('study_materials', module=module['id'], course=selected_course['id'])
                             st.rerun()
                     
                     # Botones de acción
@@ -1518,7 +2041,8 @@ def show_teacher_modules(teacher_assignments):
                                 lambda: supabase.table('course_modules').delete().eq('id', module['id']).execute()
                             )
                             st.success("Módulo eliminado")
-                            clear_cache()
+                            invalidate_cache('course_modules', course=selected_course['id'])
+                            invalidate_cache('exams', module=module['id'], course=selected_course['id'])
                             st.rerun()
                     
                     # Formulario de subida de material para este módulo
@@ -1548,7 +2072,7 @@ def show_teacher_modules(teacher_assignments):
                                     if uploaded_files:
                                         for up_file in uploaded_files:
                                             title = material_title or up_file.name
-                                            upload_file_base64(up_file, module['id'], title)
+                                            upload_file(up_file, module['id'], title)
 
                                     if external_link:
                                         link_data = {
@@ -1564,7 +2088,7 @@ def show_teacher_modules(teacher_assignments):
 
                                     st.success("Material(es) guardado(s) correctamente")
                                     st.session_state.uploading_to_module = None
-                                    clear_cache()
+                                    invalidate_cache('study_materials', module=module['id'], course=selected_course['id'])
                                     st.rerun()
         else:
             render_empty_state("No hay módulos creados", "📁", "Crea el primer módulo arriba")
@@ -1657,7 +2181,7 @@ def show_teacher_exams(teacher_assignments):
                         if result and result.data:
                             st.success("✅ Examen creado exitosamente")
                             st.session_state.editing_exam = result.data[0]
-                            clear_cache()
+                            invalidate_cache('exams', module=selected_module['id'], course=selected_course['id'])
                             st.rerun()
         
         # Mostrar exámenes existentes
@@ -1675,11 +2199,10 @@ def show_teacher_exams(teacher_assignments):
                     
                     # Obtener preguntas
                     questions_response = safe_supabase_query(
-                        lambda: supabase.table('exam_questions')
+                        supabase.table('exam_questions')
                         .select('*')
                         .eq('exam_id', exam['id'])
                         .order('question_order')
-                        .execute()
                     )
                     
                     questions = questions_response.data if questions_response and questions_response.data else []
@@ -1704,11 +2227,10 @@ def show_exam_question_editor(exam):
     
     # Obtener preguntas existentes
     questions_response = safe_supabase_query(
-        lambda: supabase.table('exam_questions')
+        supabase.table('exam_questions')
         .select('*')
         .eq('exam_id', exam['id'])
         .order('question_order')
-        .execute()
     )
     
     questions = questions_response.data if questions_response and questions_response.data else []
@@ -1730,7 +2252,7 @@ def show_exam_question_editor(exam):
                             lambda: supabase.table('exam_questions').delete().eq('id', question['id']).execute()
                         )
                         st.success("Pregunta eliminada")
-                        clear_cache()
+                        invalidate_cache('exam_questions', exam=exam['id'])
                         st.rerun()
     
     # Agregar nueva pregunta
@@ -1811,7 +2333,7 @@ def show_exam_question_editor(exam):
                     
                     if result:
                         st.success("✅ Pregunta agregada exitosamente")
-                        clear_cache()
+                        invalidate_cache('exam_questions', exam=exam['id'])
                         st.rerun()
     
     # Botón para volver
@@ -1826,15 +2348,20 @@ def show_exam_results(exam):
     
     # Obtener resultados
     results_response = safe_supabase_query(
-        lambda: supabase.table('exam_results')
-        .select('*, users(*)')
+        supabase.table('exam_results')
+        .select('*')
         .eq('exam_id', exam['id'])
         .order('completed_at', desc=True)
-        .execute()
     )
     
     results = results_response.data if results_response and results_response.data else []
     
+    # Autores de los resultados en una sola consulta
+    loader = get_loader()
+    loader.users.want(r['student_id'] for r in results)
+    results = [dict(r, users=loader.user(r['student_id'])) for r in results]
+    results = [r for r in results if r['users']]
+    
     if results:
         # Estadísticas generales
         total_students = len(results)
@@ -1944,22 +2471,23 @@ def show_teacher_assignments_tab(teacher_assignments):
                     # Subir archivos guía como materiales del módulo
                     if guide_files and new_assignment:
                         for guide_file in guide_files:
-                            upload_file_base64(
+                            upload_file(
                                 guide_file,
                                 selected_module['id'],
                                 f"Guía: {guide_file.name}",
                             )
 
                     st.success("Tarea creada exitosamente")
-                    clear_cache()
+                    invalidate_cache('assignments', module=selected_module['id'])
+                    if guide_files:
+                        invalidate_cache('study_materials', module=selected_module['id'], course=selected_course['id'])
                     st.rerun()
 
     # Listar tareas existentes del curso
     st.markdown("### Tareas del Curso")
     assignments_response = safe_supabase_query(
-        lambda: supabase.table('assignments')
-        .select('*, course_modules(*)')
-        .execute()
+        supabase.table('assignments')
+        .select('*')
     )
 
     assignments = assignments_response.data if assignments_response and assignments_response.data else []
@@ -1969,8 +2497,10 @@ def show_teacher_assignments_tab(teacher_assignments):
         course_assignments = [a for a in assignments if a.get('module_id') in module_ids]
 
         if course_assignments:
+            loader = get_loader()
+            loader.modules.want(a['module_id'] for a in course_assignments)
             for assignment in course_assignments:
-                module_info = assignment.get('course_modules')
+                module_info = loader.module(assignment['module_id'])
                 module_label = (
                     f"Módulo {module_info.get('module_number')}: {module_info.get('title')}"
                     if module_info
@@ -1983,10 +2513,9 @@ def show_teacher_assignments_tab(teacher_assignments):
 
                     # Contar entregas
                     submissions_resp = safe_supabase_query(
-                        lambda: supabase.table('assignment_submissions')
+                        supabase.table('assignment_submissions')
                         .select('id, status')
                         .eq('assignment_id', assignment['id'])
-                        .execute()
                     )
                     submissions = (
                         submissions_resp.data
@@ -2004,27 +2533,21 @@ def show_teacher_students(teacher_assignments):
     
     st.subheader("Mis Estudiantes")
     
-    # Obtener todos los estudiantes de los cursos del profesor
+    # Página actual de estudiantes de los cursos del profesor
+    course_names = {a['courses']['id']: a['courses']['name'] for a in teacher_assignments}
+    cursor = get_page_cursor("teacher_students")
+    page = get_students_page(tuple(course_names), cursor=cursor)
+    
+    # Cursos y progreso de cada estudiante (todas sus inscripciones, no solo las de la página)
     all_students = {}
     
-    for assignment in teacher_assignments:
-        course = assignment['courses']
-        enrollments = [e for e in get_enrollments() if e.get('course_id') == course['id']]
-        
-        for enrollment in enrollments:
-            if enrollment.get('users'):
-                student = enrollment['users']
-                student_id = student['id']
-                
-                if student_id not in all_students:
-                    all_students[student_id] = {
-                        'student': student,
-                        'courses': [],
-                        'progress': []
-                    }
-                
-                all_students[student_id]['courses'].append(course['name'])
-                all_students[student_id]['progress'].append(enrollment.get('progress_percentage', 0))
+    for row in page:
+        if row.get('student'):
+            all_students[row['id']] = {
+                'student': row['student'],
+                'courses': [course_names.get(e['course_id'], '') for e in row['enrollments']],
+                'progress': [e.get('progress_percentage') or 0 for e in row['enrollments']]
+            }
     
     if all_students:
         for student_id, data in all_students.items():
@@ -2047,6 +2570,8 @@ def show_teacher_students(teacher_assignments):
                     render_progress_bar(avg_progress, "Progreso Promedio")
                 
                 st.markdown("---")
+        
+        render_pagination("teacher_students", page.next_cursor)
     else:
         render_empty_state("No hay estudiantes inscritos", "👥")
 
@@ -2119,27 +2644,26 @@ def show_student_course_content(course):
         st.error("No estás inscrito en este curso")
         return
         
-    # Obtener módulos
-    modules = get_course_modules(course['id'])
+    # Obtener árbol del curso y exámenes aprobados en consultas agrupadas
+    course_tree = get_course_structure(course['id'])
+    passed_exam_ids = safe_supabase_query(
+        lambda: get_passed_exam_ids(st.session_state.user['id'], course_exam_ids(course_tree))
+    ) or set()
+    course_tree = mark_passed_exams(course_tree, passed_exam_ids)
     
     # Obtener progreso guardado
-    completed_items = enrollment.get('completed_items', []) or []
-    if isinstance(completed_items, str):
-        try:
-            completed_items = json.loads(completed_items)
-        except:
-            completed_items = []
-            
-    # Calcular progreso total
-    total_items = 0
-    completed_count = 0
+    progress = CourseProgress(
+        course_item_ids(course_tree),
+        parse_completed_items(enrollment.get('completed_items'))
+    )
+    newly_passed = False
     
     col_content, col_sidebar = st.columns([3, 1])
     
     with col_content:
         st.subheader("Contenido del Curso")
         
-        for module in modules:
+        for module in course_tree:
             with st.expander(f"📁 Módulo {module['module_number']}: {module['title']}", expanded=True):
                 st.write(module.get('study_material', ''))
                 
@@ -2147,54 +2671,33 @@ def show_student_course_content(course):
                     st.markdown(f"**[🔗 Ver Contenido]({module['content_url']})**")
                 
                 # Materiales
-                materials = safe_supabase_query(
-                    lambda: supabase.table('study_materials').select('*').eq('module_id', module['id']).execute()
-                ).data or []
+                materials = module['materials']
                 
                 if materials:
                     st.markdown("**Materiales del módulo:**")
                     display_materials_with_download(materials, show_delete=False)
                 
                 for material in materials:
-                    item_id = f"mat_{material['id']}"
-                    total_items += 1
-                    is_completed = item_id in completed_items
-                    if is_completed:
-                        completed_count += 1
+                    item_id = material_item_id(material['id'])
+                    is_completed = progress.is_completed(item_id)
                         
                     if st.checkbox(f"📄 {material['title']}", value=is_completed, key=f"check_{item_id}"):
-                        if not is_completed:
-                            completed_items.append(item_id)
-                            update_progress(enrollment['id'], completed_items)
+                        if progress.mark(item_id):
+                            update_progress(enrollment, progress)
                             st.rerun()
                     else:
-                        if is_completed:
-                            completed_items.remove(item_id)
-                            update_progress(enrollment['id'], completed_items)
+                        if progress.unmark(item_id):
+                            update_progress(enrollment, progress)
                             st.rerun()
                 
                 # Exámenes del módulo
-                exams = get_exams(module_id=module['id'])
-                for exam in exams:
-                    item_id = f"exam_{exam['id']}"
-                    total_items += 1
+                for exam in module['exams']:
+                    item_id = exam_item_id(exam['id'])
                     
                     # Verificar si el examen fue aprobado
-                    exam_results = safe_supabase_query(
-                        lambda: supabase.table('exam_results')
-                        .select('*')
-                        .eq('exam_id', exam['id'])
-                        .eq('student_id', st.session_state.user['id'])
-                        .eq('passed', True)
-                        .execute()
-                    ).data
-                    
-                    is_passed = len(exam_results) > 0
-                    if is_passed:
-                        completed_count += 1
-                        if item_id not in completed_items:
-                            completed_items.append(item_id)
-                            update_progress(enrollment['id'], completed_items)
+                    is_passed = exam['passed']
+                    if is_passed and progress.mark(item_id):
+                        newly_passed = True
                     
                     st.markdown(f"**📝 Examen: {exam['title']}**")
                     if is_passed:
@@ -2203,13 +2706,17 @@ def show_student_course_content(course):
                         if st.button("Realizar Examen", key=f"take_exam_btn_{exam['id']}"):
                             st.session_state.taking_exam = exam
                             st.rerun()
+        
+        # Registrar de una sola vez los exámenes aprobados desde la última visita
+        if newly_passed:
+            update_progress(enrollment, progress)
 
     with col_sidebar:
         st.markdown("### Tu Progreso")
-        progress = (completed_count / total_items * 100) if total_items > 0 else 0
-        render_progress_bar(progress, f"{int(progress)}%")
+        percentage = progress.percentage
+        render_progress_bar(percentage, f"{int(percentage)}%")
         
-        if progress >= 100:
+        if percentage >= 100:
             st.success("¡Curso Completado!")
             if not enrollment.get('certificate_issued'):
                 if st.button("🎓 Solicitar Certificado", use_container_width=True):
@@ -2220,37 +2727,18 @@ def show_student_course_content(course):
                     })
                     st.success("Certificado solicitado")
 
-def update_progress(enrollment_id, completed_items):
-    """Actualiza el progreso del estudiante"""
-    # Calcular porcentaje (simplificado, idealmente basado en total de items del curso)
-    # Aquí solo actualizamos la lista de items completados
-    # El porcentaje real se debería recalcular basado en el total de items del curso
-    
-    # Obtener curso para saber total de items
-    enrollment = safe_supabase_query(
-        lambda: supabase.table('enrollments').select('course_id').eq('id', enrollment_id).single().execute()
-    ).data
+def update_progress(enrollment, progress: CourseProgress):
+    """
+    Guarda el progreso del estudiante con una sola escritura
     
-    if enrollment:
-        course_id = enrollment['course_id']
-        modules = get_course_modules(course_id)
-        total_items = 0
-        for m in modules:
-            mats = safe_supabase_query(lambda: supabase.table('study_materials').select('id').eq('module_id', m['id']).execute()).data or []
-            exams = get_exams(module_id=m['id'])
-            total_items += len(mats) + len(exams)
-            
-        progress_percentage = (len(completed_items) / total_items * 100) if total_items > 0 else 0
-        
-        safe_supabase_query(
-            lambda: supabase.table('enrollments').update({
-                'completed_items': json.dumps(completed_items),
-                'progress_percentage': progress_percentage,
-                'completion_status': 'completed' if progress_percentage >= 100 else 'in_progress'
-            }).eq('id', enrollment_id).execute()
-        )
-        # Limpiar caché para que el nuevo progreso se refleje inmediatamente
-        clear_cache()
+    El total de ítems proviene del árbol del curso en caché, por lo que no
+    se vuelve a consultar la inscripción ni los módulos del curso.
+    """
+    safe_supabase_query(
+        lambda: supabase.table('enrollments').update(progress.to_update()).eq('id', enrollment['id']).execute()
+    )
+    # Limpiar caché para que el nuevo progreso se refleje inmediatamente
+    invalidate_cache('enrollments', id=enrollment['id'], student=enrollment['student_id'], course=enrollment['course_id'])
 
 
 def show_student_course_catalog():
@@ -2322,7 +2810,7 @@ def show_student_course_catalog():
                             
                             if result:
                                 st.success("✅ ¡Inscrito exitosamente!")
-                                clear_cache()
+                                invalidate_cache('enrollments', student=st.session_state.user['id'], course=course['id'])
                                 st.rerun()
                     else:
                         # Proceso de pago
@@ -2362,7 +2850,8 @@ def show_student_checkout():
                 'payment_method': payment_result['payment_method']
             })
             
-            clear_cache()
+            invalidate_cache('subscriptions', student=st.session_state.user['id'], course=course['id'])
+            invalidate_cache('enrollments', student=st.session_state.user['id'], course=course['id'])
             
             if st.button("✅ Ir a Mis Cursos", type="primary", use_container_width=True):
                 del st.session_state.purchasing_course
@@ -2453,12 +2942,11 @@ def show_student_exams():
                         with col2:
                             # Verificar estado
                             results_response = safe_supabase_query(
-                                lambda: supabase.table('exam_results')
+                                supabase.table('exam_results')
                                 .select('*')
                                 .eq('exam_id', exam['id'])
                                 .eq('student_id', st.session_state.user['id'])
                                 .order('id', desc=True)
-                                .execute()
                             )
                             results = results_response.data if results_response and results_response.data else []
                             
@@ -2495,7 +2983,7 @@ def take_exam(exam):
     
     # Obtener preguntas
     questions = safe_supabase_query(
-        lambda: supabase.table('exam_questions').select('*').eq('exam_id', exam['id']).order('question_order').execute()
+        supabase.table('exam_questions').select('*').eq('exam_id', exam['id']).order('question_order')
     ).data or []
     
     if not questions:
@@ -2555,18 +3043,26 @@ def show_student_certificates():
     
     st.subheader("🎓 Mis Certificados")
     
-    # Obtener certificados del estudiante
+    # Obtener certificados de las inscripciones del estudiante
+    my_enrollments = {
+        e['id']: e for e in get_enrollments(student_id=st.session_state.user['id'], profile='stats')
+    }
     certs_response = safe_supabase_query(
-        lambda: supabase.table('certificates')
-        .select('*, enrollments(*, courses(*))')
-        .execute()
-    )
+        supabase.table('certificates')
+        .select('*')
+        .in_('enrollment_id', list(my_enrollments))
+    ) if my_enrollments else None
     
     if certs_response and certs_response.data:
-        # Filtrar certificados del estudiante actual
-        my_certs = [c for c in certs_response.data 
-                   if c.get('enrollments') and 
-                   c['enrollments'].get('student_id') == st.session_state.user['id']]
+        # Cursos de los certificados en una sola consulta
+        loader = get_loader()
+        loader.courses.want(my_enrollments[c['enrollment_id']]['course_id'] for c in certs_response.data)
+        my_certs = []
+        for cert in certs_response.data:
+            enrollment = my_enrollments[cert['enrollment_id']]
+            course = loader.course(enrollment['course_id'])
+            if course:
+                my_certs.append(dict(cert, enrollments=dict(enrollment, courses=course)))
         
         if my_certs:
             for cert in my_certs:
@@ -2728,6 +3224,10 @@ def show_student_payments():
 def main():
     """Función principal de la aplicación"""
     
+    # Cada ejecución del script empieza con el memo de lecturas y el cargador vacíos
+    get_query_memo().reset()
+    get_loader().reset()
+    
     # Verificar autenticación
     if not auth_system.is_authenticated():
         show_login_page()
@@ -2794,9 +3294,8 @@ def show_student_assignments():
         
         # Obtener tareas del curso
         assignments_response = safe_supabase_query(
-            lambda: supabase.table('assignments')
-            .select('*, course_modules(*)')
-            .execute()
+            supabase.table('assignments')
+            .select('*')
         )
         
         assignments = assignments_response.data if assignments_response and assignments_response.data else []
@@ -2813,8 +3312,10 @@ def show_student_assignments():
         if course_assignments:
             st.markdown(f"### 📚 {course['name']}")
             
+            loader = get_loader()
+            loader.modules.want(a['module_id'] for a in course_assignments)
             for assignment in course_assignments:
-                module_info = assignment.get('course_modules')
+                module_info = loader.module(assignment['module_id'])
                 module_label = (
                     f"Módulo {module_info.get('module_number')}: {module_info.get('title')}"
                     if module_info
@@ -2828,11 +3329,10 @@ def show_student_assignments():
                     
                     # Verificar si ya entregó la tarea
                     submission_response = safe_supabase_query(
-                        lambda: supabase.table('assignment_submissions')
+                        supabase.table('assignment_submissions')
                         .select('*')
                         .eq('assignment_id', assignment['id'])
                         .eq('student_id', st.session_state.user['id'])
-                        .execute()
                     )
                     
                     submission = submission_response.data[0] if submission_response and submission_response.data else None
@@ -2844,7 +3344,9 @@ def show_student_assignments():
                         # Mostrar archivos entregados
                         if submission.get('files'):
                             st.markdown("**Archivos entregados:**")
-                            display_materials_with_download(submission['files'], show_delete=False)
+                            display_materials_with_download(
+                                get_materials_by_ids(submission['files']), show_delete=False
+                            )
                     else:
                         # Formulario para entregar tarea
                         with st.form(f"submit_assignment_{assignment['id']}"):
@@ -2872,7 +3374,7 @@ def show_student_assignments():
                                     # Guardar archivos como materiales
                                     saved_files = []
                                     for file in submitted_files:
-                                        file_id = upload_file_base64(file, assignment['module_id'], file.name)
+                                        file_id = upload_file(file, assignment['module_id'], file.name)
                                         if file_id:
                                             saved_files.append(file_id)
                                     
@@ -2893,7 +3395,8 @@ def show_student_assignments():
                                         
                                         if result:
                                             st.success("✅ Tarea entregada exitosamente")
-                                            clear_cache()
+                                            invalidate_cache('assignment_submissions', assignment=assignment['id'], student=st.session_state.user['id'])
+                                            invalidate_cache('study_materials', module=assignment['module_id'], course=course['id'])
                                             st.rerun()
         else:
             st.info(f"No hay tareas asignadas para el curso {course['name']}")
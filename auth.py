@@ -5,6 +5,7 @@ import datetime
 from supabase import create_client
 import secrets
 import string
+from utils.query_profiles import projection
 
 # Configuración JWT - SOLO usar st.secrets.get() en el código, NO en el .toml
 JWT_SECRET = st.secrets.get("JWT_SECRET", "fallback-secret-key-change-in-production")
@@ -99,7 +100,7 @@ class AuthSystem:
     def authenticate_user(self, email, password):
         """Autenticar usuario"""
         try:
-            response = self.supabase.table('users').select('*').eq('email', email).eq('is_active', True).execute()
+            response = self.supabase.table('users').select(projection('users', 'auth')).eq('email', email).eq('is_active', True).execute()
             
             if not response.data:
                 return None
@@ -114,6 +115,8 @@ class AuthSystem:
             
             # Verificar contraseña
             if self.verify_password(password, user['password_hash']):
+                # El hash no debe quedar en la sesión
+                user.pop('password_hash', None)
                 return user
             
             return None
@@ -0,0 +1,201 @@
+"""
+Benchmark de Páginas
+Renderiza las páginas de cada rol con streamlit.testing (AppTest) sobre el
+backend local sembrado con seed_data.py y mide, por página, el tiempo, las
+peticiones al backend y los bytes transferidos.
+
+Cada página se mide en frío (cachés vacíos, como un proceso recién iniciado)
+y en caliente (una segunda ejecución en la misma sesión).
+
+Uso:
+    python seed_data.py --db-path .cache/bench.sqlite3
+    python benchmark_pages.py --db-path .cache/bench.sqlite3 --record   # guarda presupuestos
+    python benchmark_pages.py --db-path .cache/bench.sqlite3            # falla si alguno se excede
+
+Termina con código 1 si alguna página supera su presupuesto, o si no hay
+presupuesto guardado para ella (sin presupuestos no hay contra qué comparar).
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from utils import cache as tagged_cache
+from utils.local_backend import LocalClient, stats
+
+
+BUDGETS_PATH = 'benchmark_budgets.json'
+
+# Margen sobre lo medido al guardar presupuestos
+TIME_HEADROOM = 1.5
+COUNT_HEADROOM = 1.1
+
+# Segundos máximos por ejecución del script
+RUN_TIMEOUT = 300
+
+
+def pick_users(client: LocalClient) -> Dict[str, Dict[str, Any]]:
+    """Elige de los datos sembrados un profesor con cursos y un estudiante inscrito"""
+    assignment = client.table('teacher_assignments').select('teacher_id').order('id').limit(1).execute().data
+    enrollment = client.table('enrollments').select('student_id, courses(*)') \
+        .order('id').limit(1).execute().data
+    if not assignment or not enrollment:
+        sys.exit("❌ La base no tiene datos; ejecuta primero seed_data.py")
+
+    columns = 'id,email,first_name,last_name,role,is_active'
+    teacher = client.table('users').select(columns).eq('id', assignment[0]['teacher_id']).execute().data[0]
+    student = client.table('users').select(columns).eq('id', enrollment[0]['student_id']).execute().data[0]
+    # El panel de administración no depende de un usuario real
+    admin = {'id': 'benchmark-admin', 'email': 'admin@benchmark', 'first_name': 'Admin',
+             'last_name': 'Benchmark', 'role': 'admin', 'is_active': True}
+    return {'admin': admin, 'teacher': teacher, 'student': student,
+            'course': enrollment[0]['courses']}
+
+
+def scenarios(users: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Páginas a medir: nombre y estado de sesión con que se abren"""
+    return [
+        {'name': 'show_admin_dashboard', 'state': {'user': users['admin']}},
+        {'name': 'show_teacher_dashboard', 'state': {'user': users['teacher']}},
+        {'name': 'show_student_dashboard', 'state': {'user': users['student']}},
+        {'name': 'show_student_course_content',
+         'state': {'user': users['student'], 'viewing_course': users['course']}},
+    ]
+
+
+def reset_process_caches():
+    """Vacía los cachés del proceso para medir como en un arranque en frío"""
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    tagged_cache.clear()
+    # clear() solo encola el vaciado del caché en disco; esperar a que se aplique
+    tagged_cache.query_cache.flush()
+
+
+def measure(app: AppTest) -> Dict[str, Any]:
+    """Ejecuta el script una vez y retorna sus métricas"""
+    stats.reset()
+    started = time.perf_counter()
+    app.run(timeout=RUN_TIMEOUT)
+    elapsed = time.perf_counter() - started
+    result: Dict[str, Any] = {'seconds': round(elapsed, 3)}
+    result.update(stats.snapshot())
+    result['bytes'] = result.pop('bytes_sent') + result.pop('bytes_received')
+    if app.exception:
+        result['error'] = str(app.exception[0].value)
+    return result
+
+
+def run_page(scenario: Dict[str, Any], secrets: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """Mide una página en frío y en caliente"""
+    reset_process_caches()
+    app = AppTest.from_file('app.py', default_timeout=RUN_TIMEOUT)
+    for key, value in secrets.items():
+        app.secrets[key] = value
+    # Archivo de caché nuevo por página: la medición en frío no lee lo que dejó otra
+    app.secrets['QUERY_CACHE_PATH'] = os.path.join(
+        tempfile.mkdtemp(prefix='benchmark-cache-'), 'query_cache.sqlite3'
+    )
+    for key, value in scenario['state'].items():
+        app.session_state[key] = value
+
+    cold = measure(app)
+    warm = measure(app)
+    return {scenario['name']: cold, f"{scenario['name']} (caliente)": warm}
+
+
+def make_budgets(results: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Presupuestos a partir de una medición, con margen"""
+    return {
+        page: {
+            'seconds': round(m['seconds'] * TIME_HEADROOM, 3),
+            'round_trips': math.ceil(m['round_trips'] * COUNT_HEADROOM),
+            'bytes': math.ceil(m['bytes'] * COUNT_HEADROOM),
+        }
+        for page, m in results.items()
+    }
+
+
+def check(results: Dict[str, Dict[str, Any]],
+          budgets: Optional[Dict[str, Dict[str, Any]]]) -> List[str]:
+    """Lista de incumplimientos (errores de la página o métricas sobre presupuesto)"""
+    failures = []
+    for page, measured in results.items():
+        if 'error' in measured:
+            failures.append(f"{page}: la página lanzó una excepción: {measured['error']}")
+        if budgets is None:
+            continue
+        budget = budgets.get(page)
+        if not budget:
+            failures.append(f"{page}: sin presupuesto en el archivo (ejecuta con --record)")
+            continue
+        for metric in ('seconds', 'round_trips', 'bytes'):
+            if measured[metric] > budget[metric]:
+                failures.append(f"{page}: {metric} = {measured[metric]} (presupuesto {budget[metric]})")
+    return failures
+
+
+def print_table(results: Dict[str, Dict[str, Any]], budgets: Optional[Dict[str, Dict[str, Any]]]):
+    print(f"\n{'Página':<44}{'Tiempo (s)':>12}{'Peticiones':>12}{'KB':>12}")
+    print("-" * 80)
+    for page, m in results.items():
+        budget = (budgets or {}).get(page)
+        print(f"{page:<44}{m['seconds']:>12.3f}{m['round_trips']:>12}{m['bytes'] / 1024:>12.1f}")
+        if budget:
+            print(f"{'  presupuesto':<44}{budget['seconds']:>12.3f}"
+                  f"{budget['round_trips']:>12}{budget['bytes'] / 1024:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mide las páginas de cada rol contra presupuestos')
+    parser.add_argument('--db-path', required=True, help='Base sembrada con seed_data.py')
+    parser.add_argument('--budgets', default=BUDGETS_PATH)
+    parser.add_argument('--record', action='store_true', help='Guardar la medición como presupuesto')
+    args = parser.parse_args()
+
+    if not args.record and not os.path.exists(args.budgets):
+        sys.exit(f"❌ No existe {args.budgets}; ejecuta con --record para crearlo")
+
+    secrets = {
+        'STORAGE_BACKEND': 'sqlite',
+        'LOCAL_DB_PATH': args.db_path,
+        'N8N_WEBHOOK_URL': 'http://localhost:9/webhook',
+    }
+
+    users = pick_users(LocalClient(args.db_path))
+    results: Dict[str, Dict[str, Any]] = {}
+    for scenario in scenarios(users):
+        print(f"⏱️  {scenario['name']}...")
+        results.update(run_page(scenario, secrets))
+
+    if args.record:
+        budgets = make_budgets(results)
+        with open(args.budgets, 'w', encoding='utf-8') as f:
+            json.dump(budgets, f, indent=2, ensure_ascii=False)
+        print_table(results, budgets)
+        print(f"\n💾 Presupuestos guardados en {args.budgets}")
+        failures = check(results, None)
+    else:
+        with open(args.budgets, encoding='utf-8') as f:
+            budgets = json.load(f)
+        print_table(results, budgets)
+        failures = check(results, budgets)
+
+    if failures:
+        print("\n❌ Presupuestos excedidos:")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("\n✅ Todas las páginas dentro del presupuesto")
+
+
+if __name__ == "__main__":
+    main()
@@ -318,6 +318,40 @@ def render_grade_display(score: float, max_score: float = 100, passing_score: fl
     """, unsafe_allow_html=True)
 
 
+def get_page_cursor(state_key: str, filters: tuple = ()) -> Optional[str]:
+    """
+    Obtiene el cursor de la página actual de una lista paginada
+    
+    La paginación vuelve a la primera página cuando cambian los filtros.
+    """
+    stack_key = f"{state_key}_cursors"
+    filters_key = f"{state_key}_filters"
+    
+    if st.session_state.get(filters_key) != filters or stack_key not in st.session_state:
+        st.session_state[filters_key] = filters
+        st.session_state[stack_key] = [None]
+    
+    return st.session_state[stack_key][-1]
+
+
+def render_pagination(state_key: str, next_cursor: Optional[str]):
+    """Renderiza los botones Anterior/Siguiente de una lista paginada por cursor"""
+    
+    stack = st.session_state.setdefault(f"{state_key}_cursors", [None])
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if len(stack) > 1 and st.button("← Anterior", key=f"{state_key}_prev", use_container_width=True):
+            stack.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Página {len(stack)}")
+    with col3:
+        if next_cursor and st.button("Siguiente →", key=f"{state_key}_next", use_container_width=True):
+            stack.append(next_cursor)
+            st.rerun()
+
+
 def render_empty_state(message: str, icon: str = "📭", action_text: str = None):
     """Renderiza un estado vacío"""
     
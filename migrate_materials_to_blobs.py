@@ -0,0 +1,122 @@
+"""
+Migración de Materiales al Almacén de Blobs
+Mueve el contenido base64 de study_materials (file_content_b64) al almacén
+de archivos y deja en cada fila solo storage_key.
+
+Recorre la tabla por lotes ordenados por id; cada fila se migra por separado
+(archivo primero, fila después), así que la migración se puede interrumpir
+y volver a ejecutar sin perder datos. Los archivos se guardan por su SHA-256:
+las copias repetidas de un mismo archivo quedan almacenadas una sola vez.
+
+Uso:
+    python migrate_materials_to_blobs.py --dry-run
+    python migrate_materials_to_blobs.py --batch-size 20
+    python migrate_materials_to_blobs.py --blob-backend supabase --bucket materials
+
+Para Supabase se leen SUPABASE_URL y SUPABASE_KEY del entorno.
+"""
+
+import argparse
+import base64
+import os
+import time
+
+from utils.blob_store import ContentStore, create_blob_store, DEFAULT_PATH as BLOB_STORE_PATH
+from utils.local_backend import LocalClient, DEFAULT_PATH as LOCAL_DB_PATH
+from utils.pagination import fetch_page
+
+
+# Filas por lote (cada una puede traer hasta ~13MB de base64)
+DEFAULT_BATCH_SIZE = 10
+
+
+def connect(backend: str, db_path: str):
+    """Cliente del backend elegido"""
+    if backend == 'sqlite':
+        return LocalClient(db_path)
+    from supabase import create_client
+    return create_client(os.environ['SUPABASE_URL'], os.environ['SUPABASE_KEY'])
+
+
+def migrate(client, store, batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False):
+    """
+    Migra las filas con file_content_b64 y sin storage_key
+
+    Args:
+        client: Cliente de Supabase o LocalClient
+        store: ContentStore de destino
+
+    Returns:
+        (filas migradas, bytes movidos, filas con error)
+    """
+    migrated = moved = failed = 0
+    cursor = None
+    while True:
+        page = fetch_page(
+            client.table('study_materials')
+            .select('id,file_name,storage_key,file_content_b64')
+            .is_('storage_key', 'null'),
+            'id',
+            cursor=cursor,
+            page_size=batch_size,
+            desc=False
+        )
+        for row in page.rows:
+            if not row.get('file_content_b64'):
+                continue
+            data = base64.b64decode(row['file_content_b64'])
+            if dry_run:
+                migrated += 1
+                moved += len(data)
+                continue
+
+            key = None
+            try:
+                key = store.put(data)
+                client.table('study_materials').update({
+                    'storage_key': key,
+                    'file_content_b64': None,
+                    'file_size': len(data),
+                }).eq('id', row['id']).execute()
+            except Exception as e:
+                # La fila conserva su base64; se reintenta en la próxima ejecución
+                if key:
+                    store.release(key)
+                failed += 1
+                print(f"   ❌ {row['id']}: {e}")
+                continue
+            migrated += 1
+            moved += len(data)
+
+        print(f"   📦 {migrated} materiales, {moved / 1024 / 1024:.1f} MB")
+        if not page.has_more:
+            return migrated, moved, failed
+        cursor = page.next_cursor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mueve el contenido base64 de los materiales al almacén de archivos')
+    parser.add_argument('--backend', choices=['supabase', 'sqlite'], default='supabase')
+    parser.add_argument('--db-path', default=LOCAL_DB_PATH, help='Archivo del backend sqlite')
+    parser.add_argument('--blob-backend', choices=['local', 'supabase'], default='local')
+    parser.add_argument('--blob-path', default=BLOB_STORE_PATH, help='Directorio del almacén local')
+    parser.add_argument('--bucket', help='Bucket de Supabase Storage')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--dry-run', action='store_true', help='Solo contar lo que se migraría')
+    args = parser.parse_args()
+
+    client = connect(args.backend, args.db_path)
+    backend = create_blob_store(args.blob_backend, path=args.blob_path, client=client, bucket=args.bucket)
+    store = ContentStore(backend, lambda key: client.table('study_materials')
+                         .select('id', count='exact', head=True)
+                         .eq('storage_key', key).execute().count or 0)
+
+    print(f"🚀 Migrando materiales a {args.blob_backend}{' (simulación)' if args.dry_run else ''}...")
+    started = time.perf_counter()
+    migrated, moved, failed = migrate(client, store, args.batch_size, args.dry_run)
+    print(f"\n🎉 {migrated} materiales ({moved / 1024 / 1024:.1f} MB) en "
+          f"{time.perf_counter() - started:.1f}s" + (f", {failed} con error" if failed else ""))
+
+
+if __name__ == "__main__":
+    main()
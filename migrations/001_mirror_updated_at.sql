@@ -0,0 +1,36 @@
+-- Columna updated_at para las réplicas incrementales (utils/delta_sync.py)
+--
+-- enrollments, subscriptions y exam_results se replican en memoria pidiendo
+-- solo las filas con updated_at posterior a la última sincronización. Sin
+-- esta columna la aplicación no usa las réplicas y lee esas tablas con el
+-- caché de consultas (TTL de 60 s).
+--
+-- Ejecutar una vez en el editor SQL de Supabase. Es idempotente.
+
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- enrollments
+ALTER TABLE enrollments ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+CREATE INDEX IF NOT EXISTS enrollments_updated_at ON enrollments (updated_at, id);
+DROP TRIGGER IF EXISTS enrollments_touch ON enrollments;
+CREATE TRIGGER enrollments_touch BEFORE UPDATE ON enrollments
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+-- subscriptions
+ALTER TABLE subscriptions ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+CREATE INDEX IF NOT EXISTS subscriptions_updated_at ON subscriptions (updated_at, id);
+DROP TRIGGER IF EXISTS subscriptions_touch ON subscriptions;
+CREATE TRIGGER subscriptions_touch BEFORE UPDATE ON subscriptions
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+-- exam_results
+ALTER TABLE exam_results ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+CREATE INDEX IF NOT EXISTS exam_results_updated_at ON exam_results (updated_at, id);
+DROP TRIGGER IF EXISTS exam_results_touch ON exam_results;
+CREATE TRIGGER exam_results_touch BEFORE UPDATE ON exam_results
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
@@ -0,0 +1,392 @@
+"""
+Generador de Datos Sintéticos
+Llena la base de datos con volúmenes realistas para pruebas de carga:
+usuarios, cursos con módulos, materiales de tamaños realistas, exámenes con
+preguntas, inscripciones, suscripciones, resultados y certificados.
+
+Con la misma semilla y los mismos parámetros genera siempre los mismos datos.
+Los inserts se envían en lotes. El contenido de los materiales se guarda en
+el almacén de archivos (utils.blob_store) y cada fila lleva solo su
+storage_key; los archivos se generan lote por lote, no todos a la vez.
+
+Uso:
+    python seed_data.py --backend sqlite --db-path .cache/local_backend.sqlite3
+    python seed_data.py --backend supabase --students 5000 --courses 300 --seed 7
+    python seed_data.py --backend supabase --blob-backend supabase --bucket materials
+
+Para Supabase se leen SUPABASE_URL y SUPABASE_KEY del entorno.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from utils.blob_store import ContentStore, create_blob_store, DEFAULT_PATH as BLOB_STORE_PATH
+from utils.local_backend import LocalClient, DEFAULT_PATH as LOCAL_DB_PATH
+
+
+# Filas por insert
+DEFAULT_BATCH_SIZE = 500
+
+# Bytes máximos por insert
+MAX_BATCH_BYTES = 8 * 1024 * 1024
+
+# Límite de tamaño de archivo de la aplicación (server.maxUploadSize)
+MAX_MATERIAL_BYTES = 256 * 1024 * 1024
+
+SEED_PASSWORD = 'seed1234'
+EMAIL_DOMAIN = 'seed.test'
+
+FIRST_NAMES = ['Ana', 'Luis', 'María', 'Carlos', 'Lucía', 'Jorge', 'Sofía', 'Diego',
+               'Valentina', 'Andrés', 'Camila', 'Mateo', 'Daniela', 'José', 'Paula', 'Miguel']
+LAST_NAMES = ['García', 'Rodríguez', 'López', 'Martínez', 'Pérez', 'Gómez', 'Sánchez',
+              'Díaz', 'Torres', 'Ramírez', 'Flores', 'Rojas', 'Vargas', 'Castro', 'Mendoza']
+TOPICS = ['Python', 'Excel', 'Marketing Digital', 'Diseño Gráfico', 'Contabilidad',
+          'Inglés', 'SQL', 'Fotografía', 'Finanzas Personales', 'Redes', 'JavaScript',
+          'Liderazgo', 'Estadística', 'Ventas', 'Machine Learning', 'Oratoria']
+LEVELS = ['Básico', 'Intermedio', 'Avanzado', 'Profesional']
+MATERIAL_TYPES = [('pdf', 'document', 0.55), ('pptx', 'presentation', 0.2),
+                  ('xlsx', 'spreadsheet', 0.1), ('png', 'image', 0.1), ('txt', 'document', 0.05)]
+PAYMENT_METHODS = ['credit_card', 'debit_card', 'paypal', 'bank_transfer']
+
+
+def hash_password(password: str) -> str:
+    """Hash SHA-256 igual que en auth.py"""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def timestamp(moment: datetime) -> str:
+    """Fecha en el formato de timestamptz de Supabase"""
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.%f+00:00')
+
+
+def connect(backend: str, db_path: str):
+    """Cliente del backend elegido"""
+    if backend == 'sqlite':
+        return LocalClient(db_path)
+    from supabase import create_client
+    return create_client(os.environ['SUPABASE_URL'], os.environ['SUPABASE_KEY'])
+
+
+class Seeder:
+    """Genera e inserta los datos de forma determinista"""
+
+    def __init__(self, client, seed: int, batch_size: int = DEFAULT_BATCH_SIZE,
+                 blobs: Optional[ContentStore] = None):
+        """
+        Args:
+            client: Cliente de Supabase o LocalClient
+            seed: Semilla del generador
+            batch_size: Filas por insert
+            blobs: Almacén donde se guarda el contenido de los materiales
+        """
+        self.client = client
+        self.blobs = blobs
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        # Fechas relativas a un origen fijo para que la semilla determine todo
+        self.origin = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self.counts: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self.bytes_stored = 0
+
+    def insert(self, table: str, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Inserta filas en lotes por cantidad y por tamaño
+
+        Las filas se consumen a medida que se envían: con un generador, solo
+        el lote en curso queda en memoria.
+
+        Returns:
+            Filas insertadas (con sus ids), en el mismo orden
+        """
+        inserted: List[Dict[str, Any]] = []
+        batch: List[Dict[str, Any]] = []
+        batch_bytes = 0
+        for row in rows:
+            size = len(json.dumps(row, default=str))
+            if batch and (len(batch) >= self.batch_size or batch_bytes + size > MAX_BATCH_BYTES):
+                inserted.extend(self._send(table, batch))
+                batch, batch_bytes = [], 0
+            batch.append(row)
+            batch_bytes += size
+        if batch:
+            inserted.extend(self._send(table, batch))
+        self.counts[table] = self.counts.get(table, 0) + len(inserted)
+        print(f"   ✅ {table}: {len(inserted)} filas")
+        return inserted
+
+    def _send(self, table: str, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.bytes_sent += sum(len(json.dumps(row, default=str)) for row in batch)
+        response = self.client.table(table).insert(batch).execute()
+        return response.data or []
+
+    def moment(self, days_back: int = 365) -> datetime:
+        """Fecha aleatoria dentro de los últimos `days_back` días del origen"""
+        return self.origin - timedelta(seconds=self.rng.randint(0, days_back * 86400))
+
+    # ----- entidades -----
+
+    def users(self, role: str, count: int) -> List[Dict[str, Any]]:
+        password_hash = hash_password(SEED_PASSWORD)
+        rows = []
+        for n in range(count):
+            rows.append({
+                'email': f"{role}{n:05d}@{EMAIL_DOMAIN}",
+                'password_hash': password_hash,
+                'first_name': self.rng.choice(FIRST_NAMES),
+                'last_name': f"{self.rng.choice(LAST_NAMES)} {self.rng.choice(LAST_NAMES)}",
+                'role': role,
+                'is_active': self.rng.random() > 0.03,
+                'requires_password_reset': False,
+                'created_at': timestamp(self.moment()),
+            })
+        return self.insert('users', rows)
+
+    def courses(self, count: int) -> List[Dict[str, Any]]:
+        rows = []
+        for n in range(count):
+            topic = self.rng.choice(TOPICS)
+            level = self.rng.choice(LEVELS)
+            rows.append({
+                'name': f"{topic} {level} {n + 1}",
+                'description': f"Curso de {topic.lower()} nivel {level.lower()}. " * self.rng.randint(1, 6),
+                'price': round(self.rng.choice([0, 19.9, 29.9, 49.9, 79.9, 99.9, 149.9]), 2),
+                'duration_days': self.rng.choice([30, 60, 90, 180]),
+                'is_active': self.rng.random() > 0.1,
+                'created_at': timestamp(self.moment()),
+            })
+        return self.insert('courses', rows)
+
+    def teacher_assignments(self, courses, teachers):
+        rows = [{'teacher_id': self.rng.choice(teachers)['id'], 'course_id': c['id']} for c in courses]
+        return self.insert('teacher_assignments', rows)
+
+    def modules(self, courses, per_course: int) -> List[Dict[str, Any]]:
+        rows = []
+        for course in courses:
+            for number in range(1, per_course + 1):
+                rows.append({
+                    'course_id': course['id'],
+                    'module_number': number,
+                    'title': f"Módulo {number}: {self.rng.choice(TOPICS)}",
+                    'release_day': (number - 1) * 7,
+                })
+        return self.insert('course_modules', rows)
+
+    def material_size(self, median_kb: int) -> int:
+        """Tamaño de archivo con distribución log-normal (muchos chicos, pocos grandes)"""
+        size = int(self.rng.lognormvariate(0, 1) * median_kb * 1024)
+        return max(1024, min(size, MAX_MATERIAL_BYTES))
+
+    def material_rows(self, modules, per_module: int, median_kb: int,
+                      uploaders) -> Iterator[Dict[str, Any]]:
+        """Filas de materiales; cada archivo se guarda en el almacén al generar su fila"""
+        for module in modules:
+            for n in range(per_module):
+                extension, file_type, _ = self.rng.choices(
+                    MATERIAL_TYPES, weights=[w for *_, w in MATERIAL_TYPES]
+                )[0]
+                size = self.material_size(median_kb)
+                storage_key = self.blobs.put(self.rng.randbytes(size))
+                self.bytes_stored += size
+                yield {
+                    'module_id': module['id'],
+                    'title': f"Material {n + 1} - {module['title']}",
+                    'storage_key': storage_key,
+                    'file_name': f"material_{n + 1}.{extension}",
+                    'file_size': size,
+                    'file_type': file_type,
+                    'uploaded_by': self.rng.choice(uploaders)['id'],
+                }
+
+    def materials(self, modules, per_module: int, median_kb: int, uploaders) -> List[Dict[str, Any]]:
+        # insert() consume el generador: los archivos se crean lote por lote
+        return self.insert('study_materials',
+                           self.material_rows(modules, per_module, median_kb, uploaders))
+
+    def exams(self, modules, questions_per_exam: int, teachers):
+        exams = self.insert('exams', [{
+            'module_id': module['id'],
+            'title': f"Evaluación - {module['title']}",
+            'description': 'Evaluación del módulo',
+            'questions': [],
+            'passing_score': 70,
+            'time_limit_minutes': self.rng.choice([15, 30, 45, 60]),
+            'max_attempts': self.rng.choice([1, 2, 3]),
+            'created_by': self.rng.choice(teachers)['id'],
+        } for module in modules])
+
+        questions = []
+        for exam in exams:
+            for order in range(1, questions_per_exam + 1):
+                if self.rng.random() < 0.7:
+                    options = [f"Opción {c}" for c in 'ABCD']
+                    questions.append({
+                        'exam_id': exam['id'], 'question_type': 'multiple_choice',
+                        'question_text': f"Pregunta {order} de {exam['title']}",
+                        'correct_answer': self.rng.choice(options),
+                        'options': json.dumps(options), 'points': 1, 'question_order': order,
+                    })
+                else:
+                    questions.append({
+                        'exam_id': exam['id'], 'question_type': 'true_false',
+                        'question_text': f"Pregunta {order} de {exam['title']}",
+                        'correct_answer': self.rng.choice(['Verdadero', 'Falso']),
+                        'options': None, 'points': 1, 'question_order': order,
+                    })
+        questions = self.insert('exam_questions', questions)
+        return exams, questions
+
+    def enrollments(self, students, courses, per_student: float, content_by_course):
+        rows = []
+        for student in students:
+            count = min(len(courses), max(0, int(self.rng.gauss(per_student, per_student / 2) + 0.5)))
+            for course in self.rng.sample(courses, count):
+                items = content_by_course.get(course['id'], [])
+                done = self.rng.sample(items, self.rng.randint(0, len(items))) if items else []
+                progress = round(len(done) * 100 / len(items), 2) if items else 0
+                enrolled = self.moment()
+                rows.append({
+                    'student_id': student['id'],
+                    'course_id': course['id'],
+                    'enrollment_date': timestamp(enrolled),
+                    'progress_percentage': progress,
+                    'completion_status': 'completed' if progress >= 100 else 'in_progress',
+                    'completed_items': json.dumps(sorted(done)),
+                })
+        return self.insert('enrollments', rows)
+
+    def subscriptions(self, enrollments, price_by_course):
+        rows = []
+        for enrollment in enrollments:
+            start = datetime.fromisoformat(enrollment['enrollment_date'])
+            status = self.rng.choices(['approved', 'pending', 'rejected'], weights=[90, 6, 4])[0]
+            rows.append({
+                'student_id': enrollment['student_id'],
+                'course_id': enrollment['course_id'],
+                'amount_paid': price_by_course[enrollment['course_id']],
+                'payment_status': status,
+                'transaction_id': f"TXN{self.rng.getrandbits(48):012X}",
+                'payment_method': self.rng.choice(PAYMENT_METHODS),
+                'subscription_start': timestamp(start),
+                'subscription_end': timestamp(start + timedelta(days=365)),
+                'created_at': timestamp(start),
+            })
+        return self.insert('subscriptions', rows)
+
+    def exam_results(self, enrollments, exams_by_course, questions_by_exam):
+        rows = []
+        for enrollment in enrollments:
+            for exam in exams_by_course.get(enrollment['course_id'], []):
+                if self.rng.random() > enrollment['progress_percentage'] / 100 + 0.1:
+                    continue
+                questions = questions_by_exam.get(exam['id'], [])
+                correct = self.rng.randint(len(questions) // 2, len(questions)) if questions else 0
+                score = round(correct * 100 / len(questions), 2) if questions else 0
+                rows.append({
+                    'exam_id': exam['id'],
+                    'student_id': enrollment['student_id'],
+                    'score': score,
+                    'passed': score >= exam['passing_score'],
+                    'feedback': 'Corrección automática',
+                    'completed_at': timestamp(self.moment(180)),
+                    'answers': {q['id']: q['correct_answer'] for q in questions[:correct]},
+                    'corrected_by_ai': self.rng.random() < 0.5,
+                    'total_questions': len(questions),
+                    'correct_answers': correct,
+                })
+        return self.insert('exam_results', rows)
+
+    def certificates(self, enrollments):
+        rows = [{
+            'enrollment_id': e['id'],
+            'verification_code': f"CERT-{self.rng.getrandbits(40):010X}",
+        } for e in enrollments if e['completion_status'] == 'completed']
+        return self.insert('certificates', rows)
+
+
+def content_store(client, args) -> ContentStore:
+    """Almacén de archivos elegido, con referencias contadas en study_materials"""
+    backend = create_blob_store(args.blob_backend, path=args.blob_path, client=client, bucket=args.bucket)
+    return ContentStore(backend, lambda key: client.table('study_materials')
+                        .select('id', count='exact', head=True)
+                        .eq('storage_key', key).execute().count or 0)
+
+
+def seed(client, args) -> Seeder:
+    """Genera todas las tablas en orden de dependencias"""
+    seeder = Seeder(client, args.seed, args.batch_size, content_store(client, args))
+
+    print("👥 Usuarios...")
+    teachers = seeder.users('teacher', args.teachers)
+    students = seeder.users('student', args.students)
+
+    print("📚 Cursos y contenido...")
+    courses = seeder.courses(args.courses)
+    seeder.teacher_assignments(courses, teachers)
+    modules = seeder.modules(courses, args.modules_per_course)
+    materials = seeder.materials(modules, args.materials_per_module, args.material_kb, teachers)
+    exams, questions = seeder.exams(modules, args.questions_per_exam, teachers)
+
+    course_by_module = {m['id']: m['course_id'] for m in modules}
+    content_by_course: Dict[Any, List[str]] = {}
+    for material in materials:
+        content_by_course.setdefault(course_by_module[material['module_id']], []).append(f"mat_{material['id']}")
+    exams_by_course: Dict[Any, List[Dict[str, Any]]] = {}
+    for exam in exams:
+        course_id = course_by_module[exam['module_id']]
+        exams_by_course.setdefault(course_id, []).append(exam)
+        content_by_course.setdefault(course_id, []).append(f"exam_{exam['id']}")
+    questions_by_exam: Dict[Any, List[Dict[str, Any]]] = {}
+    for question in questions:
+        questions_by_exam.setdefault(question['exam_id'], []).append(question)
+
+    print("🎓 Inscripciones y pagos...")
+    enrollments = seeder.enrollments(students, courses, args.enrollments_per_student, content_by_course)
+    seeder.subscriptions(enrollments, {c['id']: c['price'] for c in courses})
+    seeder.exam_results(enrollments, exams_by_course, questions_by_exam)
+    seeder.certificates(enrollments)
+    return seeder
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera datos sintéticos para pruebas de carga')
+    parser.add_argument('--backend', choices=['sqlite', 'supabase'], default='sqlite')
+    parser.add_argument('--db-path', default=LOCAL_DB_PATH, help='Archivo del backend sqlite')
+    parser.add_argument('--blob-backend', choices=['local', 'supabase'], default='local')
+    parser.add_argument('--blob-path', default=BLOB_STORE_PATH, help='Directorio del almacén local')
+    parser.add_argument('--bucket', help='Bucket de Supabase Storage')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--teachers', type=int, default=40)
+    parser.add_argument('--courses', type=int, default=120)
+    parser.add_argument('--modules-per-course', type=int, default=6)
+    parser.add_argument('--materials-per-module', type=int, default=2)
+    parser.add_argument('--material-kb', type=int, default=150, help='Tamaño mediano de los materiales')
+    parser.add_argument('--questions-per-exam', type=int, default=10)
+    parser.add_argument('--enrollments-per-student', type=float, default=3)
+    args = parser.parse_args()
+
+    print(f"🚀 Generando datos (backend={args.backend}, semilla={args.seed})...")
+    started = time.perf_counter()
+    seeder = seed(connect(args.backend, args.db_path), args)
+    elapsed = time.perf_counter() - started
+
+    print("\n" + "=" * 50)
+    for table, count in seeder.counts.items():
+        print(f"   {table:<24} {count:>8}")
+    print(f"\n🎉 {sum(seeder.counts.values())} filas, "
+          f"{seeder.bytes_sent / 1024 / 1024:.1f} MB enviados y "
+          f"{seeder.bytes_stored / 1024 / 1024:.1f} MB de archivos en {elapsed:.1f}s")
+    print(f"   Contraseña de los usuarios generados: {SEED_PASSWORD}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Pruebas de la réplica incremental (utils/delta_sync.py) sobre el backend local"""
+
+import pytest
+
+from utils.delta_sync import TableMirror
+from utils.local_backend import LocalClient
+
+
+@pytest.fixture
+def client():
+    client = LocalClient(':memory:')
+    client.table('enrollments').insert([
+        {'student_id': 's1', 'course_id': 'c1'},
+        {'student_id': 's2', 'course_id': 'c1'},
+    ]).execute()
+    return client
+
+
+def mirror(client, **kwargs):
+    return TableMirror(client, 'enrollments', ('id', 'student_id', 'course_id', 'enrollment_date'),
+                       order_by='enrollment_date', index_by=('student_id',), **kwargs)
+
+
+def test_sync_loads_table(client):
+    enrollments = mirror(client)
+    assert enrollments.sync() is True
+    assert len(enrollments) == 2
+    assert [row['course_id'] for row in enrollments.select(student_id='s1')] == ['c1']
+
+
+def test_missing_watermark_disables_mirror(client):
+    enrollments = mirror(client, watermark_column='modified_at')
+    assert enrollments.sync() is False
+    assert enrollments.available is False
+    # No vuelve a recorrer la tabla en cada lectura
+    assert enrollments.sync() is False
+    assert len(enrollments) == 0
+
+
+def test_refresh_applies_local_write(client):
+    enrollments = mirror(client)
+    enrollments.sync()
+    client.table('enrollments').insert({'student_id': 's3', 'course_id': 'c2'}).execute()
+    enrollments.refresh()
+    assert len(enrollments.select(student_id='s3')) == 1
+
+
+def test_derive_rebuilds_only_after_changes(client):
+    enrollments = mirror(client)
+    enrollments.sync()
+    first = enrollments.derive('count', len)
+    assert enrollments.derive('count', lambda rows: -1) == first == 2
+    client.table('enrollments').insert({'student_id': 's3', 'course_id': 'c2'}).execute()
+    enrollments.refresh()
+    assert enrollments.derive('count', len) == 3
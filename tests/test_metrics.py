@@ -0,0 +1,35 @@
+"""Pruebas de las métricas del dashboard (utils/metrics.py) sobre el backend local"""
+
+from utils import local_backend
+from utils.local_backend import LocalClient
+from utils.metrics import count_rows, sum_column
+
+
+def make_client(approved: int, pending: int) -> LocalClient:
+    client = LocalClient(':memory:')
+    client.table('subscriptions').insert(
+        [{'amount_paid': 10.0, 'payment_status': 'approved'} for _ in range(approved)]
+        + [{'amount_paid': 99.0, 'payment_status': 'pending'} for _ in range(pending)]
+    ).execute()
+    return client
+
+
+def test_sum_column_spans_pages():
+    client = make_client(approved=25, pending=4)
+    local_backend.stats.reset()
+    total = sum_column(client, 'subscriptions', 'amount_paid', {'payment_status': 'approved'},
+                       page_size=10)
+    assert total == 250.0
+    # 25 filas en páginas de 10: tres peticiones
+    assert local_backend.stats.snapshot()['round_trips'] == 3
+
+
+def test_sum_column_empty():
+    client = make_client(approved=0, pending=2)
+    assert sum_column(client, 'subscriptions', 'amount_paid', {'payment_status': 'approved'}) == 0
+
+
+def test_count_rows_filters():
+    client = make_client(approved=3, pending=2)
+    assert count_rows(client, 'subscriptions') == 5
+    assert count_rows(client, 'subscriptions', {'payment_status': 'pending'}) == 2
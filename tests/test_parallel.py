@@ -0,0 +1,44 @@
+"""Pruebas de las lecturas en paralelo (utils/parallel.py)"""
+
+import threading
+
+from utils import parallel
+
+
+def test_fetch_all_runs_calls_concurrently():
+    # Solo termina si las dos lecturas están en curso al mismo tiempo
+    barrier = threading.Barrier(2, timeout=5)
+
+    def read(value):
+        barrier.wait()
+        return value
+
+    assert parallel.fetch_all({'a': lambda: read(1), 'b': lambda: read(2)}) == {'a': 1, 'b': 2}
+
+
+def test_nested_fetch_all_runs_inline():
+    inner = {}
+
+    def outer():
+        inner['thread'] = threading.current_thread()
+        return parallel.fetch_all({'x': lambda: threading.current_thread(), 'y': lambda: 0})['x']
+
+    results = parallel.fetch_all({'outer': outer, 'other': lambda: None})
+    assert results['outer'] is inner['thread']
+
+
+def test_bound_context_is_removed_after_task(monkeypatch):
+    ctx = object()
+    monkeypatch.setattr(parallel, 'get_script_run_ctx', lambda *args, **kwargs: ctx)
+    monkeypatch.setattr(parallel, 'add_script_run_ctx',
+                        lambda thread, value: setattr(thread, parallel.SCRIPT_RUN_CONTEXT_ATTR_NAME, value))
+    seen = {}
+
+    def task():
+        seen['during'] = getattr(threading.current_thread(), parallel.SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+
+    worker = threading.Thread(target=parallel._bind_context(task))
+    worker.start()
+    worker.join()
+    assert seen['during'] is ctx
+    assert getattr(worker, parallel.SCRIPT_RUN_CONTEXT_ATTR_NAME, None) is None
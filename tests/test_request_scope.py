@@ -0,0 +1,58 @@
+"""Claves del memo de lecturas con constructores reales de supabase-py y del backend local"""
+
+import pytest
+from supabase import create_client
+
+from utils.local_backend import LocalClient
+from utils.request_scope import QueryMemo, is_write, query_key, query_table
+
+
+# El cliente no se conecta al construir consultas: basta una URL y una clave con forma de JWT
+FAKE_URL = 'https://example.supabase.co'
+FAKE_KEY = 'eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJyb2xlIjoiYW5vbiJ9.firma'
+
+
+@pytest.fixture(params=['supabase', 'local'])
+def client(request):
+    if request.param == 'supabase':
+        return create_client(FAKE_URL, FAKE_KEY)
+    return LocalClient(':memory:')
+
+
+def test_read_has_stable_key(client):
+    first = query_key(client.table('users').select('id,email').eq('role', 'student'))
+    second = query_key(client.table('users').select('id,email').eq('role', 'student'))
+    assert first is not None
+    assert first == second
+    assert first[0] == 'GET'
+
+
+def test_key_depends_on_filters_and_headers(client):
+    base = query_key(client.table('users').select('id').eq('role', 'student'))
+    other_filter = query_key(client.table('users').select('id').eq('role', 'teacher'))
+    counted = query_key(client.table('users').select('id', count='exact', head=True).eq('role', 'student'))
+    assert len({base, other_filter, counted}) == 3
+    assert counted[0] == 'HEAD'
+
+
+def test_writes_have_no_key(client):
+    insert = client.table('users').insert({'email': 'a@b.c'})
+    update = client.table('users').update({'first_name': 'A'}).eq('id', '1')
+    assert query_key(insert) is None and is_write(insert)
+    assert query_key(update) is None and is_write(update)
+    assert not is_write(client.table('users').select('id'))
+
+
+def test_query_table(client):
+    assert query_table(client.table('course_modules').select('id')) == 'course_modules'
+
+
+def test_memo_hits_real_builder():
+    client = create_client(FAKE_URL, FAKE_KEY)
+    memo = QueryMemo()
+    key = query_key(client.table('courses').select('id').eq('is_active', True))
+    memo.set(key, {'data': [{'id': 1}]})
+    found, response = memo.get(query_key(client.table('courses').select('id').eq('is_active', True)))
+    assert found and response == {'data': [{'id': 1}]}
+    memo.invalidate(query_table(client.table('courses').insert({'name': 'x'})))
+    assert len(memo) == 0
@@ -0,0 +1,367 @@
+"""
+Almacén de Archivos (Blobs)
+Guarda el contenido binario de los materiales fuera de la tabla
+study_materials: la fila solo conserva storage_key, la clave del archivo en
+el almacén. Los bytes se guardan tal cual, sin base64.
+
+Backends:
+    LocalBlobStore     archivos en un directorio local (por defecto)
+    SupabaseBlobStore  un bucket de Supabase Storage
+
+Cualquier otro backend sirve si implementa put, put_file, get, delete,
+exists y list. Las descargas se sirven por enlace: los backends con signed_url lo
+generan ellos mismos; los archivos locales los entrega utils.file_server.
+
+Las claves se derivan del contenido (SHA-256): un mismo archivo subido a
+varios módulos, o entregado varias veces, se guarda una sola vez.
+
+Los archivos no se borran durante una petición: otra réplica podría estar
+registrando una fila nueva que apunta a la misma clave. Al liberar una clave
+se deja una marca (gc/<sha256>) y la recolección (ContentStore.collect, en
+un hilo de fondo) borra solo los archivos marcados hace más de GC_GRACE
+segundos que siguen sin filas que los referencien. Subir de nuevo el mismo
+contenido quita la marca.
+
+Las subidas se procesan por bloques (CHUNK_SIZE): el hash se calcula
+mientras el archivo se copia a un archivo temporal, y ese archivo se entrega
+al backend sin cargarlo entero en memoria.
+
+Requiere la columna de referencia en study_materials:
+
+    ALTER TABLE study_materials ADD COLUMN IF NOT EXISTS storage_key text;
+    ALTER TABLE study_materials ALTER COLUMN file_content_b64 DROP NOT NULL;
+    CREATE INDEX IF NOT EXISTS study_materials_storage_key ON study_materials (storage_key);
+
+Las filas anteriores (con file_content_b64) se siguen leyendo y se mueven al
+almacén con migrate_materials_to_blobs.py.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import BinaryIO, Callable, Iterator, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join('.cache', 'blobs')
+
+# Bytes por bloque al copiar archivos
+CHUNK_SIZE = 1024 * 1024
+
+# Subcarpeta del almacén local para archivos en proceso de subida
+STAGING_DIR = '.staging'
+
+# Carpeta de las marcas de archivos liberados
+GC_PREFIX = 'gc'
+
+# Segundos que un archivo liberado se conserva antes de poder borrarse
+# (debe superar lo que tarda la subida más lenta en registrar su fila)
+GC_GRACE = 3600
+
+# Segundos entre recolecciones
+GC_INTERVAL = 3600
+
+
+def digest_key(hexdigest: str) -> str:
+    """
+    Clave de un archivo a partir de su SHA-256
+
+    Returns:
+        Clave del tipo 'sha256/ab/ab12...' (el prefijo reparte los archivos en carpetas)
+    """
+    return f"sha256/{hexdigest[:2]}/{hexdigest}"
+
+
+def content_key(data: bytes) -> str:
+    """Clave de un archivo según su contenido"""
+    return digest_key(hashlib.sha256(data).hexdigest())
+
+
+class BlobNotFound(KeyError):
+    """La clave no existe en el almacén"""
+
+
+class LocalBlobStore:
+    """Archivos en un directorio local, uno por clave"""
+
+    def __init__(self, root: str = DEFAULT_PATH):
+        """
+        Args:
+            root: Directorio base (se crea si no existe)
+        """
+        self.root = os.path.abspath(root)
+        # Los temporales de subida quedan en el mismo disco: guardarlos es un rename
+        self.staging_dir = os.path.join(self.root, STAGING_DIR)
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        """Ruta del archivo de una clave, sin permitir salir del directorio base"""
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Clave de archivo inválida: {key}")
+        return path
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None):
+        """Guarda los bytes de una clave (reemplaza si ya existe)"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Escritura atómica: un lector nunca ve un archivo a medio escribir
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put_file(self, key: str, source_path: str, content_type: Optional[str] = None):
+        """Guarda una clave moviendo un archivo ya escrito (lo consume)"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.move(source_path, path)
+
+    def get(self, key: str) -> bytes:
+        """Bytes de una clave"""
+        try:
+            with open(self.path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            raise BlobNotFound(key)
+
+    def delete(self, key: str):
+        """Elimina una clave (no falla si no existe)"""
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def list(self, folder: str) -> Iterator[Tuple[str, float]]:
+        """Claves directamente dentro de una carpeta, con su fecha de modificación (epoch)"""
+        try:
+            entries = list(os.scandir(self.path(folder)))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if entry.is_file() and not entry.name.startswith('.tmp-'):
+                yield f"{folder}/{entry.name}", entry.stat().st_mtime
+
+
+class SupabaseBlobStore:
+    """Archivos en un bucket de Supabase Storage"""
+
+    def __init__(self, client, bucket: str):
+        """
+        Args:
+            client: Cliente de Supabase
+            bucket: Nombre del bucket (debe existir)
+        """
+        self.bucket = bucket
+        self._storage = client.storage
+
+    def _bucket(self):
+        return self._storage.from_(self.bucket)
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None):
+        """Guarda los bytes de una clave (reemplaza si ya existe)"""
+        self._bucket().upload(key, data, {
+            'content-type': content_type or 'application/octet-stream',
+            'upsert': 'true',
+        })
+
+    def put_file(self, key: str, source_path: str, content_type: Optional[str] = None):
+        """Sube una clave desde un archivo local (se envía por streaming) y lo elimina"""
+        try:
+            self._bucket().upload(key, source_path, {
+                'content-type': content_type or 'application/octet-stream',
+                'upsert': 'true',
+            })
+        finally:
+            os.remove(source_path)
+
+    def get(self, key: str) -> bytes:
+        """Bytes de una clave"""
+        try:
+            return self._bucket().download(key)
+        except Exception as e:
+            if 'not found' in str(e).lower():
+                raise BlobNotFound(key)
+            raise
+
+    def signed_url(self, key: str, name: str, expires_in: int = 3600) -> str:
+        """Enlace temporal de descarga servido por Supabase Storage (admite Range)"""
+        result = self._bucket().create_signed_url(key, expires_in, {'download': name})
+        return result.get('signedURL') or result.get('signedUrl')
+
+    def delete(self, key: str):
+        """Elimina una clave"""
+        self._bucket().remove([key])
+
+    def exists(self, key: str) -> bool:
+        folder, _, name = key.rpartition('/')
+        entries = self._bucket().list(folder, {'search': name}) or []
+        return any(entry.get('name') == name for entry in entries)
+
+    def list(self, folder: str) -> Iterator[Tuple[str, float]]:
+        """Claves directamente dentro de una carpeta, con su fecha de modificación (epoch)"""
+        for entry in self._bucket().list(folder, {'limit': 1000}) or []:
+            # Las subcarpetas no tienen id
+            if not entry.get('id'):
+                continue
+            modified = entry.get('updated_at') or entry.get('created_at')
+            yield (f"{folder}/{entry['name']}",
+                   datetime.fromisoformat(modified.replace('Z', '+00:00')).timestamp())
+
+
+def create_blob_store(backend: str = 'local', path: str = DEFAULT_PATH,
+                      client=None, bucket: Optional[str] = None):
+    """
+    Crea el almacén configurado
+
+    Args:
+        backend: 'local' o 'supabase'
+        path: Directorio del almacén local
+        client: Cliente de Supabase (backend 'supabase')
+        bucket: Bucket de Supabase Storage (backend 'supabase')
+    """
+    if backend == 'supabase':
+        if client is None or not bucket:
+            raise ValueError("El almacén de Supabase necesita cliente y bucket")
+        return SupabaseBlobStore(client, bucket)
+    return LocalBlobStore(path)
+
+
+def _marker(key: str) -> str:
+    """Marca de recolección de una clave"""
+    return f"{GC_PREFIX}/{key.rsplit('/', 1)[-1]}"
+
+
+class ContentStore:
+    """Archivos deduplicados por contenido, con recolección diferida"""
+
+    def __init__(self, store, count_refs: Callable[[str], int]):
+        """
+        Args:
+            store: Backend (LocalBlobStore, SupabaseBlobStore...)
+            count_refs: Función que retorna cuántas filas apuntan a una clave
+        """
+        self.store = store
+        self._count_refs = count_refs
+        # Reentrante: ensure vuelve a escribir el archivo con put_file
+        self._lock = threading.RLock()
+        self._collector: Optional[threading.Thread] = None
+
+    def put_file(self, source: BinaryIO, content_type: Optional[str] = None) -> Tuple[str, int]:
+        """
+        Guarda un archivo leyéndolo por bloques, si su contenido no estaba ya
+
+        Args:
+            source: Archivo abierto en modo binario (p. ej. un UploadedFile);
+                se lee desde el principio
+
+        Returns:
+            (clave del contenido, tamaño en bytes)
+        """
+        staging_dir = getattr(self.store, 'staging_dir', None)
+        fd, tmp_path = tempfile.mkstemp(dir=staging_dir, prefix='upload-')
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            source.seek(0)
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+
+            key = digest_key(digest.hexdigest())
+            with self._lock:
+                if not self.store.exists(key):
+                    self.store.put_file(key, tmp_path, content_type=content_type)
+                else:
+                    # El contenido vuelve a usarse: ya no es candidato a borrarse
+                    self.store.delete(_marker(key))
+            return key, size
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def put(self, data: bytes, content_type: Optional[str] = None) -> str:
+        """Guarda bytes ya cargados en memoria (ver put_file)"""
+        key, _ = self.put_file(io.BytesIO(data), content_type=content_type)
+        return key
+
+    def ensure(self, key: str, source: BinaryIO, content_type: Optional[str] = None):
+        """
+        Vuelve a escribir el archivo si una recolección lo borró mientras se
+        registraba la referencia
+
+        Llamar después de registrar la fila que apunta a key.
+        """
+        with self._lock:
+            if not self.store.exists(key):
+                self.put_file(source, content_type=content_type)
+
+    def get(self, key: str) -> bytes:
+        return self.store.get(key)
+
+    def release(self, key: str):
+        """
+        Marca el archivo como candidato a borrarse (no lo borra)
+
+        Llamar después de eliminar (o dejar de usar) la fila que apuntaba a él;
+        collect lo borra pasado GC_GRACE si sigue sin referencias.
+        """
+        self.store.put(_marker(key), b'')
+
+    def collect(self, grace: float = GC_GRACE) -> int:
+        """
+        Borra los archivos liberados hace más de grace segundos que siguen
+        sin filas que los referencien
+
+        Returns:
+            Cantidad de archivos eliminados
+        """
+        cutoff = time.time() - grace
+        deleted = 0
+        for marker, marked_at in list(self.store.list(GC_PREFIX)):
+            if marked_at > cutoff:
+                continue
+            key = digest_key(marker.rsplit('/', 1)[-1])
+            with self._lock:
+                # Una subida pudo quitar la marca después de listarla
+                if not self.store.exists(marker):
+                    continue
+                if self._count_refs(key) == 0:
+                    self.store.delete(key)
+                    deleted += 1
+                self.store.delete(marker)
+        return deleted
+
+    def start_collector(self, interval: float = GC_INTERVAL, grace: float = GC_GRACE):
+        """Ejecuta collect cada interval segundos en un hilo de fondo"""
+        if self._collector is not None:
+            return
+        self._collector = threading.Thread(
+            target=self._collect_forever, args=(interval, grace), name='blob-gc', daemon=True
+        )
+        self._collector.start()
+
+    def _collect_forever(self, interval: float, grace: float):
+        while True:
+            time.sleep(interval)
+            try:
+                self.collect(grace)
+            except Exception:
+                logger.exception("Error en la recolección de archivos")
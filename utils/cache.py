@@ -0,0 +1,593 @@
+"""
+Caché de Consultas con Etiquetas
+Caché en memoria compartido por todas las sesiones del proceso. Cada lectura
+declara las tablas y claves de las que depende, y cada escritura invalida
+solo las entradas afectadas en lugar de vaciar todo el caché.
+
+Convención de etiquetas:
+    'courses'               lectura de la tabla completa (o sin filtro propio)
+    'enrollments:student=7' lectura filtrada por una clave
+    'courses:id=*'          depende de cualquier fila por id (joins embebidos)
+
+invalidate('enrollments', student=7, course=3) elimina las entradas con las
+etiquetas 'enrollments', 'enrollments:student=7', 'enrollments:student=*',
+'enrollments:course=3' y 'enrollments:course=*'.
+
+Cuando varias sesiones fallan a la vez sobre la misma clave, solo la primera
+consulta la base de datos; las demás esperan su resultado (singleflight). El
+TTL de cada entrada lleva una variación aleatoria para que las claves muy
+leídas no venzan todas en el mismo instante.
+
+Las lecturas que optan por refresco anticipado (cached(stale='tabla')) siguen
+sirviendo su valor después del TTL durante la ventana de STALE_POLICIES de su
+tabla, mientras un hilo en segundo plano lo vuelve a consultar. Una escritura
+invalida la entrada por completo, así que nunca se sirve un valor anterior a
+una escritura hecha desde la aplicación.
+
+Con attach_second_tier() el caché en memoria se apoya en un segundo nivel
+persistente (ver disk_cache.py): cada entrada se escribe también allí, una
+falla en memoria consulta ese nivel antes que la base de datos y las
+invalidaciones se aplican a ambos. Las escrituras en ese nivel las hace un
+hilo en segundo plano, en el mismo orden en que se aplicaron en memoria, sin
+retener el lock del caché mientras se espera al disco. Si el nivel es compartido entre réplicas,
+un hilo lee sus mensajes de invalidación y descarta de la memoria local lo
+que otra réplica modificó.
+
+La memoria tiene un presupuesto en bytes (max_bytes). El tamaño de cada
+entrada es el de su valor serializado y, al superar el presupuesto, se
+descartan las entradas usadas hace más tiempo (LRU). Un valor mayor que
+MAX_ENTRY_FRACTION del presupuesto no se guarda en memoria, para que una sola
+lectura enorme no desaloje todo lo demás. stats() reporta el uso.
+"""
+
+import functools
+import inspect
+import logging
+import pickle
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+def tag(table: str, **keys) -> str:
+    """
+    Construye una etiqueta de dependencia
+
+    Args:
+        table: Nombre de la tabla
+        **keys: A lo sumo una clave de filtro (usar '*' para cualquier valor)
+
+    Returns:
+        Etiqueta en formato 'tabla' o 'tabla:clave=valor'
+    """
+    if not keys:
+        return table
+    if len(keys) > 1:
+        raise ValueError("Una etiqueta admite una sola clave; declara varias etiquetas")
+    key, value = next(iter(keys.items()))
+    return f"{table}:{key}={value}"
+
+
+def invalidation_tags(table: str, **keys) -> Set[str]:
+    """Etiquetas que deben eliminarse tras escribir en `table` con las claves dadas"""
+    tags = {table}
+    for key, value in keys.items():
+        if value is None:
+            continue
+        tags.add(tag(table, **{key: value}))
+        tags.add(tag(table, **{key: '*'}))
+    return tags
+
+
+# Etiqueta de un mensaje que vacía el caché completo (ver disk_cache.py)
+CLEAR_ALL = '*'
+
+# Presupuesto de memoria por defecto del caché en memoria
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Fracción máxima del presupuesto que puede ocupar una sola entrada
+MAX_ENTRY_FRACTION = 0.25
+
+# Variación relativa del TTL (0.1 = ±10%)
+TTL_JITTER = 0.1
+
+# Segundos entre lecturas de mensajes de invalidación de otras réplicas
+INVALIDATION_POLL = 0.5
+
+# Segundos entre limpiezas de entradas vencidas del segundo nivel
+PURGE_INTERVAL = 300
+
+# Segundos máximos que una sesión espera la lectura de otra antes de consultar por su cuenta
+FLIGHT_TIMEOUT = 30
+
+
+# Segundos que una entrada vencida puede servirse mientras se refresca, por tabla
+STALE_POLICIES: Dict[str, float] = {
+    'courses': 300,
+    'course_modules': 300,
+    'study_materials': 300,
+    'exams': 300,
+    'users': 120,
+    'enrollments': 30,
+    'subscriptions': 30,
+    'certificates': 30,
+}
+
+_refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cache-refresh')
+
+
+def jittered(ttl: float) -> float:
+    """TTL con variación aleatoria de ±TTL_JITTER"""
+    return ttl * random.uniform(1 - TTL_JITTER, 1 + TTL_JITTER)
+
+
+def _freeze(value: Any) -> Any:
+    """Convierte argumentos mutables en equivalentes hashables para la clave"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_freeze(v) for v in value))
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class _Entry:
+    """Entrada del caché: valor serializado, etiquetas y vencimiento"""
+
+    __slots__ = ('payload', 'tags', 'fresh_until', 'expires_at')
+
+    def __init__(self, payload: bytes, tags: Tuple[str, ...], fresh_until: float,
+                 expires_at: float):
+        self.payload = payload
+        self.tags = tags
+        self.fresh_until = fresh_until
+        self.expires_at = expires_at
+
+
+class _Flight:
+    """Lectura en curso de una clave; las sesiones que esperan usan done"""
+
+    __slots__ = ('done', 'error', 'payload')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+        # Valor serializado del líder (sirve aunque no quepa en memoria)
+        self.payload: Optional[bytes] = None
+
+
+class TaggedCache:
+    """Almacén de entradas indexado por etiqueta"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            max_bytes: Presupuesto de memoria para los valores guardados
+        """
+        # Ordenadas de la menos a la más recientemente usada
+        self._entries: 'OrderedDict[Any, _Entry]' = OrderedDict()
+        self.max_bytes = max_bytes
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.oversized = 0
+        self._by_tag: Dict[str, Set[Any]] = {}
+        self._flights: Dict[Any, _Flight] = {}
+        # Cambia con cada invalidación; una lectura que empezó antes no se guarda
+        self._generation = 0
+        self._lock = threading.RLock()
+        self.second_tier = None
+        self._seen_invalidation = 0
+        self._watcher: Optional[threading.Thread] = None
+        # Escrituras pendientes en el segundo nivel, en orden de aplicación
+        self._tier_writes: 'queue.Queue[Tuple[str, tuple]]' = queue.Queue()
+        self._tier_writer: Optional[threading.Thread] = None
+        # Invalidaciones encoladas que el segundo nivel aún no aplicó
+        self._pending_invalidations = 0
+
+    def attach_second_tier(self, tier, warm: bool = True) -> int:
+        """
+        Conecta un nivel persistente debajo del caché en memoria
+
+        Args:
+            tier: Almacén con la interfaz de DiskCache
+            warm: Cargar en memoria sus entradas vigentes
+
+        Returns:
+            Cantidad de entradas cargadas
+        """
+        loaded = 0
+        with self._lock:
+            self.second_tier = tier
+            if hasattr(tier, 'invalidations_since'):
+                self._seen_invalidation = self._tier_call('last_invalidation') or 0
+            if warm:
+                for key, payload, tags, fresh_until, expires_at in self._tier_call('entries') or ():
+                    self._store(key, payload, tags, fresh_until, expires_at)
+                    loaded += 1
+
+        if self._tier_writer is None:
+            self._tier_writer = threading.Thread(
+                target=self._write_tier, name='cache-tier-writer', daemon=True
+            )
+            self._tier_writer.start()
+        if hasattr(tier, 'invalidations_since') and self._watcher is None:
+            self._watcher = threading.Thread(
+                target=self._watch_invalidations, name='cache-invalidations', daemon=True
+            )
+            self._watcher.start()
+        return loaded
+
+    def apply_remote_invalidations(self) -> int:
+        """
+        Aplica en memoria las invalidaciones publicadas por otras réplicas
+
+        Returns:
+            Cantidad de entradas eliminadas de la memoria
+        """
+        result = self._tier_call('invalidations_since', self._seen_invalidation)
+        if result is None:
+            return 0
+        last, messages, gap = result
+        removed = 0
+        with self._lock:
+            self._seen_invalidation = last
+            if not messages and not gap:
+                return 0
+            self._generation += 1
+            tags = {t for message in messages for t in message}
+            if gap or CLEAR_ALL in tags:
+                removed = len(self._entries)
+                self._clear_memory()
+                return removed
+            for t in tags:
+                for key in list(self._by_tag.get(t, ())):
+                    self._remove(key)
+                    removed += 1
+        return removed
+
+    def flush(self):
+        """Espera a que el segundo nivel aplique las escrituras pendientes"""
+        if self._tier_writer is not None:
+            self._tier_writes.join()
+
+    def _write_tier(self):
+        while True:
+            method, args = self._tier_writes.get()
+            try:
+                self._tier_call(method, *args)
+            finally:
+                if method != 'set':
+                    with self._lock:
+                        self._pending_invalidations -= 1
+                self._tier_writes.task_done()
+
+    def _enqueue_tier(self, method: str, *args):
+        """Encola una escritura del segundo nivel (llamar con el lock tomado)"""
+        if self.second_tier is None:
+            return
+        if method != 'set':
+            self._pending_invalidations += 1
+        self._tier_writes.put((method, args))
+
+    def _watch_invalidations(self):
+        polls_per_purge = max(1, int(PURGE_INTERVAL / INVALIDATION_POLL))
+        polls = 0
+        while True:
+            time.sleep(INVALIDATION_POLL)
+            self.apply_remote_invalidations()
+            polls += 1
+            if polls % polls_per_purge == 0 and hasattr(self.second_tier, 'purge'):
+                # Sin esto el archivo solo se limpia al iniciar el proceso
+                self._tier_call('purge')
+
+    def get(self, key) -> Tuple[bool, Any]:
+        """
+        Busca una entrada vigente
+
+        Returns:
+            Tuple[bool, Any]: (encontrada, copia del valor)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            payload = entry.payload
+        # Igual que st.cache_data, cada lector recibe su propia copia
+        return True, pickle.loads(payload)
+
+    def set(self, key, value: Any, ttl: float, tags: Iterable[str], stale: float = 0):
+        """
+        Guarda un valor con su tiempo de vida y sus etiquetas
+
+        Args:
+            key: Clave de la entrada
+            value: Valor a guardar
+            ttl: Segundos durante los que el valor se considera fresco
+            tags: Etiquetas de dependencia
+            stale: Segundos adicionales en que puede servirse mientras se refresca
+        """
+        self._set(key, value, ttl, tags, stale)
+
+    def _set(self, key, value: Any, ttl: float, tags: Iterable[str], stale: float = 0,
+             generation: Optional[int] = None) -> Optional[bytes]:
+        """
+        Guarda un valor; con generation, solo si no hubo invalidaciones desde entonces
+
+        Returns:
+            El valor serializado, o None si una invalidación lo descartó
+        """
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        tags = tuple(tags)
+        now = time.time()
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return None
+            self._store(key, payload, tags, now + ttl, now + ttl + stale)
+            self._enqueue_tier('set', key, payload, tags, now + ttl, now + ttl + stale)
+        return payload
+
+    def get_or_load(self, key, loader: Callable[[], Any], ttl: float,
+                    tags: Callable[[], Iterable[str]], stale: float = 0) -> Any:
+        """
+        Retorna el valor vigente de key o lo carga una sola vez
+
+        Si otra sesión ya está cargando la misma clave, espera su resultado
+        en lugar de repetir la consulta. Con stale > 0, un valor con el TTL
+        vencido se sigue retornando y se refresca en segundo plano.
+
+        Args:
+            key: Clave de la entrada
+            loader: Función que obtiene el valor desde la base de datos
+            ttl: Segundos de vida (se les aplica jitter)
+            tags: Función que retorna las etiquetas de dependencia
+            stale: Ventana de refresco anticipado en segundos
+
+        Returns:
+            Copia del valor
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is not None and entry.expires_at <= now:
+                self._remove(key)
+                entry = None
+            flight = self._flights.get(key)
+            leader = entry is None and flight is None
+            if entry is not None and entry.fresh_until <= now and flight is None:
+                # Valor viejo pero servible: refrescar sin bloquear al lector
+                flight = self._flights[key] = _Flight()
+                _refresher.submit(self._load, key, flight, loader, ttl, tags, stale,
+                                  self._generation)
+            elif leader:
+                flight = self._flights[key] = _Flight()
+            generation = self._generation
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                payload = entry.payload
+            else:
+                self.misses += 1
+                payload = None
+
+        if payload is not None:
+            return pickle.loads(payload)
+        if leader:
+            return self._load(key, flight, loader, ttl, tags, stale, generation)
+
+        if flight.done.wait(FLIGHT_TIMEOUT):
+            if flight.error is not None:
+                raise flight.error
+            found, value = self.get(key)
+            if found:
+                return value
+            if flight.payload is not None:
+                # Demasiado grande para guardarlo en memoria
+                return pickle.loads(flight.payload)
+        # El líder tardó demasiado o la entrada ya fue invalidada
+        return loader()
+
+    def _load(self, key, flight: _Flight, loader: Callable[[], Any], ttl: float,
+              tags: Callable[[], Iterable[str]], stale: float, generation: int) -> Any:
+        """Ejecuta la lectura de una clave como líder y despierta a quienes esperan"""
+        try:
+            with self._lock:
+                # Con invalidaciones sin aplicar, el segundo nivel puede tener valores viejos
+                use_tier = self.second_tier is not None and not self._pending_invalidations
+            if use_tier:
+                hit = self._tier_call('get', key)
+                # Solo sirve si sigue fresca; si no, este líder debe refrescarla
+                if hit is not None and hit[2] > time.time():
+                    payload, entry_tags, fresh_until, expires_at = hit
+                    with self._lock:
+                        if generation == self._generation:
+                            self._store(key, payload, entry_tags, fresh_until, expires_at)
+                    return pickle.loads(payload)
+
+            value = loader()
+            flight.payload = self._set(key, value, jittered(ttl), tags(), stale, generation=generation)
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Elimina las entradas marcadas con cualquiera de las etiquetas"""
+        tags = list(tags)
+        removed = 0
+        with self._lock:
+            self._generation += 1
+            for t in tags:
+                for key in list(self._by_tag.get(t, ())):
+                    self._remove(key)
+                    removed += 1
+            self._enqueue_tier('invalidate_tags', tags)
+        return removed
+
+    def invalidate(self, table: str, **keys) -> int:
+        """Invalida las entradas afectadas por una escritura en `table`"""
+        return self.invalidate_tags(invalidation_tags(table, **keys))
+
+    def clear(self):
+        """Vacía el caché por completo"""
+        with self._lock:
+            self._generation += 1
+            self._clear_memory()
+            self._enqueue_tier('clear')
+
+    def set_budget(self, max_bytes: int):
+        """Cambia el presupuesto de memoria y descarta lo que sobre"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Uso actual del caché en memoria
+
+        Returns:
+            Dict con entries, bytes, max_bytes, hits, misses, evictions,
+            oversized (valores no guardados por su tamaño) y largest (las 5
+            funciones que más memoria ocupan, en bytes)
+        """
+        with self._lock:
+            by_function: Dict[str, int] = {}
+            for key, entry in self._entries.items():
+                name = key[0] if isinstance(key, tuple) and key else str(key)
+                by_function[name] = by_function.get(name, 0) + len(entry.payload)
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'oversized': self.oversized,
+                'largest': sorted(by_function.items(), key=lambda item: item[1], reverse=True)[:5],
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store(self, key, payload: bytes, tags: Tuple[str, ...], fresh_until: float,
+               expires_at: float):
+        """Guarda una entrada en memoria; los vencimientos llegan en hora de reloj"""
+        if key in self._entries:
+            self._remove(key)
+        if len(payload) > self.max_bytes * MAX_ENTRY_FRACTION:
+            # Guardarlo desalojaría buena parte del caché; se vuelve a consultar
+            self.oversized += 1
+            return
+        offset = time.monotonic() - time.time()
+        entry = _Entry(payload, tuple(tags), fresh_until + offset, expires_at + offset)
+        self._entries[key] = entry
+        self._bytes += len(payload)
+        for t in entry.tags:
+            self._by_tag.setdefault(t, set()).add(key)
+        self._evict()
+
+    def _evict(self):
+        """Descarta las entradas menos usadas hasta respetar el presupuesto"""
+        while self._bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def _clear_memory(self):
+        self._entries.clear()
+        self._by_tag.clear()
+        self._bytes = 0
+
+    def _tier_call(self, method: str, *args):
+        """Llama al segundo nivel; si falla, el caché sigue funcionando solo en memoria"""
+        if self.second_tier is None:
+            return None
+        try:
+            return getattr(self.second_tier, method)(*args)
+        except Exception as e:
+            logger.warning("Caché persistente no disponible (%s): %s", method, e)
+            return None
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry.payload)
+        for t in entry.tags:
+            keys = self._by_tag.get(t)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[t]
+
+
+# Caché compartido por todas las sesiones del proceso
+query_cache = TaggedCache()
+
+
+def cached(ttl: float = 60, tags: Optional[Callable[..., List[str]]] = None,
+           stale: Optional[str] = None):
+    """
+    Decorador que guarda el resultado de una lectura en query_cache
+
+    Args:
+        ttl: Segundos de vida de cada entrada
+        tags: Función que recibe los mismos argumentos que la lectura y
+            retorna sus etiquetas de dependencia
+        stale: Tabla cuya política de STALE_POLICIES activa el refresco
+            anticipado (None para bloquear al vencer el TTL)
+
+    Returns:
+        Decorador
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        name = f"{func.__module__}.{func.__qualname__}"
+        stale_window = STALE_POLICIES[stale] if stale else 0
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (name, _freeze(tuple(bound.arguments.items())))
+
+            return query_cache.get_or_load(
+                key,
+                lambda: func(*args, **kwargs),
+                ttl,
+                lambda: tags(*args, **kwargs) if tags else [name],
+                stale_window,
+            )
+
+        return wrapper
+    return decorator
+
+
+def invalidate(table: str, **keys) -> int:
+    """Invalida en query_cache las entradas afectadas por una escritura"""
+    return query_cache.invalidate(table, **keys)
+
+
+def clear():
+    """Vacía query_cache"""
+    query_cache.clear()
@@ -0,0 +1,143 @@
+"""
+Resultados en Columnas
+Representación compacta de lecturas con joins embebidos. En una lista de
+inscripciones cada fila trae su propia copia del curso y del usuario; aquí
+cada entidad embebida se guarda una sola vez (por id) y las filas solo
+guardan su posición. Las columnas con pocos valores distintos se codifican
+como categorías.
+
+ColumnarRows se comporta como una lista de solo lectura: las filas se
+reconstruyen como dicts al recorrerlas o indexarlas, y cada acceso retorna
+un dict nuevo.
+"""
+
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# Proporción máxima de valores distintos para codificar una columna como categoría
+CATEGORICAL_RATIO = 0.5
+
+
+def _is_embed(values: List[Any]) -> bool:
+    """Una columna es un join embebido si todos sus valores son filas con id"""
+    present = [v for v in values if v is not None]
+    return bool(present) and all(isinstance(v, dict) and 'id' in v for v in present)
+
+
+class _Column:
+    """Valores de una columna, planos o como códigos de categoría"""
+
+    __slots__ = ('categories', 'codes', 'values')
+
+    def __init__(self, values: List[Any]):
+        self.categories: Optional[List[Any]] = None
+        self.codes: Optional[array] = None
+        self.values: Optional[List[Any]] = None
+
+        # La clave incluye el tipo para no confundir True con 1 ni 1 con 1.0
+        try:
+            distinct = dict.fromkeys((type(v), v) for v in values)
+        except TypeError:
+            # Valores no hashables (listas, dicts JSON): columna plana
+            self.values = values
+            return
+
+        if len(distinct) > max(1, len(values) * CATEGORICAL_RATIO):
+            self.values = values
+            return
+        position = {key: i for i, key in enumerate(distinct)}
+        self.categories = [value for _, value in distinct]
+        self.codes = array('H' if len(self.categories) < 2 ** 16 else 'I',
+                           (position[(type(v), v)] for v in values))
+
+    def __getitem__(self, i: int) -> Any:
+        if self.values is not None:
+            return self.values[i]
+        return self.categories[self.codes[i]]
+
+    def tolist(self) -> List[Any]:
+        if self.values is not None:
+            return list(self.values)
+        return [self.categories[code] for code in self.codes]
+
+
+class _Embed:
+    """Join embebido: entidades únicas y la posición de la de cada fila"""
+
+    __slots__ = ('entities', 'refs')
+
+    def __init__(self, values: List[Optional[Dict[str, Any]]]):
+        unique: Dict[Any, int] = {}
+        entities: List[Dict[str, Any]] = []
+        refs = array('l')
+        for value in values:
+            if value is None:
+                refs.append(-1)
+                continue
+            position = unique.get(value['id'])
+            if position is None:
+                position = unique[value['id']] = len(entities)
+                entities.append(value)
+            refs.append(position)
+        # Las entidades también se guardan en columnas (joins anidados incluidos)
+        self.entities = ColumnarRows(entities)
+        self.refs = refs
+
+    def __getitem__(self, i: int) -> Optional[Dict[str, Any]]:
+        ref = self.refs[i]
+        return None if ref < 0 else self.entities[ref]
+
+    def tolist(self) -> List[Optional[Dict[str, Any]]]:
+        return [self[i] for i in range(len(self.refs))]
+
+
+class ColumnarRows(Sequence):
+    """Filas de una lectura guardadas por columnas, con joins deduplicados"""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        """
+        Args:
+            rows: Filas tal como las retorna Supabase (todas con las mismas claves)
+        """
+        self._length = len(rows)
+        self._names: List[str] = list(dict.fromkeys(name for row in rows for name in row))
+        self._columns: Dict[str, Any] = {}
+        for name in self._names:
+            values = [row.get(name) for row in rows]
+            self._columns[name] = _Embed(values) if _is_embed(values) else _Column(values)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('ColumnarRows index out of range')
+        return self._row(index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self._length):
+            yield self._row(i)
+
+    def __repr__(self) -> str:
+        return f"ColumnarRows({self._length} filas, columnas={self._names})"
+
+    def column(self, name: str) -> List[Any]:
+        """Valores de una columna sin reconstruir las filas"""
+        return self._columns[name].tolist()
+
+    def entities(self, name: str) -> List[Dict[str, Any]]:
+        """Entidades únicas de un join embebido (p. ej. los cursos distintos)"""
+        return list(self._columns[name].entities)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Todas las filas como lista de dicts"""
+        return list(self)
+
+    def _row(self, i: int) -> Dict[str, Any]:
+        return {name: self._columns[name][i] for name in self._names}
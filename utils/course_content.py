@@ -0,0 +1,139 @@
+"""
+Cargador de Contenido de Cursos
+Construye el árbol de un curso (módulos, materiales y exámenes) con un
+número fijo de consultas, sin importar cuántos módulos tenga
+"""
+
+from typing import Dict, Any, List, Iterable, Set
+
+from .query_profiles import projection
+
+
+def build_course_tree(
+    modules: List[Dict[str, Any]],
+    materials: List[Dict[str, Any]],
+    exams: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Agrupa materiales y exámenes bajo su módulo
+
+    Args:
+        modules: Módulos del curso ordenados por module_number
+        materials: Materiales de todos los módulos
+        exams: Exámenes de todos los módulos
+
+    Returns:
+        Lista de módulos, cada uno con las claves 'materials' y 'exams'
+    """
+    tree = [{**module, 'materials': [], 'exams': []} for module in modules]
+    by_module = {module['id']: module for module in tree}
+
+    for material in materials:
+        module = by_module.get(material.get('module_id'))
+        if module is not None:
+            module['materials'].append(material)
+
+    for exam in exams:
+        module = by_module.get(exam.get('module_id'))
+        if module is not None:
+            module['exams'].append(exam)
+
+    return tree
+
+
+def fetch_course_structure(client, course_id: str) -> List[Dict[str, Any]]:
+    """
+    Obtiene módulos, materiales y exámenes de un curso en tres consultas
+
+    Args:
+        client: Cliente de Supabase
+        course_id: ID del curso
+
+    Returns:
+        Árbol del curso (ver build_course_tree)
+    """
+    modules = client.table('course_modules')\
+        .select('*')\
+        .eq('course_id', course_id)\
+        .order('module_number')\
+        .execute().data or []
+
+    if not modules:
+        return []
+
+    module_ids = [m['id'] for m in modules]
+
+    materials = client.table('study_materials')\
+        .select(projection('study_materials', 'list'))\
+        .in_('module_id', module_ids)\
+        .order('created_at')\
+        .execute().data or []
+
+    exams = client.table('exams')\
+        .select('*')\
+        .in_('module_id', module_ids)\
+        .order('created_at', desc=True)\
+        .execute().data or []
+
+    return build_course_tree(modules, materials, exams)
+
+
+def fetch_passed_exam_ids(client, student_id: str, exam_ids: Iterable[str]) -> Set[str]:
+    """
+    Obtiene en una sola consulta los exámenes aprobados por un estudiante
+
+    Args:
+        client: Cliente de Supabase
+        student_id: ID del estudiante
+        exam_ids: Exámenes a verificar
+
+    Returns:
+        Conjunto de IDs de exámenes aprobados
+    """
+    exam_ids = list(exam_ids)
+    if not exam_ids:
+        return set()
+
+    results = client.table('exam_results')\
+        .select('exam_id')\
+        .eq('student_id', student_id)\
+        .eq('passed', True)\
+        .in_('exam_id', exam_ids)\
+        .execute().data or []
+
+    return {r['exam_id'] for r in results}
+
+
+def course_exam_ids(tree: List[Dict[str, Any]]) -> List[str]:
+    """Lista los IDs de todos los exámenes del árbol"""
+    return [exam['id'] for module in tree for exam in module['exams']]
+
+
+def load_course_tree(client, course_id: str, student_id: str) -> List[Dict[str, Any]]:
+    """
+    Carga el árbol del curso con el estado de aprobación del estudiante
+
+    Cada examen del árbol recibe la clave 'passed'. En total se hacen a lo
+    sumo cuatro consultas.
+
+    Args:
+        client: Cliente de Supabase
+        course_id: ID del curso
+        student_id: ID del estudiante
+
+    Returns:
+        Árbol del curso con exámenes marcados
+    """
+    tree = fetch_course_structure(client, course_id)
+    passed = fetch_passed_exam_ids(client, student_id, course_exam_ids(tree))
+    return mark_passed_exams(tree, passed)
+
+
+def mark_passed_exams(tree: List[Dict[str, Any]], passed_exam_ids: Set[str]) -> List[Dict[str, Any]]:
+    """Marca cada examen del árbol con la clave 'passed'"""
+    for module in tree:
+        module['exams'] = [
+            {**exam, 'passed': exam['id'] in passed_exam_ids}
+            for exam in module['exams']
+        ]
+    return tree
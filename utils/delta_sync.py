@@ -0,0 +1,298 @@
+"""
+Sincronización Incremental de Tablas
+Mantiene en memoria una réplica de tablas muy leídas (enrollments,
+subscriptions, exam_results) y la actualiza pidiendo solo las filas con
+updated_at posterior a la última marca de agua. El costo de cada refresco
+depende de cuántas filas cambiaron, no del tamaño de la tabla.
+
+Los objetos derivados de la tabla completa (por ejemplo un índice) se
+arman con derive() y se reutilizan mientras la réplica no cambie.
+
+Las filas borradas no aparecen en una consulta incremental; se eliminan en la
+resincronización completa periódica (FULL_RESYNC_INTERVAL).
+
+Requiere en cada tabla una columna updated_at que la base de datos mantenga
+(migrations/001_mirror_updated_at.sql). Si la columna no existe, sync()
+retorna False y la aplicación debe leer la tabla por otro camino: recorrerla
+completa en cada refresco costaría más que el caché que la réplica reemplaza.
+
+Tras una escritura local, refresh() espera a que termine cualquier
+sincronización en curso y aplica los cambios antes de retornar, así la
+siguiente lectura ya ve lo escrito.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .pagination import fetch_page, quote
+
+
+logger = logging.getLogger(__name__)
+
+# Segundos mínimos entre refrescos incrementales (salvo escrituras locales)
+SYNC_INTERVAL = 10
+
+# Segundos entre resincronizaciones completas (eliminan filas borradas)
+FULL_RESYNC_INTERVAL = 600
+
+# Segundos que se retrocede la marca de agua para no perder transacciones
+# que confirmaron tarde con un updated_at anterior
+SYNC_OVERLAP = 2
+
+# Filas por petición al recorrer cambios
+BATCH_SIZE = 1000
+
+
+def _rewind(timestamp: str, seconds: float) -> str:
+    """Resta segundos a un timestamp ISO de Supabase"""
+    moment = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    return (moment - timedelta(seconds=seconds)).isoformat()
+
+
+class TableMirror:
+    """Réplica en memoria de una tabla, indexada por columnas de filtro"""
+
+    def __init__(
+        self,
+        client,
+        table: str,
+        columns: Tuple[str, ...],
+        order_by: str,
+        index_by: Tuple[str, ...] = (),
+        watermark_column: str = 'updated_at'
+    ):
+        """
+        Args:
+            client: Cliente de Supabase
+            table: Nombre de la tabla
+            columns: Columnas a replicar (planas, sin joins)
+            order_by: Columna por la que se ordenan los resultados (descendente)
+            index_by: Columnas con índice para select(columna=valor)
+            watermark_column: Columna de última modificación
+        """
+        self.client = client
+        self.table = table
+        self.order_by = order_by
+        self.watermark_column = watermark_column
+        # None hasta la primera carga; False si la tabla no tiene watermark_column
+        self.available: Optional[bool] = None
+        self.watermark: Optional[str] = None
+        # Aumenta cada vez que cambian las filas de la réplica
+        self.version = 0
+        self._columns = tuple(columns)
+        self._rows: Dict[Any, Dict[str, Any]] = {}
+        self._indexes: Dict[str, Dict[Any, Dict[Any, Dict[str, Any]]]] = {c: {} for c in index_by}
+        self._loaded = False
+        self._dirty = False
+        self._synced_at = 0.0
+        self._full_at = 0.0
+        self._derived: Dict[str, Tuple[int, Any]] = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Aplica los cambios de una escritura local antes de retornar
+
+        Espera a la sincronización en curso (que pudo empezar antes de la
+        escritura) y trae los cambios; si falla, la próxima lectura reintenta.
+        """
+        if not self._loaded:
+            return
+        with self._sync_lock:
+            try:
+                self._delta_sync()
+            except Exception as e:
+                logger.warning("No se pudo sincronizar %s: %s", self.table, e)
+                self._dirty = True
+
+    def sync(self) -> bool:
+        """
+        Trae los cambios pendientes si corresponde
+
+        La primera carga bloquea; después, si otra sesión ya está refrescando,
+        se leen los datos actuales sin esperar.
+
+        Returns:
+            False si la tabla no tiene la columna de marca de agua (la réplica
+            no se usa); True si se puede leer con select()
+        """
+        if self.available is False:
+            return False
+        if not self._loaded:
+            with self._sync_lock:
+                if not self._loaded and self.available is not False:
+                    self._full_sync()
+            return self._loaded
+
+        now = time.monotonic()
+        if now - self._full_at >= FULL_RESYNC_INTERVAL:
+            due = self._full_sync
+        elif self._dirty or now - self._synced_at >= SYNC_INTERVAL:
+            due = self._delta_sync
+        else:
+            return True
+
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            due()
+        except Exception as e:
+            # Se siguen sirviendo los datos anteriores hasta el próximo intento
+            logger.warning("No se pudo sincronizar %s: %s", self.table, e)
+            self._synced_at = time.monotonic()
+        finally:
+            self._sync_lock.release()
+        return True
+
+    def select(self, **filters) -> List[Dict[str, Any]]:
+        """
+        Filas que cumplen filtros de igualdad, ordenadas por order_by descendente
+
+        Args:
+            **filters: {columna: valor}; las columnas de index_by se resuelven por índice
+
+        Returns:
+            Copias de las filas
+        """
+        indexed = next((c for c in filters if c in self._indexes), None)
+        with self._lock:
+            if indexed is not None:
+                candidates = self._indexes[indexed].get(filters[indexed], {}).values()
+            else:
+                candidates = self._rows.values()
+            rows = [
+                dict(row) for row in candidates
+                if all(row.get(column) == value for column, value in filters.items())
+            ]
+        rows.sort(key=lambda row: row.get(self.order_by) or '', reverse=True)
+        return rows
+
+    def derive(self, name: str, build: Callable[[List[Dict[str, Any]]], Any]) -> Any:
+        """
+        Objeto calculado a partir de todas las filas, reconstruido solo cuando
+        la réplica cambió desde la última vez
+
+        Args:
+            name: Identificador del objeto derivado
+            build: Función que recibe copias de todas las filas
+
+        Returns:
+            El objeto compartido (no debe modificarse)
+        """
+        with self._lock:
+            version = self.version
+            memo = self._derived.get(name)
+            if memo is not None and memo[0] == version:
+                return memo[1]
+            rows = [dict(row) for row in self._rows.values()]
+        rows.sort(key=lambda row: row.get(self.order_by) or '', reverse=True)
+        value = build(rows)
+        with self._lock:
+            memo = self._derived.get(name)
+            if memo is None or memo[0] <= version:
+                self._derived[name] = (version, value)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _full_sync(self):
+        """Reemplaza la réplica con la tabla completa"""
+        self._dirty = False
+        started = time.monotonic()
+        rows = self._fetch()
+        if rows is None:
+            return
+        rows_by_id = {row['id']: row for row in rows}
+        indexes = {column: {} for column in self._indexes}
+        for row in rows:
+            for column, index in indexes.items():
+                index.setdefault(row.get(column), {})[row['id']] = row
+
+        with self._lock:
+            self._rows = rows_by_id
+            self._indexes = indexes
+            self.watermark = self._max_watermark(rows, None)
+            self.version += 1
+            self._loaded = True
+        self._synced_at = self._full_at = started
+
+    def _delta_sync(self):
+        """Aplica las filas modificadas desde la marca de agua"""
+        self._dirty = False
+        started = time.monotonic()
+        since = _rewind(self.watermark, SYNC_OVERLAP) if self.watermark else None
+        rows = self._fetch(since)
+        if rows is None:
+            return
+
+        with self._lock:
+            for row in rows:
+                self._discard(row['id'])
+                self._rows[row['id']] = row
+                for column, index in self._indexes.items():
+                    index.setdefault(row.get(column), {})[row['id']] = row
+            if rows:
+                self.version += 1
+            self.watermark = self._max_watermark(rows, self.watermark)
+        self._synced_at = started
+
+    def _fetch(self, since: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Recorre por cursor las filas modificadas desde `since` (o todas)
+
+        Returns:
+            Filas, o None si la tabla no tiene la columna de marca de agua
+        """
+        conditions = [f"{self.watermark_column}.gte.{quote(since)}"] if since else []
+        try:
+            rows = self._fetch_pages(self.watermark_column, conditions,
+                                     self._columns + (self.watermark_column,))
+        except Exception as e:
+            if self.watermark_column not in str(e):
+                raise
+            logger.warning("%s no tiene %s (ver migrations/001_mirror_updated_at.sql); "
+                           "la réplica queda deshabilitada", self.table, self.watermark_column)
+            self.available = False
+            return None
+        self.available = True
+        return rows
+
+    def _fetch_pages(self, order_column: str, conditions: List[str],
+                     columns: Tuple[str, ...]) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        cursor = None
+        while True:
+            page = fetch_page(
+                self.client.table(self.table).select(','.join(columns)),
+                order_column,
+                cursor=cursor,
+                page_size=BATCH_SIZE,
+                desc=False,
+                conditions=conditions
+            )
+            rows.extend(page.rows)
+            if not page.has_more:
+                return rows
+            cursor = page.next_cursor
+
+    def _max_watermark(self, rows: List[Dict[str, Any]], current: Optional[str]) -> Optional[str]:
+        values = [row.get(self.watermark_column) for row in rows if row.get(self.watermark_column)]
+        if current:
+            values.append(current)
+        return max(values, key=lambda v: datetime.fromisoformat(v.replace('Z', '+00:00')), default=None)
+
+    def _discard(self, row_id):
+        old = self._rows.pop(row_id, None)
+        if old is None:
+            return
+        for column, index in self._indexes.items():
+            bucket = index.get(old.get(column))
+            if bucket is not None:
+                bucket.pop(row_id, None)
+                if not bucket:
+                    del index[old.get(column)]
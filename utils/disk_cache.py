@@ -0,0 +1,241 @@
+"""
+Caché Persistente en Disco
+Segundo nivel del caché de consultas guardado en un archivo SQLite local.
+Sobrevive a reinicios del proceso de Streamlit: un proceso nuevo se calienta
+desde el archivo en lugar de repetir todas las consultas a Supabase.
+
+Las entradas guardan el valor serializado, sus etiquetas y su vencimiento en
+hora de reloj. Las claves llevan CACHE_VERSION: al cambiar la forma de los
+datos cacheados basta con incrementarla para ignorar el archivo anterior.
+
+El archivo también sirve de backend compartido entre réplicas de la
+aplicación que lo montan: una réplica encuentra allí lo que otra ya consultó,
+y cada invalidación queda registrada como mensaje en la tabla invalidations
+para que las demás réplicas descarten esas etiquetas de su memoria.
+
+Otro backend compartido (por ejemplo Redis) puede reemplazar a DiskCache
+implementando los mismos métodos: get, set, invalidate_tags, entries, clear,
+last_invalidation e invalidations_since (y, opcionalmente, purge, que el
+caché llama cada PURGE_INTERVAL segundos).
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+
+# Incrementar cuando cambie el formato de los valores cacheados
+CACHE_VERSION = 1
+
+DEFAULT_PATH = os.path.join('.cache', 'query_cache.sqlite3')
+
+# Segundos que se conservan los mensajes de invalidación
+MESSAGE_RETENTION = 3600
+
+# Etiqueta de un mensaje que vacía el caché completo
+CLEAR_ALL = '*'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key_hash TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    key BLOB NOT NULL,
+    payload BLOB NOT NULL,
+    fresh_until REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entry_tags (
+    key_hash TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (tag, key_hash)
+);
+CREATE INDEX IF NOT EXISTS entry_tags_by_key ON entry_tags (key_hash);
+CREATE TABLE IF NOT EXISTS invalidations (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def key_hash(key: Any) -> str:
+    """Identificador estable de una clave del caché, incluida la versión"""
+    raw = f"{CACHE_VERSION}:{key!r}".encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()
+
+
+class DiskCache:
+    """Entradas del caché en SQLite, indexadas por etiqueta"""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        """
+        Args:
+            path: Ruta del archivo SQLite (se crea si no existe)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # Identifica los mensajes propios para no aplicarlos dos veces
+        self.origin = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA busy_timeout=5000')
+        self._conn.executescript(_SCHEMA)
+        self.purge()
+
+    def get(self, key) -> Optional[Tuple[bytes, Tuple[str, ...], float, float]]:
+        """
+        Busca una entrada no vencida
+
+        Returns:
+            (payload, etiquetas, fresh_until, expires_at) en hora de reloj, o None
+        """
+        digest = key_hash(key)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT payload, fresh_until, expires_at FROM entries '
+                'WHERE key_hash = ? AND version = ? AND expires_at > ?',
+                (digest, CACHE_VERSION, time.time())
+            ).fetchone()
+            if row is None:
+                return None
+            tags = tuple(t for (t,) in self._conn.execute(
+                'SELECT tag FROM entry_tags WHERE key_hash = ?', (digest,)
+            ))
+        payload, fresh_until, expires_at = row
+        return payload, tags, fresh_until, expires_at
+
+    def set(self, key, payload: bytes, tags: Iterable[str], fresh_until: float, expires_at: float):
+        """Guarda una entrada (vencimientos en hora de reloj)"""
+        digest = key_hash(key)
+        raw_key = pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                    (digest, CACHE_VERSION, raw_key, payload, fresh_until, expires_at)
+                )
+                self._conn.execute('DELETE FROM entry_tags WHERE key_hash = ?', (digest,))
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO entry_tags VALUES (?, ?)',
+                    [(digest, t) for t in set(tags)]
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Elimina las entradas marcadas con cualquiera de las etiquetas"""
+        tags = list(tags)
+        if not tags:
+            return 0
+        marks = ','.join('?' * len(tags))
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                digests = [d for (d,) in self._conn.execute(
+                    f'SELECT DISTINCT key_hash FROM entry_tags WHERE tag IN ({marks})', tags
+                )]
+                self._delete(digests)
+                self._publish(tags)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return len(digests)
+
+    def entries(self) -> Iterator[Tuple[Any, bytes, Tuple[str, ...], float, float]]:
+        """Entradas vigentes de la versión actual, para calentar el caché en memoria"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT key_hash, key, payload, fresh_until, expires_at FROM entries '
+                'WHERE version = ? AND expires_at > ?',
+                (CACHE_VERSION, time.time())
+            ).fetchall()
+            tags_by_key = {}
+            for digest, t in self._conn.execute('SELECT key_hash, tag FROM entry_tags'):
+                tags_by_key.setdefault(digest, []).append(t)
+        for digest, raw_key, payload, fresh_until, expires_at in rows:
+            try:
+                key = pickle.loads(raw_key)
+            except Exception:
+                continue
+            yield key, payload, tuple(tags_by_key.get(digest, ())), fresh_until, expires_at
+
+    def last_invalidation(self) -> int:
+        """Número del último mensaje de invalidación publicado"""
+        with self._lock:
+            (seq,) = self._conn.execute('SELECT COALESCE(MAX(seq), 0) FROM invalidations').fetchone()
+        return seq
+
+    def invalidations_since(self, seq: int) -> Tuple[int, List[List[str]], bool]:
+        """
+        Mensajes de invalidación publicados por otras réplicas
+
+        Args:
+            seq: Último mensaje ya aplicado
+
+        Returns:
+            (último mensaje leído, listas de etiquetas, hubo_hueco). hubo_hueco
+            indica que se descartaron mensajes no leídos y conviene vaciar la
+            memoria completa
+        """
+        with self._lock:
+            (first,) = self._conn.execute('SELECT MIN(seq) FROM invalidations').fetchone()
+            rows = self._conn.execute(
+                'SELECT seq, origin, tags FROM invalidations WHERE seq > ? ORDER BY seq',
+                (seq,)
+            ).fetchall()
+        gap = first is not None and first > seq + 1 and seq > 0
+        messages = [json.loads(tags) for _, origin, tags in rows if origin != self.origin]
+        last = rows[-1][0] if rows else seq
+        return last, messages, gap
+
+    def purge(self):
+        """Elimina entradas vencidas, las de versiones anteriores y mensajes viejos"""
+        with self._lock:
+            digests = [d for (d,) in self._conn.execute(
+                'SELECT key_hash FROM entries WHERE version != ? OR expires_at <= ?',
+                (CACHE_VERSION, time.time())
+            )]
+            self._conn.execute('BEGIN')
+            self._delete(digests)
+            # Siempre se conserva el último mensaje para detectar huecos
+            self._conn.execute(
+                'DELETE FROM invalidations WHERE created_at < ? '
+                'AND seq < (SELECT MAX(seq) FROM invalidations)',
+                (time.time() - MESSAGE_RETENTION,)
+            )
+            self._conn.execute('COMMIT')
+
+    def clear(self):
+        """Vacía el archivo de caché y avisa a las demás réplicas"""
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.execute('DELETE FROM entries')
+            self._conn.execute('DELETE FROM entry_tags')
+            self._publish([CLEAR_ALL])
+            self._conn.execute('COMMIT')
+
+    def _publish(self, tags: List[str]):
+        self._conn.execute(
+            'INSERT INTO invalidations (origin, tags, created_at) VALUES (?, ?, ?)',
+            (self.origin, json.dumps(sorted(tags)), time.time())
+        )
+
+    def _delete(self, digests):
+        rows = [(d,) for d in digests]
+        self._conn.executemany('DELETE FROM entries WHERE key_hash = ?', rows)
+        self._conn.executemany('DELETE FROM entry_tags WHERE key_hash = ?', rows)
@@ -0,0 +1,209 @@
+"""
+Servidor de Descargas
+Servidor HTTP mínimo que entrega los archivos del almacén local por
+streaming, en bloques y con soporte de Range (reanudar descargas, adelantar
+videos). El proceso de Streamlit no carga el archivo en memoria ni lo guarda
+en la sesión: cada descarga usa un bloque de CHUNK_SIZE a la vez.
+
+Los enlaces son firmados (HMAC-SHA256 de clave, nombre y vencimiento): solo
+quien recibió el enlace desde la aplicación puede descargar, y solo hasta que
+vence.
+
+    GET /files/<storage_key>?name=<archivo>&expires=<epoch>&sig=<firma>
+
+El servidor escucha en su propio puerto (FILE_SERVER_PORT, por defecto solo
+en 127.0.0.1; FILE_SERVER_HOST lo cambia) y solo se inicia si FILE_SERVER_URL
+indica la URL pública con que lo ven los navegadores (el proxy que publica
+Streamlit debe enrutar /files/ a ese puerto) y FILE_SERVER_SECRET la clave de
+firma. Un enlace a localhost apuntaría al equipo de quien lo abre, no al
+servidor.
+"""
+
+import hashlib
+import hmac
+import mimetypes
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlencode, urlsplit
+
+
+# Bytes por bloque al enviar un archivo
+CHUNK_SIZE = 256 * 1024
+
+# Segundos de validez de un enlace (se redondea a ventanas de este tamaño
+# para que el enlace no cambie en cada ejecución del script)
+LINK_TTL = 3600
+
+ROUTE = '/files/'
+
+
+def sign(secret: str, key: str, name: str, expires: int) -> str:
+    """Firma de un enlace de descarga"""
+    message = f"{key}\n{name}\n{expires}".encode('utf-8')
+    return hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def signed_path(secret: str, key: str, name: str, ttl: int = LINK_TTL) -> str:
+    """
+    Ruta firmada de descarga de una clave
+
+    Args:
+        secret: Secreto compartido con el servidor
+        key: Clave del archivo en el almacén
+        name: Nombre con el que se descarga
+        ttl: Validez mínima en segundos
+
+    Returns:
+        Ruta con query string, relativa a la URL del servidor
+    """
+    expires = (int(time.time()) // ttl + 2) * ttl
+    query = urlencode({'name': name, 'expires': expires, 'sig': sign(secret, key, name, expires)})
+    return f"{ROUTE}{quote(key)}?{query}"
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta una cabecera Range de un solo rango
+
+    Returns:
+        (inicio, fin) inclusivos; None si no hay rango o se debe enviar el
+        archivo completo (varios rangos o sintaxis no soportada)
+
+    Raises:
+        ValueError: Si el rango no es satisfacible
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    start_text, _, end_text = header[len('bytes='):].strip().partition('-')
+    try:
+        start = int(start_text) if start_text else None
+        end = int(end_text) if end_text else None
+    except ValueError:
+        # Sintaxis inválida: se ignora la cabecera
+        return None
+
+    if start is None:
+        # bytes=-N: los últimos N bytes
+        if not end or not size:
+            raise ValueError(header)
+        return max(0, size - end), size - 1
+    if start >= size or (end is not None and end < start):
+        raise ValueError(header)
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+class _DownloadHandler(BaseHTTPRequestHandler):
+    server_version = 'CursosFiles/1.0'
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def log_message(self, format, *args):
+        # Sin una línea por petición en la salida de Streamlit
+        pass
+
+    def _serve(self, send_body: bool):
+        parts = urlsplit(self.path)
+        if not parts.path.startswith(ROUTE):
+            return self.send_error(404)
+        key = unquote(parts.path[len(ROUTE):])
+        query = parse_qs(parts.query)
+        name = query.get('name', ['archivo'])[0]
+        try:
+            expires = int(query.get('expires', ['0'])[0])
+        except ValueError:
+            return self.send_error(403)
+        expected = sign(self.server.secret, key, name, expires)
+        if expires < time.time() or not hmac.compare_digest(expected, query.get('sig', [''])[0]):
+            return self.send_error(403, 'Enlace vencido o inválido')
+
+        try:
+            path = self.server.store.path(key)
+            size = os.path.getsize(path)
+        except (ValueError, OSError):
+            return self.send_error(404)
+
+        # La clave es el hash del contenido: el archivo de una clave nunca cambia
+        etag = f'"{key.rsplit("/", 1)[-1]}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        try:
+            byte_range = parse_range(self.headers.get('Range'), size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{size}')
+            self.end_headers()
+            return
+
+        start, end = byte_range if byte_range else (0, size - 1)
+        length = max(0, end - start + 1)
+        self.send_response(206 if byte_range else 200)
+        self.send_header('Content-Type', mimetypes.guess_type(name)[0] or 'application/octet-stream')
+        self.send_header('Content-Length', str(length))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'private, max-age=3600')
+        self.send_header('Content-Disposition', f"attachment; filename*=UTF-8''{quote(name)}")
+        if byte_range:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+        if not send_body or not length:
+            return
+
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = length
+            try:
+                while remaining > 0:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                # El cliente canceló la descarga
+                pass
+
+
+class FileServer:
+    """Servidor de descargas en un hilo de fondo"""
+
+    def __init__(self, store, secret: str, public_url: str, host: str = '127.0.0.1',
+                 port: int = 8502):
+        """
+        Args:
+            store: LocalBlobStore con los archivos
+            secret: Secreto para firmar enlaces
+            public_url: URL base que ven los navegadores
+            host: Interfaz donde escuchar (solo localhost por defecto)
+            port: Puerto donde escuchar (0 elige uno libre)
+        """
+        self.secret = secret
+        self._httpd = ThreadingHTTPServer((host, port), _DownloadHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.store = store
+        self._httpd.secret = secret
+        self.port = self._httpd.server_address[1]
+        self.public_url = public_url.rstrip('/')
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name='file-server', daemon=True
+        )
+        self._thread.start()
+
+    def url(self, key: str, name: str) -> str:
+        """Enlace firmado de descarga"""
+        return self.public_url + signed_path(self.secret, key, name)
+
+    def shutdown(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
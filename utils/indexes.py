@@ -0,0 +1,59 @@
+"""
+Índices en Memoria para Inscripciones
+Agrupa una lista de inscripciones por curso, por estudiante y por estado
+para que las vistas hagan búsquedas en tiempo constante en lugar de filtrar
+la lista completa dentro de cada iteración.
+"""
+
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+
+class EnrollmentIndex:
+    """Inscripciones con índices secundarios prearmados"""
+
+    def __init__(self, enrollments: List[Dict[str, Any]]):
+        """
+        Args:
+            enrollments: Filas de enrollments (cualquier perfil con course_id y student_id)
+        """
+        self.enrollments = enrollments
+        self.by_course: Dict[Any, List[Dict[str, Any]]] = {}
+        self.by_student: Dict[Any, List[Dict[str, Any]]] = {}
+        self.status_by_course: Dict[Any, Counter] = {}
+
+        for enrollment in enrollments:
+            course_id = enrollment.get('course_id')
+            student_id = enrollment.get('student_id')
+            self.by_course.setdefault(course_id, []).append(enrollment)
+            self.by_student.setdefault(student_id, []).append(enrollment)
+            self.status_by_course.setdefault(course_id, Counter())[
+                enrollment.get('completion_status') or 'in_progress'
+            ] += 1
+
+    def __len__(self) -> int:
+        return len(self.enrollments)
+
+    def for_course(self, course_id) -> List[Dict[str, Any]]:
+        """Inscripciones de un curso"""
+        return self.by_course.get(course_id, [])
+
+    def for_student(self, student_id) -> List[Dict[str, Any]]:
+        """Inscripciones de un estudiante"""
+        return self.by_student.get(student_id, [])
+
+    def count_for_course(self, course_id) -> int:
+        """Cantidad de inscritos en un curso"""
+        return len(self.by_course.get(course_id, ()))
+
+    def status_count(self, course_id, status: str) -> int:
+        """Cantidad de inscripciones de un curso con el estado dado"""
+        counter = self.status_by_course.get(course_id)
+        return counter[status] if counter else 0
+
+    def find(self, student_id, course_id) -> Optional[Dict[str, Any]]:
+        """Inscripción de un estudiante en un curso, si existe"""
+        return next(
+            (e for e in self.by_student.get(student_id, ()) if e.get('course_id') == course_id),
+            None
+        )
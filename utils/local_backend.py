@@ -0,0 +1,745 @@
+"""
+Backend de Almacenamiento Local (SQLite)
+Implementación local del subconjunto del cliente de Supabase que usa la
+aplicación, para ejecutarla, medirla y hacer pruebas de carga sin conexión.
+
+Backend de almacenamiento: cualquier objeto con table(nombre) que retorne un
+constructor con esta interfaz (la de supabase-py / postgrest):
+
+    select(columnas, count=None, head=False)   insert(filas)   update(valores)   delete()
+    eq  neq  gt  gte  lt  lte  in_  like  ilike  is_  or_(filtro lógico)
+    order(columna, desc=False)   limit(n)   single()   execute() -> .data, .count
+
+LocalClient guarda las tablas en un archivo SQLite y emula de PostgREST:
+joins embebidos (users(*), courses(id,name), enrollments(*, courses(*))),
+filtros sobre tablas embebidas ('enrollments.student_id'), filtros lógicos
+or=() / and() con valores entre comillas, orden con NULLS LAST/FIRST como
+Postgres, like sensible a mayúsculas e ilike insensible, y count='exact'. Los ids se generan como UUID y las columnas JSON se
+guardan serializadas.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEFAULT_PATH = os.path.join('.cache', 'local_backend.sqlite3')
+
+# Tipos de columna: text, int, real, bool, json, timestamp
+# (updated_at de enrollments, subscriptions y exam_results corresponde a
+# migrations/001_mirror_updated_at.sql)
+SCHEMA: Dict[str, Dict[str, str]] = {
+    'users': {
+        'id': 'text', 'email': 'text', 'password_hash': 'text', 'first_name': 'text',
+        'last_name': 'text', 'role': 'text', 'is_active': 'bool',
+        'requires_password_reset': 'bool', 'created_at': 'timestamp',
+    },
+    'courses': {
+        'id': 'text', 'name': 'text', 'description': 'text', 'price': 'real',
+        'duration_days': 'int', 'is_active': 'bool', 'created_at': 'timestamp',
+    },
+    'course_modules': {
+        'id': 'text', 'course_id': 'text', 'module_number': 'int', 'title': 'text',
+        'content_url': 'text', 'external_link': 'text', 'study_material': 'text',
+        'release_day': 'int', 'created_at': 'timestamp',
+    },
+    'study_materials': {
+        'id': 'text', 'module_id': 'text', 'title': 'text', 'file_content_b64': 'text',
+        'storage_key': 'text',
+        'file_name': 'text', 'file_size': 'int', 'file_type': 'text', 'uploaded_by': 'text',
+        'external_link': 'text', 'created_at': 'timestamp',
+    },
+    'exams': {
+        'id': 'text', 'module_id': 'text', 'title': 'text', 'description': 'text',
+        'questions': 'json', 'passing_score': 'real', 'time_limit_minutes': 'int',
+        'max_attempts': 'int', 'created_by': 'text', 'created_at': 'timestamp',
+    },
+    'exam_questions': {
+        'id': 'text', 'exam_id': 'text', 'question_type': 'text', 'question_text': 'text',
+        'correct_answer': 'text', 'options': 'json', 'points': 'real', 'question_order': 'int',
+    },
+    'exam_results': {
+        'id': 'text', 'exam_id': 'text', 'student_id': 'text', 'score': 'real',
+        'passed': 'bool', 'feedback': 'text', 'completed_at': 'timestamp', 'answers': 'json',
+        'corrected_by_ai': 'bool', 'total_questions': 'int', 'correct_answers': 'int',
+        'updated_at': 'timestamp',
+    },
+    'enrollments': {
+        'id': 'text', 'student_id': 'text', 'course_id': 'text', 'enrollment_date': 'timestamp',
+        'progress_percentage': 'real', 'completion_status': 'text', 'completed_items': 'text',
+        'certificate_issued': 'bool', 'updated_at': 'timestamp',
+    },
+    'subscriptions': {
+        'id': 'text', 'student_id': 'text', 'course_id': 'text', 'amount_paid': 'real',
+        'payment_status': 'text', 'transaction_id': 'text', 'payment_method': 'text',
+        'subscription_start': 'timestamp', 'subscription_end': 'timestamp',
+        'created_at': 'timestamp', 'updated_at': 'timestamp',
+    },
+    'certificates': {
+        'id': 'text', 'enrollment_id': 'text', 'verification_code': 'text',
+        'issue_date': 'timestamp',
+    },
+    'teacher_assignments': {
+        'id': 'text', 'teacher_id': 'text', 'course_id': 'text', 'created_at': 'timestamp',
+    },
+    'assignments': {
+        'id': 'text', 'module_id': 'text', 'title': 'text', 'description': 'text',
+        'due_date': 'text', 'max_score': 'real', 'created_by': 'text', 'created_at': 'timestamp',
+    },
+    'assignment_submissions': {
+        'id': 'text', 'assignment_id': 'text', 'student_id': 'text', 'files': 'json',
+        'comments': 'text', 'status': 'text', 'submitted_at': 'timestamp',
+    },
+}
+
+# Valores por defecto al insertar (además de id y columnas de fecha)
+DEFAULTS: Dict[str, Dict[str, Any]] = {
+    'users': {'is_active': True, 'requires_password_reset': False},
+    'courses': {'is_active': True},
+    'enrollments': {'progress_percentage': 0, 'completion_status': 'in_progress',
+                    'certificate_issued': False},
+}
+
+# Columnas que toman la fecha actual al insertar
+_NOW_ON_INSERT = ('created_at', 'updated_at', 'enrollment_date', 'issue_date',
+                  'completed_at', 'submitted_at')
+
+# Joins embebidos: (tabla, nombre del join) -> (columna local, tabla destino, columna destino, muchos)
+RELATIONS: Dict[Tuple[str, str], Tuple[str, str, str, bool]] = {
+    ('enrollments', 'users'): ('student_id', 'users', 'id', False),
+    ('enrollments', 'courses'): ('course_id', 'courses', 'id', False),
+    ('subscriptions', 'users'): ('student_id', 'users', 'id', False),
+    ('subscriptions', 'courses'): ('course_id', 'courses', 'id', False),
+    ('exam_results', 'users'): ('student_id', 'users', 'id', False),
+    ('exam_results', 'exams'): ('exam_id', 'exams', 'id', False),
+    ('teacher_assignments', 'users'): ('teacher_id', 'users', 'id', False),
+    ('teacher_assignments', 'courses'): ('course_id', 'courses', 'id', False),
+    ('certificates', 'enrollments'): ('enrollment_id', 'enrollments', 'id', False),
+    ('assignments', 'course_modules'): ('module_id', 'course_modules', 'id', False),
+    ('study_materials', 'course_modules'): ('module_id', 'course_modules', 'id', False),
+    ('exams', 'course_modules'): ('module_id', 'course_modules', 'id', False),
+    ('course_modules', 'courses'): ('course_id', 'courses', 'id', False),
+    ('assignment_submissions', 'assignments'): ('assignment_id', 'assignments', 'id', False),
+    ('assignment_submissions', 'users'): ('student_id', 'users', 'id', False),
+    ('courses', 'course_modules'): ('id', 'course_modules', 'course_id', True),
+    ('course_modules', 'study_materials'): ('id', 'study_materials', 'module_id', True),
+    ('course_modules', 'exams'): ('id', 'exams', 'module_id', True),
+    ('exams', 'exam_questions'): ('id', 'exam_questions', 'exam_id', True),
+}
+
+# Índices adicionales (columnas de búsqueda que no son de joins)
+INDEXES = (('study_materials', 'storage_key'),)
+
+_SQL_TYPES = {'text': 'TEXT', 'int': 'INTEGER', 'real': 'REAL', 'bool': 'INTEGER',
+              'json': 'TEXT', 'timestamp': 'TEXT'}
+
+_OPERATORS = {'eq': '=', 'neq': '!=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<=',
+              'like': 'GLOB', 'ilike': 'LIKE'}
+
+# Comodines de LIKE de PostgREST (* o %, y _) a GLOB; los caracteres especiales
+# de GLOB se escapan como clases de un solo carácter
+_GLOB_TRANSLATION = str.maketrans({'%': '*', '_': '?', '?': '[?]', '[': '[[]'})
+
+
+class BackendStats:
+    """Contadores de peticiones del backend local (para benchmarks)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, sent: int, received: int):
+        with self._lock:
+            self.round_trips += 1
+            self.bytes_sent += sent
+            self.bytes_received += received
+
+    def reset(self):
+        with self._lock:
+            self.round_trips = 0
+            self.bytes_sent = 0
+            self.bytes_received = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {'round_trips': self.round_trips, 'bytes_sent': self.bytes_sent,
+                    'bytes_received': self.bytes_received}
+
+
+# Contadores de todos los LocalClient del proceso
+stats = BackendStats()
+
+
+class LocalAPIError(Exception):
+    """Error equivalente a un APIError de PostgREST"""
+
+
+class LocalResponse:
+    """Respuesta con la forma de APIResponse de supabase-py"""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+    def __repr__(self) -> str:
+        return f"LocalResponse(data={self.data!r}, count={self.count!r})"
+
+
+def now_iso() -> str:
+    """Fecha actual en el formato de timestamptz de Supabase"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f+00:00')
+
+
+# ==================== PARSEO DE SELECT Y FILTROS LÓGICOS ====================
+
+def _split_top_level(text: str) -> List[str]:
+    """Separa por comas que no estén dentro de paréntesis ni comillas"""
+    parts, depth, quoted, current = [], 0, False, []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if quoted:
+            current.append(char)
+            if char == '\\' and i + 1 < len(text):
+                current.append(text[i + 1])
+                i += 1
+            elif char == '"':
+                quoted = False
+        elif char == '"':
+            quoted = True
+            current.append(char)
+        elif char == '(':
+            depth += 1
+            current.append(char)
+        elif char == ')':
+            depth -= 1
+            current.append(char)
+        elif char == ',' and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    if current:
+        parts.append(''.join(current).strip())
+    return [p for p in parts if p]
+
+
+def parse_select(columns: str) -> Tuple[List[str], List[Tuple[str, str, str]]]:
+    """
+    Parsea la cadena de select()
+
+    Returns:
+        (columnas, joins) donde cada join es (clave en la fila, tabla embebida, select interno)
+    """
+    plain, embeds = [], []
+    for item in _split_top_level(columns or '*'):
+        match = re.fullmatch(r'(?:(\w+):)?(\w+)(?:!\w+)?\((.*)\)', item, re.S)
+        if match:
+            alias, name, inner = match.groups()
+            embeds.append((alias or name, name, inner))
+        else:
+            plain.append(item.split('::')[0].split(':')[-1].strip())
+    return plain, embeds
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', value[1:-1])
+    return value
+
+
+def _parse_logic(text: str) -> List[Any]:
+    """Parsea un filtro lógico de PostgREST en una lista de nodos"""
+    nodes = []
+    for item in _split_top_level(text):
+        match = re.fullmatch(r'(not\.)?(and|or)\((.*)\)', item, re.S)
+        if match:
+            negated, kind, inner = match.groups()
+            nodes.append((kind, bool(negated), _parse_logic(inner)))
+            continue
+        column, rest = item.split('.', 1)
+        negated = rest.startswith('not.')
+        if negated:
+            rest = rest[len('not.'):]
+        op, raw = rest.split('.', 1)
+        if op == 'in':
+            values = [_unquote(v) for v in _split_top_level(raw.strip()[1:-1])]
+            nodes.append(('filter', negated, (column, op, values)))
+        else:
+            nodes.append(('filter', negated, (column, op, _unquote(raw))))
+    return nodes
+
+
+# ==================== CLIENTE ====================
+
+class LocalClient:
+    """Cliente local con la interfaz de tablas de supabase-py, sobre SQLite"""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        """
+        Args:
+            path: Archivo SQLite (se crea con el esquema si no existe) o ':memory:'
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # ilike usa LIKE; like se traduce a GLOB, que distingue mayúsculas
+        self._conn.execute('PRAGMA case_sensitive_like=OFF')
+        self._conn.execute('PRAGMA busy_timeout=5000')
+        self._create_schema()
+
+    def table(self, name: str) -> 'LocalQueryBuilder':
+        """Constructor de consultas sobre una tabla"""
+        if name not in SCHEMA:
+            raise LocalAPIError(f'relation "public.{name}" does not exist')
+        return LocalQueryBuilder(self, name)
+
+    def execute_sql(self, sql: str, params: List[Any] = ()) -> List[sqlite3.Row]:
+        """Ejecuta SQL en el archivo local (uso interno y scripts)"""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _create_schema(self):
+        with self._lock:
+            for table, columns in SCHEMA.items():
+                definition = ', '.join(
+                    f'{name} {_SQL_TYPES[kind]}' + (' PRIMARY KEY' if name == 'id' else '')
+                    for name, kind in columns.items()
+                )
+                self._conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({definition})')
+                # Archivos creados con un esquema anterior: agregar columnas nuevas
+                existing = {row[1] for row in self._conn.execute(f'PRAGMA table_info({table})')}
+                for name, kind in columns.items():
+                    if name not in existing:
+                        self._conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {_SQL_TYPES[kind]}')
+            for (table, _), (local, target, remote, many) in RELATIONS.items():
+                column = remote if many else local
+                indexed = target if many else table
+                if column != 'id':
+                    self._conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS {indexed}_{column} ON {indexed} ({column})'
+                    )
+            for table, column in INDEXES:
+                self._conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column})'
+                )
+
+
+class LocalQueryBuilder:
+    """Constructor de consultas encadenable, equivalente al de postgrest"""
+
+    def __init__(self, client: LocalClient, table: str):
+        self.client = client
+        self.table_name = table
+        self.columns = SCHEMA[table]
+        # Misma forma que RequestConfig de postgrest (la usa el memo de lecturas)
+        self.request = _Request(f'/rest/v1/{table}')
+
+        self._select = '*'
+        self._count: Optional[str] = None
+        self._head = False
+        self._payload: Any = None
+        self._where: List[Tuple[str, List[Any]]] = []
+        self._embed_filters: Dict[str, List[Tuple[str, str, Any]]] = {}
+        self._order: List[Tuple[str, bool]] = []
+        self._limit: Optional[int] = None
+        self._single = False
+
+    # ----- operaciones -----
+
+    def select(self, columns: str = '*', count: Optional[str] = None, head: bool = False):
+        self._select = columns
+        self._count = count
+        self._head = head
+        self.request.params.append(('select', columns))
+        if count:
+            self.request.headers['prefer'] = f'count={count}'
+        if head:
+            self.request.http_method = 'HEAD'
+        return self
+
+    def insert(self, rows):
+        self.request.http_method = 'POST'
+        self._payload = rows
+        return self
+
+    def update(self, values: Dict[str, Any]):
+        self.request.http_method = 'PATCH'
+        self._payload = values
+        return self
+
+    def delete(self):
+        self.request.http_method = 'DELETE'
+        return self
+
+    # ----- filtros -----
+
+    def eq(self, column: str, value):
+        return self._filter(column, 'eq', value)
+
+    def neq(self, column: str, value):
+        return self._filter(column, 'neq', value)
+
+    def gt(self, column: str, value):
+        return self._filter(column, 'gt', value)
+
+    def gte(self, column: str, value):
+        return self._filter(column, 'gte', value)
+
+    def lt(self, column: str, value):
+        return self._filter(column, 'lt', value)
+
+    def lte(self, column: str, value):
+        return self._filter(column, 'lte', value)
+
+    def like(self, column: str, pattern: str):
+        return self._filter(column, 'like', pattern)
+
+    def ilike(self, column: str, pattern: str):
+        return self._filter(column, 'ilike', pattern)
+
+    def is_(self, column: str, value):
+        return self._filter(column, 'is', value)
+
+    def in_(self, column: str, values):
+        return self._filter(column, 'in', list(values))
+
+    def or_(self, filters: str):
+        self.request.params.append(('or', f'({filters})'))
+        sql, params = self._compile_logic(('or', False, _parse_logic(filters)))
+        self._where.append((sql, params))
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        self.request.params.append(('order', f"{column}.{'desc' if desc else 'asc'}"))
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int):
+        self.request.params.append(('limit', str(size)))
+        self._limit = size
+        return self
+
+    def single(self):
+        self.request.headers['accept'] = 'application/vnd.pgrst.object+json'
+        self._single = True
+        return self
+
+    # ----- ejecución -----
+
+    def execute(self) -> LocalResponse:
+        with self.client._lock:
+            if self.request.http_method == 'POST':
+                response = self._execute_insert()
+            elif self.request.http_method == 'PATCH':
+                response = self._execute_update()
+            elif self.request.http_method == 'DELETE':
+                response = self._execute_delete()
+            else:
+                response = self._execute_select()
+        stats.record(
+            len(json.dumps(self._payload, default=str)) if self._payload is not None else 0,
+            len(json.dumps(response.data, default=str))
+        )
+        return response
+
+    def _execute_select(self) -> LocalResponse:
+        where_sql, params = self._where_clause()
+        count = None
+        if self._count:
+            (count,) = self.client._conn.execute(
+                f'SELECT COUNT(*) FROM {self.table_name}{where_sql}', params
+            ).fetchone()
+        if self._head:
+            return LocalResponse([], count)
+
+        sql = f'SELECT * FROM {self.table_name}{where_sql}{self._order_clause()}'
+        if self._limit is not None:
+            sql += f' LIMIT {int(self._limit)}'
+        rows = [self._decode(row) for row in self.client._conn.execute(sql, params)]
+        rows = self._shape(self.table_name, rows, self._select, self._embed_filters)
+
+        if self._single:
+            if len(rows) != 1:
+                raise LocalAPIError(
+                    f'JSON object requested, multiple (or no) rows returned ({len(rows)} rows)'
+                )
+            return LocalResponse(rows[0], count)
+        return LocalResponse(rows, count)
+
+    def _execute_insert(self) -> LocalResponse:
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        inserted = []
+        self.client._conn.execute('BEGIN')
+        try:
+            for row in rows:
+                record = self._with_defaults(row)
+                names = list(record)
+                self.client._conn.execute(
+                    f"INSERT INTO {self.table_name} ({', '.join(names)}) "
+                    f"VALUES ({', '.join('?' * len(names))})",
+                    [self._encode(name, record[name]) for name in names]
+                )
+                inserted.append(record['id'])
+            self.client._conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            self.client._conn.execute('ROLLBACK')
+            raise LocalAPIError(str(e))
+        return LocalResponse(self._fetch_ids(inserted))
+
+    def _execute_update(self) -> LocalResponse:
+        values = dict(self._payload)
+        self._check_columns(values)
+        if 'updated_at' in self.columns and 'updated_at' not in values:
+            values['updated_at'] = now_iso()
+        where_sql, params = self._where_clause()
+        ids = [r['id'] for r in self.client._conn.execute(
+            f'SELECT id FROM {self.table_name}{where_sql}', params
+        )]
+        if ids:
+            assignments = ', '.join(f'{name} = ?' for name in values)
+            self.client._conn.execute(
+                f"UPDATE {self.table_name} SET {assignments} "
+                f"WHERE id IN ({', '.join('?' * len(ids))})",
+                [self._encode(name, value) for name, value in values.items()] + ids
+            )
+        return LocalResponse(self._fetch_ids(ids))
+
+    def _execute_delete(self) -> LocalResponse:
+        where_sql, params = self._where_clause()
+        rows = [self._decode(row) for row in self.client._conn.execute(
+            f'SELECT * FROM {self.table_name}{where_sql}', params
+        )]
+        self.client._conn.execute(f'DELETE FROM {self.table_name}{where_sql}', params)
+        return LocalResponse(rows)
+
+    # ----- joins embebidos -----
+
+    def _shape(self, table: str, rows: List[Dict[str, Any]], select: str,
+               embed_filters: Dict[str, List[Tuple[str, str, Any]]]) -> List[Dict[str, Any]]:
+        """Proyecta columnas y resuelve joins embebidos (recursivo)"""
+        plain, embeds = parse_select(select)
+        columns = SCHEMA[table]
+        wanted = list(columns) if '*' in plain or not plain else plain
+        for name in wanted:
+            if name not in columns:
+                raise LocalAPIError(f'column {table}.{name} does not exist')
+
+        shaped = [{name: row.get(name) for name in wanted} for row in rows]
+        for key, name, inner in embeds:
+            relation = RELATIONS.get((table, name))
+            if relation is None:
+                raise LocalAPIError(
+                    f"Could not find a relationship between '{table}' and '{name}'"
+                )
+            local, target, remote, many = relation
+            values = list({row[local] for row in rows if row.get(local) is not None})
+            related = self._related_rows(target, remote, values, embed_filters.get(key, []))
+            children = self._shape(target, related, inner, self._nested_filters(embed_filters, key))
+
+            grouped: Dict[Any, List[Dict[str, Any]]] = {}
+            for raw, child in zip(related, children):
+                grouped.setdefault(raw[remote], []).append(child)
+            for row, out in zip(rows, shaped):
+                matches = grouped.get(row.get(local), [])
+                out[key] = matches if many else (matches[0] if matches else None)
+        return shaped
+
+    def _related_rows(self, table: str, column: str, values: List[Any],
+                      filters: List[Tuple[str, str, Any]]) -> List[Dict[str, Any]]:
+        if not values:
+            return []
+        clauses = [f"{column} IN ({', '.join('?' * len(values))})"]
+        params: List[Any] = list(values)
+        for name, op, value in filters:
+            sql, extra = _compile_filter(table, name, op, value)
+            clauses.append(sql)
+            params.extend(extra)
+        sql = f"SELECT * FROM {table} WHERE {' AND '.join(clauses)}"
+        return [self._decode(row, table) for row in self.client._conn.execute(sql, params)]
+
+    @staticmethod
+    def _nested_filters(filters: Dict[str, List[Tuple[str, str, Any]]],
+                        key: str) -> Dict[str, List[Tuple[str, str, Any]]]:
+        """Filtros de joins anidados ('a.b.col' dentro del join 'a' pasa a 'b.col')"""
+        nested: Dict[str, List[Tuple[str, str, Any]]] = {}
+        for path, items in filters.items():
+            if path.startswith(key + '.'):
+                nested[path[len(key) + 1:]] = items
+        return nested
+
+    # ----- SQL -----
+
+    def _filter(self, column: str, op: str, value):
+        if op == 'in':
+            self.request.params.append((column, f"in.({','.join(str(v) for v in value)})"))
+        else:
+            self.request.params.append((column, f'{op}.{value}'))
+        if '.' in column:
+            path, name = column.rsplit('.', 1)
+            self._embed_filters.setdefault(path, []).append((name, op, value))
+            return self
+        self._where.append(_compile_filter(self.table_name, column, op, value))
+        return self
+
+    def _compile_logic(self, node) -> Tuple[str, List[Any]]:
+        kind, negated, payload = node
+        if kind == 'filter':
+            column, op, value = payload
+            sql, params = _compile_filter(self.table_name, column, op, value, from_text=True)
+        else:
+            parts = [self._compile_logic(child) for child in payload]
+            joiner = ' AND ' if kind == 'and' else ' OR '
+            sql = '(' + joiner.join(p[0] for p in parts) + ')' if parts else '1'
+            params = [value for p in parts for value in p[1]]
+        return (f'NOT ({sql})' if negated else sql), params
+
+    def _where_clause(self) -> Tuple[str, List[Any]]:
+        if not self._where:
+            return '', []
+        return (' WHERE ' + ' AND '.join(f'({sql})' for sql, _ in self._where),
+                [value for _, params in self._where for value in params])
+
+    def _order_clause(self) -> str:
+        if not self._order:
+            return ''
+        parts = []
+        for column, desc in self._order:
+            _check_column(self.table_name, column)
+            # Postgres: NULLS LAST en orden ascendente, NULLS FIRST en descendente
+            direction = 'DESC' if desc else 'ASC'
+            parts.append(f'({column} IS NULL) {direction}, {column} {direction}')
+        return ' ORDER BY ' + ', '.join(parts)
+
+    # ----- conversión de valores -----
+
+    def _with_defaults(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        self._check_columns(row)
+        record = dict(DEFAULTS.get(self.table_name, {}))
+        record.update(row)
+        record.setdefault('id', str(uuid.uuid4()))
+        for name in _NOW_ON_INSERT:
+            if name in self.columns and record.get(name) is None:
+                record[name] = now_iso()
+        return record
+
+    def _check_columns(self, row: Dict[str, Any]):
+        for name in row:
+            if name not in self.columns:
+                raise LocalAPIError(
+                    f"Could not find the '{name}' column of '{self.table_name}' in the schema cache"
+                )
+
+    def _encode(self, column: str, value):
+        return _encode(self.columns.get(column), value)
+
+    def _decode(self, row: sqlite3.Row, table: Optional[str] = None) -> Dict[str, Any]:
+        columns = SCHEMA[table or self.table_name]
+        return {name: _decode(columns[name], row[name]) for name in row.keys()}
+
+    def _fetch_ids(self, ids: List[Any]) -> List[Dict[str, Any]]:
+        if not ids:
+            return []
+        rows = self.client._conn.execute(
+            f"SELECT * FROM {self.table_name} WHERE id IN ({', '.join('?' * len(ids))})", ids
+        )
+        by_id = {row['id']: self._decode(row) for row in rows}
+        return [by_id[i] for i in ids if i in by_id]
+
+
+class _Request:
+    """Método, ruta, parámetros y cabeceras de una consulta"""
+
+    def __init__(self, path: str):
+        self.http_method = 'GET'
+        self.path = path
+        self.params = _Params()
+        self.headers: Dict[str, str] = {}
+
+
+class _Params(list):
+    """Parámetros de la consulta, con la interfaz de httpx.QueryParams que usa el memo"""
+
+    def multi_items(self) -> List[Tuple[str, str]]:
+        return list(self)
+
+
+def _check_column(table: str, column: str):
+    if column not in SCHEMA[table]:
+        raise LocalAPIError(f'column {table}.{column} does not exist')
+
+
+def _encode(kind: Optional[str], value):
+    if value is None:
+        return None
+    if kind == 'json':
+        return json.dumps(value)
+    if kind == 'bool':
+        return 1 if value in (True, 'true', 1) else 0
+    return value
+
+
+def _decode(kind: str, value):
+    if value is None:
+        return None
+    if kind == 'json':
+        return json.loads(value)
+    if kind == 'bool':
+        return bool(value)
+    return value
+
+
+def _coerce(kind: str, value):
+    """Convierte un valor llegado como texto (filtros lógicos) al tipo de la columna"""
+    if value is None or not isinstance(value, str):
+        return _encode(kind, value)
+    if kind == 'bool':
+        return 1 if value.lower() == 'true' else 0
+    if kind == 'int':
+        try:
+            return int(value)
+        except ValueError:
+            return value
+    if kind == 'real':
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _compile_filter(table: str, column: str, op: str, value,
+                    from_text: bool = False) -> Tuple[str, List[Any]]:
+    """Traduce un filtro de PostgREST a SQL con parámetros"""
+    _check_column(table, column)
+    kind = SCHEMA[table][column]
+    convert = (lambda v: _coerce(kind, v)) if from_text else (lambda v: _encode(kind, v))
+
+    if op == 'is':
+        text = str(value).lower() if value is not None else 'null'
+        if text == 'null':
+            return f'{column} IS NULL', []
+        return f'{column} = ?', [1 if text == 'true' else 0]
+    if op == 'in':
+        values = [convert(v) for v in value]
+        if not values:
+            return '0', []
+        return f"{column} IN ({', '.join('?' * len(values))})", values
+    if op == 'like':
+        return f'{column} GLOB ?', [str(value).translate(_GLOB_TRANSLATION)]
+    if op == 'ilike':
+        return f'{column} LIKE ?', [str(value).replace('*', '%')]
+    if op not in _OPERATORS:
+        raise LocalAPIError(f'operator {op} is not supported by the local backend')
+    return f'{column} {_OPERATORS[op]} ?', [convert(value)]
@@ -0,0 +1,81 @@
+"""
+Métricas de Dashboard
+Cuenta filas con count='exact' en peticiones head (sin descargar filas) para
+las tarjetas de los dashboards. Las sumas recorren la columna por páginas:
+una sola petición quedaría cortada en el max-rows de PostgREST.
+"""
+
+from typing import Dict, Any, Optional
+
+from .pagination import fetch_page
+from .parallel import fetch_all
+
+
+# Filas por página al sumar (menor que max-rows de PostgREST, 1000 por defecto)
+SUM_PAGE_SIZE = 500
+
+
+def count_rows(client, table: str, filters: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Cuenta filas de una tabla sin descargarlas
+
+    Args:
+        client: Cliente de Supabase
+        table: Nombre de la tabla
+        filters: Filtros de igualdad {columna: valor}
+
+    Returns:
+        Cantidad exacta de filas
+    """
+    query = client.table(table).select('id', count='exact', head=True)
+    for column, value in (filters or {}).items():
+        query = query.eq(column, value)
+    response = query.execute()
+    return response.count or 0
+
+
+def sum_column(client, table: str, column: str, filters: Optional[Dict[str, Any]] = None,
+               page_size: int = SUM_PAGE_SIZE) -> float:
+    """
+    Suma una columna descargando solo esa columna (y el id) de las filas filtradas
+
+    Args:
+        client: Cliente de Supabase
+        table: Nombre de la tabla
+        column: Columna numérica a sumar
+        filters: Filtros de igualdad {columna: valor}
+        page_size: Filas por petición
+
+    Returns:
+        Suma de la columna
+    """
+    total = 0
+    cursor = None
+    while True:
+        query = client.table(table).select(f'id,{column}')
+        for key, value in (filters or {}).items():
+            query = query.eq(key, value)
+        page = fetch_page(query, 'id', cursor=cursor, page_size=page_size, desc=False)
+        total += sum(row.get(column) or 0 for row in page)
+        if not page.has_more:
+            return total
+        cursor = page.next_cursor
+
+
+def fetch_admin_metrics(client) -> Dict[str, Any]:
+    """
+    Obtiene las métricas del dashboard de administración
+
+    Returns:
+        Dict con users, students, teachers, active_courses, enrollments,
+        payments y revenue
+    """
+    return fetch_all({
+        'users': lambda: count_rows(client, 'users', {'is_active': True}),
+        'students': lambda: count_rows(client, 'users', {'is_active': True, 'role': 'student'}),
+        'teachers': lambda: count_rows(client, 'users', {'is_active': True, 'role': 'teacher'}),
+        'active_courses': lambda: count_rows(client, 'courses', {'is_active': True}),
+        'enrollments': lambda: count_rows(client, 'enrollments'),
+        'payments': lambda: count_rows(client, 'subscriptions'),
+        'revenue': lambda: sum_column(client, 'subscriptions', 'amount_paid', {'payment_status': 'approved'}),
+    })
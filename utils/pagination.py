@@ -0,0 +1,157 @@
+"""
+Paginación por Cursor (Keyset)
+Pagina consultas de Supabase ordenadas por (columna de fecha, id) sin usar
+OFFSET, de modo que el costo de cada página no crece con el tamaño de la
+tabla. paginate_rows aplica los mismos cursores a filas ya cargadas en
+memoria (por ejemplo, agrupadas desde una réplica).
+"""
+
+import base64
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+
+DEFAULT_PAGE_SIZE = 20
+
+
+class Page:
+    """Una página de resultados y el cursor para pedir la siguiente"""
+
+    def __init__(self, rows: List[Dict[str, Any]], next_cursor: Optional[str]):
+        self.rows = rows
+        self.next_cursor = next_cursor
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+def encode_cursor(row: Dict[str, Any], order_column: str) -> str:
+    """Codifica la posición de una fila como cursor opaco"""
+    raw = json.dumps([row.get(order_column), row.get('id')])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """Decodifica un cursor generado por encode_cursor"""
+    order_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    return order_value, row_id
+
+
+def quote(value: Any) -> str:
+    """Cita un valor para usarlo dentro de un filtro lógico de PostgREST"""
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+
+def keyset_condition(cursor: str, order_column: str, desc: bool = True) -> str:
+    """
+    Condición de PostgREST que selecciona las filas posteriores al cursor
+
+    Para orden descendente: col < v OR (col = v AND id < i)
+    """
+    order_value, row_id = decode_cursor(cursor)
+    op = 'lt' if desc else 'gt'
+    return (
+        f"or({order_column}.{op}.{quote(order_value)},"
+        f"and({order_column}.eq.{quote(order_value)},id.{op}.{quote(row_id)}))"
+    )
+
+
+def search_condition(columns: List[str], term: str) -> str:
+    """Condición ilike sobre varias columnas para búsqueda de texto"""
+    pattern = quote(f"*{term}*")
+    return f"or({','.join(f'{c}.ilike.{pattern}' for c in columns)})"
+
+
+def apply_conditions(query, conditions: List[str]):
+    """Combina condiciones lógicas en un único filtro or=() de PostgREST"""
+    conditions = [c for c in conditions if c]
+    if not conditions:
+        return query
+    if len(conditions) == 1 and conditions[0].startswith('or('):
+        return query.or_(conditions[0][len('or('):-1])
+    return query.or_(f"and({','.join(conditions)})")
+
+
+def fetch_page(
+    query,
+    order_column: str,
+    cursor: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    desc: bool = True,
+    conditions: Optional[List[str]] = None
+) -> Page:
+    """
+    Ejecuta una consulta paginada por cursor
+
+    Args:
+        query: Consulta de Supabase con select() y filtros simples ya aplicados
+        order_column: Columna de orden (p. ej. 'created_at')
+        cursor: Cursor devuelto por la página anterior (None para la primera)
+        page_size: Filas por página
+        desc: Orden descendente (más recientes primero)
+        conditions: Condiciones lógicas adicionales (ver search_condition)
+
+    Returns:
+        Page con las filas y el cursor de la siguiente página
+    """
+    conditions = list(conditions or [])
+    if cursor:
+        conditions.append(keyset_condition(cursor, order_column, desc))
+
+    query = apply_conditions(query, conditions)
+    response = query\
+        .order(order_column, desc=desc)\
+        .order('id', desc=desc)\
+        .limit(page_size + 1)\
+        .execute()
+
+    rows = response.data or []
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1], order_column)
+    return Page(rows, next_cursor)
+
+
+def paginate_rows(
+    rows: List[Dict[str, Any]],
+    order_column: str,
+    cursor: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    desc: bool = True
+) -> Page:
+    """
+    Pagina por cursor filas que ya están en memoria
+
+    Args:
+        rows: Filas con order_column e id (en cualquier orden)
+        order_column: Columna de orden
+        cursor: Cursor devuelto por la página anterior (None para la primera)
+        page_size: Filas por página
+        desc: Orden descendente (más recientes primero)
+
+    Returns:
+        Page con las filas y el cursor de la siguiente página
+    """
+    def position(row: Dict[str, Any]) -> Tuple[str, str]:
+        return str(row.get(order_column) or ''), str(row.get('id'))
+
+    ordered = sorted(rows, key=position, reverse=desc)
+    if cursor:
+        order_value, row_id = decode_cursor(cursor)
+        last = (str(order_value or ''), str(row_id))
+        ordered = [row for row in ordered if (position(row) < last if desc else position(row) > last)]
+
+    next_cursor = None
+    if len(ordered) > page_size:
+        ordered = ordered[:page_size]
+        next_cursor = encode_cursor(ordered[-1], order_column)
+    return Page(ordered, next_cursor)
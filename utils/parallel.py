@@ -0,0 +1,83 @@
+"""
+Consultas en Paralelo
+Ejecuta lecturas independientes al mismo tiempo en hilos, para que la
+latencia de una página se acerque a la de su consulta más lenta en lugar de a
+la suma de todas.
+
+Cada llamada usa su propio pool (a lo sumo MAX_WORKERS hilos): una página con
+muchas lecturas no deja en cola las de otras sesiones, y ningún hilo queda
+con el contexto de una sesión anterior.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from typing import Any, Callable, Dict, Iterable
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # Uso fuera de Streamlit (scripts y benchmarks)
+    add_script_run_ctx = None
+    get_script_run_ctx = None
+
+try:
+    from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+except ImportError:
+    SCRIPT_RUN_CONTEXT_ATTR_NAME = 'streamlit_script_run_ctx'
+
+
+# Hilos máximos por llamada a fetch_all
+MAX_WORKERS = 8
+
+_worker = threading.local()
+
+
+def _bind_context(func: Callable[[], Any]) -> Callable[[], Any]:
+    """Propaga el contexto de la sesión de Streamlit al hilo que ejecuta func"""
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+
+    def run():
+        thread = threading.current_thread()
+        previous = getattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+        if ctx is not None:
+            add_script_run_ctx(thread, ctx)
+        _worker.active = True
+        try:
+            return func()
+        finally:
+            _worker.active = False
+            # El hilo vuelve a su contexto anterior (add_script_run_ctx no acepta None)
+            if previous is None:
+                thread.__dict__.pop(SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+            else:
+                setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, previous)
+    return run
+
+
+def fetch_all(calls: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """
+    Ejecuta varias lecturas a la vez y espera a que terminen todas
+
+    Args:
+        calls: {nombre: función sin argumentos que hace la lectura}
+
+    Returns:
+        {nombre: resultado}. Si alguna lectura falla, se propaga su excepción
+    """
+    # Dentro de un hilo de otra llamada se ejecuta en serie para no multiplicar hilos
+    if len(calls) <= 1 or getattr(_worker, 'active', False):
+        return {name: func() for name, func in calls.items()}
+
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(calls)),
+                            thread_name_prefix='fetch') as executor:
+        futures = {name: executor.submit(_bind_context(func)) for name, func in calls.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def prefetch(calls: Iterable[Callable[[], Any]]):
+    """
+    Calienta en paralelo lecturas en caché que la página usará después
+
+    Las vistas siguen llamando a sus funciones get_* de siempre, que ya
+    encuentran el resultado en el caché.
+    """
+    fetch_all({str(i): func for i, func in enumerate(calls)})
@@ -0,0 +1,108 @@
+"""
+Motor de Progreso de Cursos
+Calcula el avance de una inscripción aplicando cambios incrementales
+sobre el conjunto de ítems del curso (materiales y exámenes)
+"""
+
+import json
+from typing import Dict, Any, List, Iterable, FrozenSet
+
+
+def material_item_id(material_id: str) -> str:
+    """ID de ítem de progreso para un material"""
+    return f"mat_{material_id}"
+
+
+def exam_item_id(exam_id: str) -> str:
+    """ID de ítem de progreso para un examen"""
+    return f"exam_{exam_id}"
+
+
+def course_item_ids(tree: List[Dict[str, Any]]) -> FrozenSet[str]:
+    """
+    Obtiene los ítems que cuentan para el progreso de un curso
+
+    Args:
+        tree: Árbol del curso (ver utils.course_content)
+
+    Returns:
+        Conjunto de IDs de ítems ('mat_<id>' y 'exam_<id>')
+    """
+    items = set()
+    for module in tree:
+        items.update(material_item_id(m['id']) for m in module['materials'])
+        items.update(exam_item_id(e['id']) for e in module['exams'])
+    return frozenset(items)
+
+
+def parse_completed_items(raw) -> List[str]:
+    """Normaliza el campo completed_items de una inscripción a una lista"""
+    if not raw:
+        return []
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return []
+    return list(raw)
+
+
+class CourseProgress:
+    """Progreso de una inscripción con actualizaciones en O(1)"""
+
+    def __init__(self, item_ids: FrozenSet[str], completed_items: Iterable[str]):
+        """
+        Args:
+            item_ids: Ítems actuales del curso (denominador)
+            completed_items: Ítems completados guardados en la inscripción
+        """
+        self.item_ids = item_ids
+        self.completed_items = list(dict.fromkeys(completed_items))
+        self._completed = set(self.completed_items)
+        # Solo cuentan ítems que aún existen en el curso
+        self.completed_count = len(self._completed & item_ids)
+
+    @property
+    def total_items(self) -> int:
+        return len(self.item_ids)
+
+    @property
+    def percentage(self) -> float:
+        if not self.item_ids:
+            return 0
+        return self.completed_count / len(self.item_ids) * 100
+
+    @property
+    def completion_status(self) -> str:
+        return 'completed' if self.percentage >= 100 else 'in_progress'
+
+    def is_completed(self, item_id: str) -> bool:
+        return item_id in self._completed
+
+    def mark(self, item_id: str) -> bool:
+        """Marca un ítem como completado. Retorna True si hubo cambio"""
+        if item_id in self._completed:
+            return False
+        self._completed.add(item_id)
+        self.completed_items.append(item_id)
+        if item_id in self.item_ids:
+            self.completed_count += 1
+        return True
+
+    def unmark(self, item_id: str) -> bool:
+        """Desmarca un ítem completado. Retorna True si hubo cambio"""
+        if item_id not in self._completed:
+            return False
+        self._completed.discard(item_id)
+        self.completed_items.remove(item_id)
+        if item_id in self.item_ids:
+            self.completed_count -= 1
+        return True
+
+    def to_update(self) -> Dict[str, Any]:
+        """Datos para actualizar la fila de enrollments"""
+        return {
+            'completed_items': json.dumps(self.completed_items),
+            'progress_percentage': self.percentage,
+            'completion_status': self.completion_status
+        }
@@ -0,0 +1,84 @@
+"""
+Perfiles de Proyección de Columnas
+Define qué columnas pide cada lectura según su uso, para no traer filas
+completas (ni datos sensibles como password_hash) cuando la vista solo
+muestra unos pocos campos.
+
+Perfiles:
+    list    columnas que muestran los listados
+    detail  fila completa, con joins sin datos sensibles
+    stats   lo mínimo para contar y agrupar en métricas
+"""
+
+from typing import Dict, Tuple
+
+
+# Columnas públicas de las tablas embebidas en joins
+USER_PUBLIC_COLUMNS = ('id', 'email', 'first_name', 'last_name', 'role')
+COURSE_SUMMARY_COLUMNS = ('id', 'name', 'description', 'price', 'duration_days')
+
+
+def embed(table: str, columns: Tuple[str, ...]) -> str:
+    """Construye un join embebido de PostgREST, p. ej. users(id,email)"""
+    return f"{table}({','.join(columns)})"
+
+
+PROFILES: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    'users': {
+        'list': ('id', 'email', 'first_name', 'last_name', 'role', 'created_at'),
+        'detail': ('id', 'email', 'first_name', 'last_name', 'role', 'is_active',
+                   'requires_password_reset', 'created_at'),
+        'stats': ('id', 'role'),
+        # Único perfil que incluye el hash, solo para autenticación
+        'auth': ('id', 'email', 'password_hash', 'first_name', 'last_name', 'role',
+                 'is_active', 'requires_password_reset'),
+    },
+    'courses': {
+        'list': ('id', 'name', 'description', 'price', 'duration_days', 'is_active', 'created_at'),
+        'detail': ('*',),
+        'stats': ('id', 'name', 'price', 'is_active'),
+    },
+    'enrollments': {
+        'list': ('id', 'student_id', 'course_id', 'enrollment_date', 'progress_percentage',
+                 'completion_status', 'completed_items', 'certificate_issued',
+                 embed('users', ('id', 'email', 'first_name', 'last_name')),
+                 embed('courses', COURSE_SUMMARY_COLUMNS)),
+        'detail': ('*', embed('users', USER_PUBLIC_COLUMNS), 'courses(*)'),
+        'stats': ('id', 'student_id', 'course_id', 'enrollment_date', 'progress_percentage',
+                  'completion_status'),
+    },
+    'subscriptions': {
+        'list': ('id', 'student_id', 'course_id', 'amount_paid', 'payment_status', 'created_at',
+                 embed('users', ('id', 'first_name', 'last_name')),
+                 embed('courses', ('id', 'name'))),
+        'detail': ('*', embed('users', USER_PUBLIC_COLUMNS), 'courses(*)'),
+        'stats': ('id', 'student_id', 'course_id', 'amount_paid', 'payment_status'),
+    },
+    'study_materials': {
+        # Sin file_content_b64: el contenido se pide por id solo al descargar
+        'list': ('id', 'module_id', 'title', 'file_name', 'file_size', 'file_type',
+                 'storage_key', 'uploaded_by', 'external_link', 'created_at'),
+        'detail': ('*',),
+        'content': ('id', 'file_name', 'file_type', 'storage_key', 'file_content_b64'),
+    },
+}
+
+# Perfiles cuyo resultado no embebe otras tablas
+FLAT_PROFILES = {'stats', 'auth', 'content'}
+
+
+def projection(table: str, profile: str = 'list') -> str:
+    """
+    Obtiene la cadena de select() para una tabla y un perfil
+
+    Args:
+        table: Nombre de la tabla
+        profile: Perfil de proyección ('list', 'detail', 'stats'...)
+
+    Returns:
+        Columnas separadas por comas, listas para select()
+    """
+    try:
+        return ','.join(PROFILES[table][profile])
+    except KeyError:
+        raise ValueError(f"Perfil de proyección desconocido: {table}/{profile}")
@@ -0,0 +1,251 @@
+"""
+Memo de Consultas por Ejecución
+Guarda las respuestas de lecturas hechas durante una sola ejecución del
+script de Streamlit. Una consulta idéntica repetida en la misma pasada
+(dentro de un bucle, o en el listado y luego en el editor) se resuelve desde
+el memo; en la siguiente ejecución el memo empieza vacío y los datos se
+vuelven a leer.
+
+BatchLoader agrupa las búsquedas de usuarios, cursos y módulos por id: las
+vistas anuncian los ids que van a necesitar con want() y el primer get()
+los resuelve todos con una sola consulta in_ por tabla.
+"""
+
+import copy
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .query_profiles import USER_PUBLIC_COLUMNS, projection
+
+
+# Ids por consulta in_ (mantiene la URL de PostgREST en un largo razonable)
+BATCH_LIMIT = 100
+
+
+# Cabeceras que cambian el resultado de una lectura (single(), count, rangos)
+_RESULT_HEADERS = ('accept', 'prefer', 'range')
+
+
+def _request(query):
+    """Configuración HTTP de una consulta (postgrest la guarda en query.request)"""
+    return getattr(query, 'request', query)
+
+
+def _method(request) -> Optional[str]:
+    method = getattr(request, 'http_method', None)
+    if method is None:
+        return None
+    # postgrest usa un Enum (RequestMethod.GET); el backend local, texto
+    return str(getattr(method, 'value', method)).upper()
+
+
+def query_key(query) -> Optional[Tuple]:
+    """
+    Clave normalizada de una consulta de Supabase (postgrest) sin ejecutar
+
+    Args:
+        query: Constructor de consulta (resultado de table().select()...)
+
+    Returns:
+        Tupla (método, ruta, parámetros, cabeceras relevantes), o None si la
+        consulta no es una lectura o no se puede normalizar
+    """
+    request = _request(query)
+    method = _method(request)
+    path = getattr(request, 'path', None)
+    params = getattr(request, 'params', None)
+    if method is None or path is None or params is None:
+        return None
+    if method not in ('GET', 'HEAD'):
+        return None
+
+    headers = getattr(request, 'headers', None) or {}
+    relevant = tuple(
+        (name, headers.get(name))
+        for name in _RESULT_HEADERS
+        if headers.get(name) is not None
+    )
+    items = params.multi_items() if hasattr(params, 'multi_items') else params.items()
+    return (method, str(path), tuple(sorted(items)), relevant)
+
+
+def is_write(query) -> bool:
+    """Indica si una consulta sin ejecutar modifica datos (POST, PATCH, DELETE...)"""
+    method = _method(_request(query))
+    return method is not None and method not in ('GET', 'HEAD')
+
+
+def query_table(query) -> Optional[str]:
+    """Tabla a la que apunta una consulta ('/rest/v1/users' -> 'users')"""
+    path = getattr(_request(query), 'path', None)
+    if not path:
+        return None
+    return str(path).rstrip('/').rsplit('/', 1)[-1]
+
+
+class QueryMemo:
+    """Respuestas de lecturas de la ejecución actual, agrupadas por tabla"""
+
+    def __init__(self):
+        self._responses: Dict[Tuple, Any] = {}
+        self.hits = 0
+        # fetch_all ejecuta lecturas de una misma sesión en varios hilos
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """
+        Busca una respuesta memorizada
+
+        Returns:
+            Tuple[bool, Any]: (encontrada, copia de la respuesta)
+        """
+        with self._lock:
+            if key not in self._responses:
+                return False, None
+            self.hits += 1
+            response = self._responses[key]
+        # Copia para que un llamador que modifique filas no afecte a otro
+        return True, copy.deepcopy(response)
+
+    def set(self, key: Tuple, response: Any):
+        """Guarda la respuesta de una lectura"""
+        response = copy.deepcopy(response)
+        with self._lock:
+            self._responses[key] = response
+
+    def invalidate(self, table: str):
+        """Descarta las lecturas de una tabla tras escribir en ella"""
+        suffix = f"/{table}"
+        with self._lock:
+            for key in [k for k in self._responses if k[1].rstrip('/').endswith(suffix)]:
+                del self._responses[key]
+
+    def reset(self):
+        """Vacía el memo al comenzar una nueva ejecución"""
+        with self._lock:
+            self._responses.clear()
+            self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+
+class EntityLoader:
+    """Filas de una tabla por id, cargadas en lote y memorizadas"""
+
+    def __init__(self, fetch_many: Callable[[List[Any]], List[Dict[str, Any]]]):
+        """
+        Args:
+            fetch_many: Función que recibe ids y retorna sus filas
+        """
+        self._fetch_many = fetch_many
+        self._pending: Dict[Any, None] = {}
+        self._loaded: Dict[Any, Optional[Dict[str, Any]]] = {}
+        self.batches = 0
+        # Reentrante: get y get_many llaman a flush
+        self._lock = threading.RLock()
+
+    def want(self, ids: Iterable[Any]):
+        """Anuncia ids que se pedirán después, para resolverlos en el mismo lote"""
+        with self._lock:
+            for entity_id in ids:
+                if entity_id is not None and entity_id not in self._loaded:
+                    self._pending[entity_id] = None
+
+    def get(self, entity_id) -> Optional[Dict[str, Any]]:
+        """Fila con ese id (None si no existe), resolviendo los ids pendientes"""
+        if entity_id is None:
+            return None
+        with self._lock:
+            if entity_id not in self._loaded:
+                self.want([entity_id])
+                self.flush()
+            row = self._loaded.get(entity_id)
+        return dict(row) if row is not None else None
+
+    def get_many(self, ids: Iterable[Any]) -> Dict[Any, Optional[Dict[str, Any]]]:
+        """Filas de varios ids en un solo lote"""
+        ids = list(ids)
+        with self._lock:
+            self.want(ids)
+            self.flush()
+            return {entity_id: self.get(entity_id) for entity_id in ids}
+
+    def flush(self):
+        """Consulta los ids pendientes"""
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+            for start in range(0, len(pending), BATCH_LIMIT):
+                chunk = pending[start:start + BATCH_LIMIT]
+                rows = self._fetch_many(chunk)
+                self.batches += 1
+                for entity_id in chunk:
+                    self._loaded.setdefault(entity_id, None)
+                for row in rows:
+                    self._loaded[row['id']] = row
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+            self._loaded.clear()
+            self.batches = 0
+
+
+def _execute(query):
+    return query.execute()
+
+
+def _fetch_by_ids(client, table: str, columns: str,
+                  execute: Callable[[Any], Any]) -> Callable[[List[Any]], List[Dict[str, Any]]]:
+    def fetch(ids: List[Any]) -> List[Dict[str, Any]]:
+        response = execute(client.table(table).select(columns).in_('id', ids))
+        return response.data if response is not None and response.data else []
+    return fetch
+
+
+class BatchLoader:
+    """Cargadores por id de usuarios, cursos y módulos para una ejecución"""
+
+    def __init__(self, client, execute: Callable[[Any], Any] = _execute):
+        """
+        Args:
+            client: Cliente de Supabase
+            execute: Función que ejecuta una consulta y retorna la respuesta,
+                o None si falló (p. ej. safe_supabase_query); en ese caso los
+                ids del lote quedan sin fila
+        """
+        self.users = EntityLoader(_fetch_by_ids(
+            client, 'users', ','.join(USER_PUBLIC_COLUMNS), execute
+        ))
+        self.courses = EntityLoader(_fetch_by_ids(
+            client, 'courses', projection('courses', 'list'), execute
+        ))
+        self.modules = EntityLoader(_fetch_by_ids(
+            client, 'course_modules', 'id,course_id,module_number,title', execute
+        ))
+
+    def user(self, user_id) -> Optional[Dict[str, Any]]:
+        """Usuario por id (columnas públicas)"""
+        return self.users.get(user_id)
+
+    def course(self, course_id) -> Optional[Dict[str, Any]]:
+        """Curso por id (perfil 'list')"""
+        return self.courses.get(course_id)
+
+    def module(self, module_id) -> Optional[Dict[str, Any]]:
+        """Módulo por id"""
+        return self.modules.get(module_id)
+
+    def invalidate(self, table: str):
+        """Descarta lo cargado de una tabla tras escribir en ella"""
+        loader = {'users': self.users, 'courses': self.courses,
+                  'course_modules': self.modules}.get(table)
+        if loader is not None:
+            loader.reset()
+
+    def reset(self):
+        """Descarta lo cargado al comenzar una nueva ejecución"""
+        self.users.reset()
+        self.courses.reset()
+        self.modules.reset()